@@ -0,0 +1,81 @@
+import json
+import re
+
+# 페이지 인라인 스크립트의 window.__APOLLO_STATE__ 에서 필요한 항목만 디코딩
+#   - 기존 방식(정규식 ({.*?}); + 전체 json.loads)은 문자열 데이터 안의 "};"에서 잘못 끊길 수 있고, 쓰지 않는 항목까지 모두 디코딩함
+#   - 여기서는 고른 키 접두어의 위치만 str.find로 찾고, 그 값만 JSONDecoder.raw_decode로 디코딩 (값의 끝은 디코더가 정확히 찾음)
+#   - ROOT_QUERY는 통째로 디코딩하지 않고 그 안의 placeDetail*/restaurantList* 필드만 디코딩
+#   - 키를 찾지 못하면 APOLLO_STATE 객체 전체를 raw_decode로 디코딩 (경계는 역시 디코더가 결정)
+# 결과는 기존과 같은 {키: 값} 형태라 process_apollo_item / parse_apollo_cafes를 그대로 사용
+DETAIL_ENTRY_PREFIXES = ("PlaceDetailBase:", "Menu:", "InformationFacilities:")
+DETAIL_ROOT_FIELDS = ("placeDetail",)
+LIST_ENTRY_PREFIXES = ("RestaurantListSummary:",)
+LIST_ROOT_FIELDS = ("restaurantList",)
+
+_STATE_START = re.compile(r"window\.__APOLLO_STATE__\s*=\s*")
+_DECODER = json.JSONDecoder()
+_KEY_AT = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*') # 위치가 정해진 문자열 키 + 콜론
+_WHITESPACE = " \t\r\n"
+
+
+# position의 따옴표가 키의 시작인지: 바로 앞(공백 제외)이 JSON 구조 문자({ 또는 ,)여야 함
+# 문자열 데이터 안의 따옴표는 항상 \" 로 이스케이프되어 있으므로 앞 글자가 역슬래시라 여기에 걸리지 않음
+def _is_key_start(script_content, position):
+    before = position - 1
+    while before >= 0 and script_content[before] in _WHITESPACE:
+        before -= 1
+    return before >= 0 and script_content[before] in "{,"
+
+# APOLLO_STATE 객체가 시작하는 위치 ({), 없으면 -1
+def find_apollo_state_start(script_content):
+    match = _STATE_START.search(script_content)
+    if not match or not script_content.startswith("{", match.end()):
+        return -1
+    return match.end()
+
+# 전체 디코딩 (경계는 raw_decode가 결정하므로 문자열 안의 "};"에 영향을 받지 않음)
+def decode_full_apollo_state(script_content):
+    start = find_apollo_state_start(script_content)
+    if start < 0:
+        return None
+    state, _ = _DECODER.raw_decode(script_content, start)
+    return state
+
+# start부터 접두어로 시작하는 키를 찾아 값만 디코딩. 디코딩한 값 안쪽에서 다시 찾지 않도록 값의 끝 다음부터 계속 검색
+def _decode_matching(script_content, prefixes, start):
+    entries = {}
+    for prefix in prefixes:
+        needle = '"' + prefix
+        position = start
+        while True:
+            found = script_content.find(needle, position)
+            if found < 0:
+                break
+            match = _KEY_AT.match(script_content, found)
+            if not match or not _is_key_start(script_content, found):
+                position = found + 1
+                continue
+            value, position = _DECODER.raw_decode(script_content, match.end())
+            key = match.group(1)
+            entries[json.loads(f'"{key}"') if "\\" in key else key] = value
+    return entries
+
+def extract_apollo_entries(script_content, entry_prefixes=DETAIL_ENTRY_PREFIXES, root_fields=DETAIL_ROOT_FIELDS):
+    start = find_apollo_state_start(script_content)
+    if start < 0:
+        print("스크립트에서 APOLLO_STATE 패턴을 찾지 못했습니다.")
+        return None
+
+    try:
+        state = _decode_matching(script_content, entry_prefixes, start)
+        root_start = script_content.find('"ROOT_QUERY"', start)
+        root_query = _decode_matching(script_content, root_fields, root_start) if root_start >= 0 else {}
+        if state or root_query:
+            if root_start >= 0:
+                state["ROOT_QUERY"] = {"__typename": "Query", **root_query}
+            return state
+        # 고른 항목이 하나도 없음: 키 형식이 예상과 다를 수 있으므로 전체 디코딩으로 확인
+        return decode_full_apollo_state(script_content)
+    except json.JSONDecodeError as e:
+        print(f"JSON 파싱 오류: {e}")
+        return None
@@ -0,0 +1,117 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from apollo_state import extract_apollo_entries, DETAIL_ENTRY_PREFIXES, DETAIL_ROOT_FIELDS
+from browser_pool import DEFAULT_USER_AGENT
+from rate_limit import HostRateLimiter, host_of
+from review_api import PLACE_BASE_URL, parse_retry_after
+
+# 기본 정보를 브라우저 없이 수집: 홈 페이지 HTML에 서버에서 렌더링된 __APOLLO_STATE__가 그대로 들어 있으므로
+# GET 한 번으로 받아서 같은 선택 디코딩(apollo_state.py)과 process_apollo_item을 사용
+# 응답은 왔는데 쓸 수 없으면(차단 페이지/APOLLO_STATE 없음) None을 돌려주고, 호출한 쪽에서 브라우저로 다시 시도
+# 요청 자체가 실패하면(429/5xx/네트워크 오류를 재시도해도 계속) HomePageFetchError
+#   429는 호스트 제한에 알리고 제한이 풀린 뒤 다시 요청 (브라우저로 넘기면 같은 호스트를 제한 밖에서 치게 됨)
+CHALLENGE_MARKERS = ("captcha", "비정상적인 접근", "서비스 이용이 제한")
+HOME_FETCH_ATTEMPTS = 3
+
+
+def home_page_url(business_id, base_url=PLACE_BASE_URL):
+    return f"{base_url}/restaurant/{business_id}/home"
+
+def build_home_headers(base_url=PLACE_BASE_URL):
+    return {
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Referer": f"{base_url}/",
+    }
+
+# APOLLO_STATE가 들어 있는 인라인 스크립트 부분만 (HTML 안의 스크립트 본문에는 "</script>"가 나올 수 없으므로 경계로 사용)
+def apollo_script_of(html):
+    start = html.find("window.__APOLLO_STATE__")
+    if start < 0:
+        return None
+    end = html.find("</script>", start)
+    return html[start:end if end >= 0 else len(html)]
+
+def is_challenge_page(html):
+    head = html[:20000].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+class HomePageFetchError(Exception):
+    pass
+
+
+# 여러 스레드가 같이 사용 (keep-alive 연결 풀 + 머신 공유 토큰 버킷)
+class BasicInfoSession:
+    def __init__(self, pool_maxsize=10, base_url=PLACE_BASE_URL, user_agent=DEFAULT_USER_AGENT, rate_limiter=None, timeout=10):
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.base_url = base_url
+        self.host = host_of(base_url)
+        self.timeout = timeout
+        self.stats = {"http": 0, "failed": 0, "challenge": 0, "throttled": 0}
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": user_agent})
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    # 매 시도마다 호스트 제한을 거침 (429 뒤에는 Retry-After가 지날 때까지 acquire가 기다림)
+    def fetch_home_html(self, business_id, attempts=HOME_FETCH_ATTEMPTS):
+        error = None
+        for attempt in range(attempts):
+            self.rate_limiter.acquire(self.host)
+            try:
+                response = self.session.get(home_page_url(business_id, self.base_url), headers=build_home_headers(self.base_url), timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                error = f"요청 오류: {e}"
+                print(f"[{business_id}] 홈 페이지 {error} (시도 {attempt + 1}/{attempts})")
+                continue
+            if response.status_code == 429:
+                self._count("throttled")
+                self.rate_limiter.on_throttle(self.host, parse_retry_after(response.headers.get("Retry-After")))
+                error = "429 응답"
+                print(f"[{business_id}] 홈 페이지 429 응답, 제한이 풀린 뒤 다시 요청 (시도 {attempt + 1}/{attempts})")
+                continue
+            if response.status_code >= 500:
+                error = f"응답 오류: {response.status_code}"
+                print(f"[{business_id}] 홈 페이지 {error} (시도 {attempt + 1}/{attempts})")
+                continue
+            if response.status_code != 200:
+                raise HomePageFetchError(f"응답 오류: {response.status_code}")
+            self.rate_limiter.on_success(self.host)
+            response.encoding = "utf-8"
+            return response.text
+        raise HomePageFetchError(f"{attempts}번 시도 모두 실패 ({error})")
+
+    # 성공하면 {키: 값} APOLLO_STATE, 받은 페이지를 쓸 수 없으면 None, 요청이 실패하면 HomePageFetchError
+    def read_apollo_state(self, business_id):
+        try:
+            html = self.fetch_home_html(business_id)
+        except HomePageFetchError:
+            self._count("failed")
+            raise
+        script_content = apollo_script_of(html)
+        if script_content is None:
+            if is_challenge_page(html):
+                self._count("challenge")
+                print(f"[{business_id}] 차단(보안 확인) 페이지 응답")
+            else:
+                self._count("failed")
+                print(f"[{business_id}] 홈 페이지에 APOLLO_STATE가 없음")
+            return None
+        apollo_state = extract_apollo_entries(script_content, DETAIL_ENTRY_PREFIXES, DETAIL_ROOT_FIELDS)
+        if not apollo_state:
+            self._count("failed")
+            return None
+        self._count("http")
+        return apollo_state
+
+    def close(self):
+        self.session.close()
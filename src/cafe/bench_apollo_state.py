@@ -0,0 +1,149 @@
+import copy
+import glob
+import json
+import os
+import re
+import sys
+import time
+from apollo_state import extract_apollo_entries, DETAIL_ENTRY_PREFIXES, DETAIL_ROOT_FIELDS, LIST_ENTRY_PREFIXES, LIST_ROOT_FIELDS
+from crawl_all_cafe_list import NAVER_SCRIPT_JS, parse_apollo_cafes
+from crawl_cafe_basic_info import new_cafe_info, process_apollo_item
+
+# APOLLO_STATE 추출: 기존 방식(정규식 + 전체 json.loads) vs 선택 디코딩(apollo_state.py) 시간/결과 비교
+#   python bench_apollo_state.py                      -> 저장된 픽스처로 비교 (없으면 합성 픽스처 생성)
+#   python bench_apollo_state.py --record ID [ID ...] -> 실제 상세 페이지 스크립트를 픽스처로 저장 후 비교
+FIXTURE_DIR = "./data/fixtures/apollo"
+LEGACY_PATTERN = re.compile(r"window\.__APOLLO_STATE__\s*=\s*({.*?});", re.DOTALL)
+
+
+def legacy_extract(script_content):
+    match = LEGACY_PATTERN.search(script_content)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+def detail_result(state):
+    cafe_info = new_cafe_info("bench")
+    for value in (state or {}).values():
+        process_apollo_item(value, cafe_info)
+    return cafe_info
+
+def list_result(state):
+    cafes = []
+    if state:
+        parse_apollo_cafes(state, cafes)
+    return cafes
+
+# 상세 페이지와 비슷한 크기/구성의 합성 스크립트 (리뷰/이미지 등 쓰지 않는 항목이 대부분)
+# tricky=True면 리뷰 본문에 "};"가 들어 있어 기존 정규식이 중간에서 끊김
+def make_detail_script(business_id, reviews=400, menus=20, tricky=False):
+    state = {
+        f"PlaceDetailBase:{business_id}": {
+            "__typename": "PlaceDetailBase", "id": business_id, "name": f"합성 카페 {business_id}", "category": "카페,디저트",
+            "microReviews": ["분위기 좋은"], "roadAddress": "서울 성동구 성수이로 1", "address": "성수동2가 1",
+            "virtualPhone": "0507-0000-0000", "paymentInfo": ["제로페이"], "conveniences": ["단체 이용 가능", "포장"],
+        },
+        "ROOT_QUERY": {
+            "__typename": "Query",
+            f'placeDetail({{"input":{{"id":"{business_id}"}}}})': {
+                "__typename": "PlaceDetail",
+                'newBusinessHours({"format":"restaurant"})': [{"businessHours": [
+                    {"day": day, "businessHours": {"start": "10:00", "end": "22:00"}, "breakHours": [], "description": None, "lastOrderTimes": None}
+                    for day in ["월", "화", "수", "목", "금", "토", "일"]
+                ]}],
+                'images({"source":["ugcModeling"]})': {"images": [{"origin": f"https://example.invalid/img/{i}.jpg"} for i in range(30)]},
+                'description': "합성 설명 " * 20,
+                'homepages': {"repr": {"url": "https://example.invalid"}},
+                'informationTab': {"parkingInfo": {"basicParking": "주차 불가"}},
+            },
+            f'visitorReviews({{"input":{{"businessId":"{business_id}"}}}})': {"items": [{"__ref": f"VisitorReview:{i}"} for i in range(reviews)]},
+        },
+    }
+    for i in range(menus):
+        state[f"Menu:{business_id}_{i}"] = {"__typename": "Menu", "name": f"메뉴 {i}", "price": str(4000 + i * 500), "description": "", "images": []}
+    for i in range(5):
+        state[f"InformationFacilities:{business_id}_{i}"] = {"__typename": "InformationFacilities", "id": f"{business_id}_{i}", "name": f"편의시설 {i}"}
+    for i in range(reviews):
+        body = f"리뷰 본문 {i} " * 10 + ("맛있어요 {^^};" if tricky and i == reviews // 2 else "")
+        state[f"VisitorReview:{i}"] = {
+            "__typename": "VisitorReview", "id": str(i), "body": body, "author": {"id": f"a{i}", "nickname": f"user{i}"},
+            "media": [{"thumbnail": f"https://example.invalid/m/{i}-{m}.jpg"} for m in range(3)], "tags": ["분위기", "디저트"],
+        }
+    return "var naver=typeof naver!=='undefined'?naver:{};window.__APOLLO_STATE__ = " + json.dumps(state, ensure_ascii=False) + ";window.__PLACE_STATE__ = {});"
+
+def make_list_script(count=70, tricky=False):
+    state = {"ROOT_QUERY": {"__typename": "Query", 'restaurantList({"input":{"query":"성수 카페"}})': {"total": 300, "items": [{"__ref": f"RestaurantListSummary:{i}"} for i in range(count)]}}}
+    for i in range(count):
+        state[f"RestaurantListSummary:{i}"] = {
+            "__typename": "RestaurantListSummary", "id": str(1000 + i), "name": f"카페 {i}" + (" {본점};" if tricky and i == 3 else ""),
+            "category": "카페", "imageUrl": f"https://example.invalid/{i}.jpg", "microReview": ["분위기"], "visitorReviewCount": str(i * 13),
+        }
+    return "var naver=typeof naver!=='undefined'?naver:{};window.__APOLLO_STATE__ = " + json.dumps(state, ensure_ascii=False) + ";"
+
+def write_synthetic_fixtures(fixture_dir=FIXTURE_DIR):
+    fixtures = {
+        "detail/synthetic_1.js": make_detail_script("1001"),
+        "detail/synthetic_2.js": make_detail_script("1002", reviews=1500, menus=60),
+        "detail/synthetic_tricky.js": make_detail_script("1003", tricky=True),
+        "list/synthetic_1.js": make_list_script(),
+        "list/synthetic_tricky.js": make_list_script(tricky=True),
+    }
+    for name, content in fixtures.items():
+        path = os.path.join(fixture_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    print(f"합성 픽스처 {len(fixtures)}개 생성: {fixture_dir}")
+
+def record_fixtures(business_ids, fixture_dir=FIXTURE_DIR):
+    from browser_pool import BrowserPool
+    browser_pool = BrowserPool(size=1)
+    os.makedirs(os.path.join(fixture_dir, "detail"), exist_ok=True)
+    try:
+        for business_id in business_ids:
+            with browser_pool.new_page() as page:
+                page.goto(f"https://pcmap.place.naver.com/restaurant/{business_id}/home", wait_until="networkidle", timeout=30000)
+                script_content = page.evaluate(NAVER_SCRIPT_JS)
+            if script_content:
+                with open(os.path.join(fixture_dir, "detail", f"{business_id}.js"), "w", encoding="utf-8") as f:
+                    f.write(script_content)
+                print(f"[{business_id}] 픽스처 저장")
+    finally:
+        browser_pool.close()
+
+def _time_ms(func, script_content, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(script_content)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def benchmark_apollo_state(fixture_dir=FIXTURE_DIR, repeat=50):
+    kinds = {
+        "detail": (lambda s: extract_apollo_entries(s, DETAIL_ENTRY_PREFIXES, DETAIL_ROOT_FIELDS), detail_result),
+        "list": (lambda s: extract_apollo_entries(s, LIST_ENTRY_PREFIXES, LIST_ROOT_FIELDS), list_result),
+    }
+    for kind, (selective_extract, to_result) in kinds.items():
+        for path in sorted(glob.glob(os.path.join(fixture_dir, kind, "*.js"))):
+            with open(path, "r", encoding="utf-8") as f:
+                script_content = f.read()
+            legacy_ms, legacy_state = _time_ms(lambda s: to_result(legacy_extract(s)), script_content, repeat)
+            selective_ms, selective_state = _time_ms(lambda s: to_result(selective_extract(s)), script_content, repeat)
+            # 기준 결과: 전체 디코딩 (경계가 정확한 raw_decode)
+            start = script_content.index("window.__APOLLO_STATE__")
+            full_state, _ = json.JSONDecoder().raw_decode(script_content, script_content.index("{", start))
+            expected = to_result(copy.deepcopy(full_state))
+            print(f"[{kind}] {os.path.basename(path)} {len(script_content) / 1024:.0f}KB | "
+                  f"기존 {legacy_ms:.2f}ms ({'일치' if legacy_state == expected else '불일치'}) | "
+                  f"선택 디코딩 {selective_ms:.2f}ms ({'일치' if selective_state == expected else '불일치'}) | "
+                  f"{legacy_ms / selective_ms:.1f}배")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "--record":
+        record_fixtures(args[1:])
+    elif not glob.glob(os.path.join(FIXTURE_DIR, "*", "*.js")):
+        write_synthetic_fixtures()
+    benchmark_apollo_state()
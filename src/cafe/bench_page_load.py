@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+from urllib.parse import urlencode
+from browser_pool import BrowserPool
+from crawl_all_cafe_list import NAVER_SCRIPT_JS
+from page_load import open_page
+
+# 목 서버는 테스트 지원 코드 (tests/support)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tests", "support"))
+from mock_server import start_mock_server
+
+# 리소스 차단 정책 전/후 페이지당 받은 바이트와 걸린 시간 비교 (목 서버의 HTML + 이미지/폰트/영상/분석 스크립트)
+#   python bench_page_load.py [반복 횟수]
+# 크롤러와 같은 준비 신호 사용: 상세는 APOLLO_STATE 스크립트, 리뷰/목록은 networkidle
+PAGE_TYPES = {
+    "detail": ("/restaurant/1001/home", "apollo"),
+    "review": ("/restaurant/1001/review/visitor", "networkidle"),
+    "list": ("/restaurant/list?" + urlencode({"query": "성수 카페"}), "networkidle"),
+}
+
+
+def measure_page_load(browser_pool, server, url, page_type, ready, block, repeat):
+    total_ms = 0
+    total_bytes = 0
+    for _ in range(repeat):
+        bytes_before = server.bytes_served
+        with browser_pool.new_page() as page:
+            start = time.perf_counter()
+            open_page(page, url, page_type, ready=ready, block=block)
+            script_content = page.evaluate(NAVER_SCRIPT_JS)
+            total_ms += (time.perf_counter() - start) * 1000
+        if not script_content or "__APOLLO_STATE__" not in script_content:
+            raise RuntimeError(f"[{page_type}] APOLLO_STATE 스크립트를 읽지 못했습니다.")
+        total_bytes += server.bytes_served - bytes_before
+    return total_ms / repeat, total_bytes / repeat
+
+def benchmark_page_load(repeat=5):
+    server = start_mock_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    browser_pool = BrowserPool(size=1)
+    try:
+        for page_type, (path, ready) in PAGE_TYPES.items():
+            url = base_url + path
+            measure_page_load(browser_pool, server, url, page_type, ready, False, 1) # 브라우저 시작 시간 제외
+            before_ms, before_bytes = measure_page_load(browser_pool, server, url, page_type, ready, False, repeat)
+            after_ms, after_bytes = measure_page_load(browser_pool, server, url, page_type, ready, True, repeat)
+            print(f"[{page_type}] 기존 {before_bytes / 1024:.0f}KB {before_ms:.0f}ms | 차단 {after_bytes / 1024:.0f}KB {after_ms:.0f}ms | "
+                  f"페이지당 {(before_bytes - after_bytes) / 1024:.0f}KB, {before_ms - after_ms:.0f}ms 절약")
+    finally:
+        browser_pool.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    benchmark_page_load(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,81 @@
+import glob
+import json
+import os
+import sys
+import time
+import requests
+from review_api import REVIEW_QUERY_PROFILES, ReviewSession, build_review_payload, extract_review_record
+
+# 쿼리 프로필별 페이지 크기/파싱 시간 비교
+#   python bench_query_profiles.py                      -> 저장된 픽스처로 비교 (없으면 목 서버로 생성)
+#   python bench_query_profiles.py --record ID [ID ...] -> 실제 API 응답을 픽스처로 저장 후 비교
+FIXTURE_DIR = "./data/fixtures/reviews"
+
+
+def record_fixtures(business_ids, post_page, fixture_dir=FIXTURE_DIR, pages=2):
+    for profile in REVIEW_QUERY_PROFILES:
+        profile_dir = os.path.join(fixture_dir, profile)
+        os.makedirs(profile_dir, exist_ok=True)
+        for business_id in business_ids:
+            cursor = None
+            for page_num in range(pages):
+                raw = post_page(business_id, build_review_payload(business_id, cursor, profile=profile))
+                items = json.loads(raw)[0].get("data", {}).get("visitorReviews", {}).get("items") or []
+                if not items:
+                    break
+                with open(os.path.join(profile_dir, f"{business_id}_{page_num}.json"), "wb") as f:
+                    f.write(raw)
+                cursor = items[-1]["cursor"]
+        print(f"[{profile}] 픽스처 저장 완료: {profile_dir}")
+
+def benchmark_query_profiles(fixture_dir=FIXTURE_DIR, repeat=20):
+    results = {}
+    for profile in REVIEW_QUERY_PROFILES:
+        raw_pages = []
+        for path in sorted(glob.glob(os.path.join(fixture_dir, profile, "*.json"))):
+            with open(path, "rb") as f:
+                raw_pages.append(f.read())
+        if not raw_pages:
+            print(f"[{profile}] 픽스처 없음, 건너뜀")
+            continue
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for raw in raw_pages:
+                items = json.loads(raw)[0]["data"]["visitorReviews"]["items"]
+                for item in items:
+                    extract_review_record(item, profile)
+        elapsed = time.perf_counter() - start
+
+        page_count = len(raw_pages)
+        results[profile] = {
+            "pages": page_count,
+            "bytes_per_page": sum(len(raw) for raw in raw_pages) / page_count,
+            "parse_ms_per_page": elapsed / (repeat * page_count) * 1000,
+        }
+
+    for profile, result in results.items():
+        print(f"[{profile}] {result['pages']}페이지 | 페이지당 {result['bytes_per_page'] / 1024:.1f}KB | 파싱 {result['parse_ms_per_page']:.3f}ms")
+    if "minimal" in results and "full" in results:
+        print(f"minimal/full 바이트 비율: {results['minimal']['bytes_per_page'] / results['full']['bytes_per_page']:.2%}, "
+              f"파싱 시간 비율: {results['minimal']['parse_ms_per_page'] / results['full']['parse_ms_per_page']:.2%}")
+    return results
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "--record":
+        review_session = ReviewSession()
+        try:
+            record_fixtures(args[1:], lambda business_id, payload: review_session.post_graphql(business_id, payload).content)
+        finally:
+            review_session.close()
+    elif not glob.glob(os.path.join(FIXTURE_DIR, "*", "*.json")):
+        # 목 서버는 테스트 지원 코드 (tests/support)
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tests", "support"))
+        from mock_server import start_mock_server
+        server = start_mock_server()
+        api_url = f"http://127.0.0.1:{server.server_address[1]}/graphql"
+        record_fixtures(["1199055314", "38561949"], lambda business_id, payload: requests.post(api_url, json=payload).content)
+        server.shutdown()
+
+    benchmark_query_profiles()
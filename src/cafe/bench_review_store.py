@@ -0,0 +1,68 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+from review_store import JsonlReviewStore, SegmentReviewStore
+
+# 저장 방식별 쓰기 처리량과 전체 코퍼스 스캔 시간 비교 (합성 리뷰 사용)
+#   python bench_review_store.py [카페 수] [카페당 리뷰 수] [작업 디렉토리]
+# EFS에서 측정하려면 작업 디렉토리를 EFS 경로로 지정
+
+
+def make_page(cafe_id, start, size=50):
+    return [
+        {
+            "author_id": f"author{(start + i) % 97}",
+            "body": f"{cafe_id} 리뷰 본문 {start + i} " * 8,
+            "visit_count": (start + i) % 5 + 1,
+            "visit_time": "2025-05-05T12:00:00.000+09:00",
+            "cursor": str(start + i + 1),
+        }
+        for i in range(size)
+    ]
+
+def directory_stats(path):
+    file_count = 0
+    total_bytes = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            file_count += 1
+            total_bytes += os.path.getsize(os.path.join(root, name))
+    return file_count, total_bytes
+
+def bench_store(name, store, root, cafe_count, reviews_per_cafe):
+    start = time.perf_counter()
+    for cafe_index in range(cafe_count):
+        cafe_id = str(1000000 + cafe_index)
+        with store.open_writer(cafe_id) as writer:
+            for offset in range(0, reviews_per_cafe, 50):
+                writer.write_page(make_page(cafe_id, offset, min(50, reviews_per_cafe - offset)))
+            writer.mark_completed()
+    write_seconds = time.perf_counter() - start
+    if hasattr(store, "close"):
+        store.close()
+
+    start = time.perf_counter()
+    scanned = sum(1 for _ in store.iter_reviews())
+    scan_seconds = time.perf_counter() - start
+
+    file_count, total_bytes = directory_stats(root)
+    total_reviews = cafe_count * reviews_per_cafe
+    print(f"[{name}] 쓰기 {total_reviews / write_seconds:,.0f}건/초 ({write_seconds:.2f}초) | "
+          f"스캔 {scanned / scan_seconds:,.0f}건/초 ({scan_seconds:.2f}초) | "
+          f"파일 {file_count}개, {total_bytes / 1024 / 1024:.1f}MB")
+    return {"write_seconds": write_seconds, "scan_seconds": scan_seconds, "files": file_count, "bytes": total_bytes}
+
+if __name__ == "__main__":
+    cafe_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    reviews_per_cafe = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    work_dir = tempfile.mkdtemp(dir=sys.argv[3] if len(sys.argv) > 3 else None)
+
+    try:
+        jsonl_root = os.path.join(work_dir, "jsonl")
+        bench_store("jsonl", JsonlReviewStore(f"{jsonl_root}/reviews", f"{jsonl_root}/completed"), jsonl_root, cafe_count, reviews_per_cafe)
+        segment_root = os.path.join(work_dir, "segment")
+        bench_store("segment", SegmentReviewStore(segment_root), segment_root, cafe_count, reviews_per_cafe)
+    finally:
+        shutil.rmtree(work_dir)
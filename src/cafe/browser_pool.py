@@ -0,0 +1,113 @@
+import queue
+import threading
+import traceback
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36 Edg/141.0.0.0"
+
+
+# sync API 객체는 만든 스레드에서만 쓸 수 있으므로 브라우저는 스레드마다 하나씩 소유
+# 카페 하나당 새 컨텍스트(쿠키/캐시 격리)만 만들고, N 페이지마다 또는 크래시 시 브라우저 재시작
+class BrowserPool:
+    def __init__(self, size=5, max_pages_per_browser=100, headless=True, user_agent=DEFAULT_USER_AGENT):
+        self.size = size
+        self.max_pages_per_browser = max_pages_per_browser
+        self.headless = headless
+        self.user_agent = user_agent
+        self._local = threading.local()
+        self._slots = threading.BoundedSemaphore(size) # 프로세스 당 브라우저 개수 제한
+
+    def _launch(self):
+        local = self._local
+        if getattr(local, "playwright", None) is None:
+            if not self._slots.acquire(blocking=False):
+                raise RuntimeError(f"브라우저 풀 크기({self.size}) 초과: 풀보다 많은 스레드에서 사용 중입니다.")
+            local.playwright = sync_playwright().start()
+        local.browser = local.playwright.chromium.launch(headless=self.headless)
+        local.pages_served = 0
+        print(f"[{threading.current_thread().name}] 브라우저 실행")
+
+    def _close_browser(self):
+        browser = getattr(self._local, "browser", None)
+        self._local.browser = None
+        if browser is not None:
+            try:
+                if browser.is_connected():
+                    browser.close()
+            except Exception as e:
+                print(f"브라우저 종료 중 오류: {e}")
+
+    def _browser(self):
+        browser = getattr(self._local, "browser", None)
+        if browser is None or not browser.is_connected():
+            self._close_browser()
+            self._launch()
+        elif self._local.pages_served >= self.max_pages_per_browser:
+            print(f"[{threading.current_thread().name}] {self._local.pages_served}페이지 사용, 브라우저 재시작")
+            self._close_browser()
+            self._launch()
+        return self._local.browser
+
+    @contextmanager
+    def new_context(self, **context_options):
+        context_options.setdefault("user_agent", self.user_agent)
+        browser = self._browser()
+        context = browser.new_context(**context_options)
+        try:
+            yield context
+        except Exception:
+            # 브라우저가 죽었으면 다음 요청에서 새로 띄움
+            if not browser.is_connected():
+                self._local.browser = None
+            raise
+        finally:
+            self._local.pages_served += 1
+            try:
+                context.close()
+            except Exception:
+                # 컨텍스트 정리 실패 = 브라우저 상태 불량, 재시작 대상
+                self._close_browser()
+
+    @contextmanager
+    def new_page(self, **context_options):
+        with self.new_context(**context_options) as context:
+            yield context.new_page()
+
+    # 현재 스레드가 소유한 브라우저/드라이버 정리 (소유 스레드에서 호출해야 함)
+    def close(self):
+        self._close_browser()
+        playwright = getattr(self._local, "playwright", None)
+        self._local.playwright = None
+        if playwright is not None:
+            try:
+                playwright.stop()
+            finally:
+                self._slots.release()
+
+    # size개의 스레드가 각자 브라우저 하나씩 들고 items를 나눠 처리
+    def map(self, func, items):
+        work = queue.Queue()
+        for item in items:
+            work.put(item)
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        item = work.get_nowait()
+                    except queue.Empty:
+                        break
+                    try:
+                        func(item)
+                    except Exception as e:
+                        print(f"[{item}] 처리 중 예외 발생: {e}")
+                        traceback.print_exc()
+            finally:
+                self.close()
+
+        threads = [threading.Thread(target=worker, name=f"browser-{i}") for i in range(self.size)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
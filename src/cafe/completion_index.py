@@ -0,0 +1,273 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# 카페별 완료 상태 색인 (EFS에서 카페마다 마커/출력 파일을 stat하는 대신 SQLite 파일 하나를 한 번에 읽음)
+#   completion: (kind, cafe_id) -> status(completed/partial), size(리뷰 수 또는 파일 크기), last_cursor, updated_at
+#   kind: reviews(리뷰 수집), basic_info(기본 정보), reviews_queued(프로듀서/이어하기가 큐에 넣은 카페, status는 full/refresh)
+#   built: kind별로 기존 파일에서 색인을 만들었는지와 그때의 원본 세대. 처음 열 때 비어 있으면 기존 마커/출력 파일로 한 번 채움
+# 마커/체크포인트/출력 파일(EFS)이 원본이고 색인은 머신마다 로컬 디스크에 두는 캐시
+#   NFS 위의 SQLite는 여러 머신이 함께 쓰면 깨질 수 있으므로 NFS 경로는 거부. 같은 머신의 프로세스끼리는 로컬 락으로 안전
+#   다른 머신이 완료한 카페는 색인에 없어도 워커가 체크포인트를 보고 스킵하면서 기록. 프로듀서는 시작할 때 마커 전체와 맞춤
+#   마커/출력 파일을 지운 뒤에는 invalidate로 원본 디렉토리의 세대(.generation)를 올림 -> 각 머신이 다음에 열 때 한 번 다시 훑어서 맞춤
+#   (완료마다 바뀌는 디렉토리 mtime 대신 세대를 쓰므로 평소에는 워커가 시작할 때 작은 파일 하나만 읽음)
+COMPLETION_REFRESH_SECONDS = 60 # 워커가 다른 워커의 완료 기록을 다시 읽는 주기
+COMPLETED = "completed"
+PARTIAL = "partial"
+GENERATION_FILE = ".generation"
+
+
+# path가 있는 마운트의 파일 시스템 종류. /proc/mounts가 없으면 None
+def _filesystem_of(path):
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            mounts = [line.split() for line in f]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best = None
+    for fields in mounts:
+        if len(fields) < 3:
+            continue
+        mount_point = fields[1].replace("\\040", " ")
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and (best is None or len(mount_point) > len(best[0])):
+            best = (mount_point, fields[2])
+    return best and best[1]
+
+def check_local_disk(path):
+    filesystem = _filesystem_of(os.path.dirname(os.path.abspath(path)))
+    if filesystem and filesystem.startswith("nfs"):
+        raise RuntimeError(f"{path}: 완료 색인은 로컬 디스크에 두어야 합니다 ({filesystem}). CAFE_COMPLETION_INDEX를 로컬 경로로 지정하세요.")
+
+# 원본 디렉토리의 세대 (파일이 없으면 0)
+def read_generation(source_dir):
+    try:
+        with open(os.path.join(source_dir, GENERATION_FILE), "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+def bump_generation(source_dir):
+    os.makedirs(source_dir, exist_ok=True)
+    generation = read_generation(source_dir) + 1
+    path = os.path.join(source_dir, GENERATION_FILE)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(generation))
+    os.replace(tmp_path, path)
+    return generation
+
+
+class CompletionIndex:
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        check_local_disk(path)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completion (kind TEXT NOT NULL, cafe_id TEXT NOT NULL, status TEXT NOT NULL, "
+            "size INTEGER, last_cursor TEXT, updated_at REAL NOT NULL, PRIMARY KEY (kind, cafe_id)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS built (kind TEXT PRIMARY KEY, built_at REAL NOT NULL, rows INTEGER NOT NULL, generation INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def _write(self, statements):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        self._conn.executemany(sql, params)
+                    else:
+                        self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def record(self, kind, cafe_id, status, size=None, last_cursor=None):
+        self._write([(
+            "INSERT OR REPLACE INTO completion (kind, cafe_id, status, size, last_cursor, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, str(cafe_id), status, size, last_cursor, time.time()),
+        )])
+
+    # rows: [(cafe_id, status, size, last_cursor), ...] 한 트랜잭션으로 기록 (쓰는 쪽이 하나일 때 모아서 기록)
+    # at: 기록 시각 (기본은 지금)
+    def record_many(self, kind, rows, at=None):
+        now = at if at is not None else time.time()
+        self._write([(
+            "INSERT OR REPLACE INTO completion (kind, cafe_id, status, size, last_cursor, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(kind, str(cafe_id), status, size, last_cursor, now) for cafe_id, status, size, last_cursor in rows],
+        )])
+
+    # status가 completed인 cafe_id 집합. since를 주면 그 이후에 바뀐 것만 (주기적으로 다시 읽을 때)
+    # 행마다 튜플을 만들지 않도록 SQLite에서 줄바꿈으로 이어 붙여 문자열 하나로 받음 (10만 개 기준 약 절반 시간)
+    def completed_ids(self, kind, since=None):
+        with self._lock:
+            joined = self._conn.execute(
+                "SELECT group_concat(cafe_id, char(10)) FROM completion WHERE kind = ? AND status = ? AND updated_at >= ?",
+                (kind, COMPLETED, since if since is not None else 0),
+            ).fetchone()[0]
+        return set(joined.split("\n")) if joined else set()
+
+    # kind(status)로 since 이후에 기록됐고, 그 뒤로 done_kind 기록이 없는 cafe_id 집합 (큐에 넣었지만 아직 처리되지 않은 카페)
+    def pending_ids(self, kind, status, done_kind, since):
+        with self._lock:
+            joined = self._conn.execute(
+                "SELECT group_concat(q.cafe_id, char(10)) FROM completion q LEFT JOIN completion d ON d.kind = ? AND d.cafe_id = q.cafe_id "
+                "WHERE q.kind = ? AND q.status = ? AND q.updated_at >= ? AND (d.updated_at IS NULL OR d.updated_at < q.updated_at)",
+                (done_kind, kind, status, since),
+            ).fetchone()[0]
+        return set(joined.split("\n")) if joined else set()
+
+    def get(self, kind, cafe_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, size, last_cursor, updated_at FROM completion WHERE kind = ? AND cafe_id = ?", (kind, str(cafe_id)),
+            ).fetchone()
+        return None if row is None else {"status": row[0], "size": row[1], "last_cursor": row[2], "updated_at": row[3]}
+
+    def is_built(self, kind):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM built WHERE kind = ?", (kind,)).fetchone() is not None
+
+    def built_generation(self, kind):
+        with self._lock:
+            row = self._conn.execute("SELECT generation FROM built WHERE kind = ?", (kind,)).fetchone()
+        return None if row is None else row[0]
+
+    # kind의 색인을 rows [(cafe_id, status, size, last_cursor), ...]로 통째로 교체 (한 트랜잭션)
+    # generation: rows를 읽기 전에 확인한 원본 세대 (다음에 열 때 다시 맞추지 않도록)
+    def rebuild(self, kind, rows, generation=0):
+        now = time.time()
+        rows = [(kind, str(cafe_id), status, size, last_cursor, now) for cafe_id, status, size, last_cursor in rows]
+        self._write([
+            ("DELETE FROM completion WHERE kind = ?", (kind,)),
+            ("INSERT OR REPLACE INTO completion (kind, cafe_id, status, size, last_cursor, updated_at) VALUES (?, ?, ?, ?, ?, ?)", rows),
+            ("INSERT OR REPLACE INTO built (kind, built_at, rows, generation) VALUES (?, ?, ?, ?)", (kind, now, len(rows), generation)),
+        ])
+        return len(rows)
+
+    # 처음 한 번 load_rows()로 채움 (여러 워커가 동시에 시작해도 락 안에서 다시 확인하므로 한 번만 실행)
+    # source_dir의 세대가 지난번과 다르거나 reconcile=True면 load_rows()와 맞춤 (파일이 지워진 완료 기록 삭제, 빠진 기록 추가)
+    def ensure_built(self, kind, load_rows, source_dir=None, reconcile=False):
+        generation = read_generation(source_dir) if source_dir else 0
+        if not reconcile and self.built_generation(kind) == generation:
+            return False
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                built = self._conn.execute("SELECT generation FROM built WHERE kind = ?", (kind,)).fetchone()
+                now = time.time()
+                if built is None:
+                    rows = [(kind, str(cafe_id), status, size, last_cursor, now) for cafe_id, status, size, last_cursor in load_rows()]
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO completion (kind, cafe_id, status, size, last_cursor, updated_at) VALUES (?, ?, ?, ?, ?, ?)", rows,
+                    )
+                    self._conn.execute("INSERT INTO built (kind, built_at, rows, generation) VALUES (?, ?, ?, ?)", (kind, now, len(rows), generation))
+                    print(f"완료 색인 생성: {kind} {len(rows)}개 ({self.path})")
+                elif reconcile or built[0] != generation:
+                    removed, added = self._reconcile(kind, load_rows(), now)
+                    self._conn.execute("UPDATE built SET generation = ? WHERE kind = ?", (generation, kind))
+                    print(f"완료 색인 맞춤: {kind} 삭제 {removed}개, 추가 {added}개 (세대 {generation})")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    # 트랜잭션 안에서 호출. 원본에 없는 completed 기록은 지우고 (partial은 체크포인트 기준이라 둠), 원본에만 있는 기록은 추가
+    def _reconcile(self, kind, rows, now):
+        source_ids = {str(cafe_id) for cafe_id, _, _, _ in rows}
+        joined = self._conn.execute(
+            "SELECT group_concat(cafe_id, char(10)) FROM completion WHERE kind = ? AND status = ?", (kind, COMPLETED),
+        ).fetchone()[0]
+        indexed_ids = set(joined.split("\n")) if joined else set()
+        stale_ids = indexed_ids - source_ids
+        self._conn.executemany("DELETE FROM completion WHERE kind = ? AND cafe_id = ?", [(kind, cafe_id) for cafe_id in stale_ids])
+        before = self._conn.total_changes
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO completion (kind, cafe_id, status, size, last_cursor, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(kind, str(cafe_id), status, size, last_cursor, now) for cafe_id, status, size, last_cursor in rows if str(cafe_id) not in indexed_ids],
+        )
+        return len(stale_ids), self._conn.total_changes - before
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 워커용: 완료 집합을 한 번 읽고 COMPLETION_REFRESH_SECONDS마다 바뀐 것만 더 읽음 (카페마다 파일 시스템 조회 없음)
+class CompletedSet:
+    def __init__(self, index, kind, refresh_seconds=COMPLETION_REFRESH_SECONDS):
+        self.index = index
+        self.kind = kind
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._loaded_at = time.time()
+        self._ids = index.completed_ids(kind)
+
+    def __contains__(self, cafe_id):
+        with self._lock:
+            now = time.time()
+            if now - self._loaded_at >= self.refresh_seconds:
+                # 시계 차이/같은 시각 기록을 놓치지 않도록 조금 겹쳐서 읽음
+                self._ids |= self.index.completed_ids(self.kind, since=self._loaded_at - self.refresh_seconds)
+                self._loaded_at = now
+            return str(cafe_id) in self._ids
+
+    def add(self, cafe_id):
+        with self._lock:
+            self._ids.add(str(cafe_id))
+
+    def __len__(self):
+        return len(self._ids)
+
+
+# 기존 파일로 색인 만들기
+# 리뷰: 저장소의 완료 목록(jsonl은 마커 디렉토리 목록 한 번, segment는 샤드 색인)
+def review_index_rows(review_store):
+    return [(cafe_id, COMPLETED, None, None) for cafe_id in review_store.completed_cafe_ids()]
+
+# 기본 정보: 출력 디렉토리 한 번 훑기 (100바이트 이하 쓰레기 파일은 미완료로 봄)
+def basic_info_index_rows(output_dir):
+    rows = []
+    if not os.path.exists(output_dir):
+        return rows
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith("_info.json"):
+                continue
+            size = entry.stat().st_size
+            if size > 100:
+                rows.append((entry.name[:-len("_info.json")], COMPLETED, size, None))
+    return rows
+
+# python completion_index.py rebuild reviews|basic_info     -> 기존 파일로 이 머신의 색인을 다시 만듦
+# python completion_index.py invalidate reviews|basic_info  -> 마커/출력 파일을 지운 뒤 실행, 모든 머신이 다음에 열 때 다시 맞춤
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("rebuild", "invalidate") or sys.argv[2] not in ("reviews", "basic_info"):
+        print("사용법: python completion_index.py rebuild|invalidate reviews|basic_info")
+        sys.exit(1)
+    started_at = time.time()
+    if sys.argv[2] == "reviews":
+        from crawl import COMPLETION_INDEX_PATH, get_review_store, review_source_dir
+        index_path, source_dir = COMPLETION_INDEX_PATH, review_source_dir()
+        load_rows = lambda: review_index_rows(get_review_store())
+    else:
+        from crawl_cafe_basic_info import BASIC_INFO_INDEX_PATH, OUTPUT_DIR
+        index_path, source_dir = BASIC_INFO_INDEX_PATH, OUTPUT_DIR
+        load_rows = lambda: basic_info_index_rows(OUTPUT_DIR)
+    if sys.argv[1] == "invalidate":
+        print(f"원본 세대 증가: {sys.argv[2]} -> {bump_generation(source_dir)} ({source_dir})")
+        sys.exit(0)
+    generation = read_generation(source_dir)
+    count = CompletionIndex(index_path).rebuild(sys.argv[2], load_rows(), generation)
+    print(f"색인 재생성 완료: {sys.argv[2]} {count}개, {time.time() - started_at:.2f}초")
@@ -1,538 +1,588 @@
-from playwright.sync_api import sync_playwright
-from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
-from copy import deepcopy
-import json
 import time
 import random
 import requests
 import os
 import traceback
 import boto3
+from review_store import open_review_store
+from storage_config import EFS_BASE_PATH, REVIEW_DIR, MARKER_DIR, SEGMENT_DIR, REVIEW_STORE_KIND
+from scheduler import CrawlStatsLog
+from lease import LeaseHeartbeat, LeaseLostError, open_lease_manager
+from work_queue import open_work_queue, NACK_DELAY_SECONDS
+from run_state import RunState, STANDBY_POLL_SECONDS, default_worker_id, format_progress
+from completion_index import CompletionIndex, CompletedSet, review_index_rows, COMPLETED, PARTIAL
+from review_api import ReviewSession, build_review_payload, extract_review_record, next_page_delay, DEFAULT_QUERY_PROFILE, RECENT_SORT
+
+
+# 카페 하나를 한 번에 처리하는 분량. 다 쓰면 체크포인트를 남기고 이어하기 메시지를 큐에 다시 넣음
+# (리뷰 1만 개 카페가 워커 하나를 몇 시간씩 붙잡지 않도록)
+CHUNK_MAX_PAGES = int(os.environ.get("CAFE_CHUNK_MAX_PAGES", "40"))
+CHUNK_MAX_SECONDS = float(os.environ.get("CAFE_CHUNK_MAX_SECONDS", "600"))
+
+LOCK_DIR = f"{EFS_BASE_PATH}/data/cafe_reviews_locks" # 락(임대) 파일 저장 위치
+# 카페 작업 락 백엔드: file(EFS 공유, 여러 머신) 또는 sqlite(한 머신 안의 여러 프로세스)
+LEASE_BACKEND = os.environ.get("CAFE_LEASE_BACKEND", "file")
+LEASE_DB_PATH = os.environ.get("CAFE_LEASE_DB", "/tmp/cafe_leases.sqlite3")
+CRAWL_STATS_DIR = f"{EFS_BASE_PATH}/data/cafe_crawl_stats" # 스케줄러용 카페별 수집 통계
+RUN_STATE_PATH = os.environ.get("CAFE_RUN_STATE", f"{EFS_BASE_PATH}/data/cafe_run_state.json") # 실행 전체 진행 상태 (종료 판단용)
+# 카페별 완료 색인 (completion_index.py). 마커에서 만드는 머신별 캐시라 로컬 디스크에 둠
+COMPLETION_INDEX_PATH = os.environ.get("CAFE_COMPLETION_INDEX", "/tmp/cafe_completion.sqlite3")
+# 큐에 넣은 기록을 믿는 시간 (SQS 기본 메시지 보존 기간). 이보다 오래된 기록은 메시지가 사라졌을 수 있으므로 다시 보냄
+QUEUED_TTL_SECONDS = float(os.environ.get("CAFE_QUEUED_TTL_SECONDS", str(4 * 24 * 3600)))
+
+# refresh: 완료된 카페도 건너뛰지 않고 최신순으로 새 리뷰만 추가 수집 (주기적 갱신용)
+REFRESH_MODE = os.environ.get("CAFE_CRAWL_MODE", "full") == "refresh"
+
+SQS_QUEUE_URL = "https://sqs.ap-northeast-2.amazonaws.com/181474919825/cafe_queue"
+SQS_REGION = "ap-northeast-2"
+# 우선순위 큐를 쓰는 경우 높은 순서대로 쉼표로 구분 (프로듀서도 같은 값을 사용)
+SQS_QUEUE_URLS = os.environ.get("CAFE_PRIORITY_QUEUE_URLS", SQS_QUEUE_URL).split(",")
+# 한 번에 받아 두는 메시지 수 (1~10). 받아 둔 메시지도 하트비트가 가시성을 연장하므로, 카페 하나에 최대 10분 + 카페 사이 대기가 걸리는
+# 워커가 여러 개를 받아 두면 노는 워커가 가져가지 못함 (작업 분배와 마지막 꼬리 처리가 한 워커에 몰림). 그래서 기본은 하나씩
+SQS_PREFETCH = int(os.environ.get("CAFE_SQS_PREFETCH", "1"))
+# 작업 큐 백엔드: sqs 또는 sqlite(한 머신에서 전체 수집, 오프라인 처리량 측정). sqlite는 위 URL의 큐 이름을 그대로 사용
+WORK_QUEUE_BACKEND = os.environ.get("CAFE_QUEUE_BACKEND", "sqs")
+WORK_QUEUE_DB_PATH = os.environ.get("CAFE_QUEUE_DB", "/tmp/cafe_queue.sqlite3")
+MAX_NETWORK_RETRIES = 5 # 페이지 하나당 네트워크/서버/인증 오류 재시도 횟수
+
+
+# 드라이버가 요청을 보내다 만난 타임아웃/연결 오류 (requests/Playwright 예외를 하나로 맞춤)
+class ReviewNetworkError(Exception):
+    pass
+
+
+# 리뷰 페이징의 재시도/대기/커서 처리 (동기 stream_reviews_by_api와 crawl_async가 같이 씀)
+# 요청, 대기, 페이지 저장은 드라이버가 하도록 단계를 내보냄
+#   ("post", payload) -> (상태 코드, 200이면 JSON 본문 아니면 텍스트)를 돌려받음. 네트워크 오류는 ReviewNetworkError, 그 외 오류는 그대로 throw
+#   ("sleep", 초), ("page", records) -> on_page의 반환 값(이미 저장한 리뷰에 도달했는지)을 돌려받음
+# 끝나면 (수집한 개수, 완료 여부) 반환
+def review_paging_steps(business_id, review_session, max_reviews=10000, cursor=None, profile=DEFAULT_QUERY_PROFILE, sort=None, on_total=None, budget=None):
+    # payload를 독립적으로 운용하기 위해 매번 새로 생성
+    payload_to_send = build_review_payload(business_id, profile=profile, sort=sort)
+
+    collected_count = 0
+    is_completed = False
+    current_cursor = cursor
 
+    # 페이징 루프(한번에 50개 씩) 
+    # 위험 요소로 50개 단위 크롤링이므로 최대 리뷰가 50의 배수가 아니라면 초과 가능성
+    # 어짜피 다 크롤링 할 거라 일단 진행
+    while collected_count < max_reviews:
+        payload_to_send[0]["variables"]["input"]["after"] = current_cursor
+        body = None
+        attempt_count = 0
+        is_429 = False
+
+        # API 요청 재시도 전략
+        while attempt_count < MAX_NETWORK_RETRIES:
+            try:
+                status, body = yield ("post", payload_to_send)
+            except ReviewNetworkError as e:
+                attempt_count += 1
+                print(f"[{business_id}] 네트워크 에러 발생 ({e})")
+                yield ("sleep", 3 * attempt_count)
+                continue
+            except Exception as e:
+                print(f"치명적 에러 발생: {e}. {business_id} 수집 일시 종료.")
+                traceback.print_exc()
+                return collected_count, is_completed
 
-# JSONL 파일의 마지막 줄을 읽음
-def get_last_cursor_from_jsonl(filename):
-    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
-        return None
-    
-    try:
-        with open(filename, 'rb') as f: # 바이너리(rb) 모드로 읽기
-            f.seek(0, os.SEEK_END)
-            buffer_size = 1024 # 적절한 버퍼 크기
-            
-            buffer = bytearray()
-            
-            current_pos = f.tell()
-            while current_pos > 0:
-                read_size = min(buffer_size, current_pos)
-                new_pos = current_pos - read_size
-                current_pos = new_pos
-                f.seek(new_pos)
-                
-                # 데이터를 읽어서 버퍼 앞에 추가 (거꾸로 쌓음)
-                buffer = f.read(read_size) + buffer
-                
-                try:
-                    # 처음에 있는 빈 줄 제거
-                    temp_buffer = buffer.rstrip()
-                    if not temp_buffer:
-                        continue
-                    
-                    # 버퍼에서 마지막 줄바꿈 문자(\n)를 찾음
-                    last_newline = temp_buffer.rindex(b'\n')
-                    last_line_bytes = temp_buffer[last_newline+1:]
-                    
-                    # 빈 줄이 아닐 경우
-                    if last_line_bytes:
-                        last_line_str = last_line_bytes.decode('utf-8')
-                        data = json.loads(last_line_str)
-                        return data.get('cursor')
-                except ValueError:
-                    # 버퍼 안에 줄바꿈이 아직 없음
-                    pass
-            
-            # 파일 전체를 다 읽었는데 줄바꿈이 없는 경우
-            if buffer.rstrip():
-                try:
-                    last_line_str = buffer.rstrip().decode('utf-8')
-                    data = json.loads(last_line_str)
-                    return data.get('cursor')
-                except Exception as e:
-                    print(f"마지막 줄 파싱 오류: {e}")
-                    traceback.print_exc()
+            if status == 200:
+                break
+            elif status == 429:
+                # 대기는 머신 공유 레이트 리미터가 처리 (다음 요청이 차단 해제까지 기다림)
+                print(f"[{business_id}] 429 발생, 레이트 리미터 차단 해제까지 대기...")
+                if(is_429):
+                    print(f"[{business_id}] 429 2회째 발생, 작업 일시 중지...")
+                    return collected_count, is_completed
+                is_429 = True
+            elif status in (401, 403):
+                # 쿠키 만료/차단 의심 -> 다시 부트스트랩 후 재시도
+                attempt_count += 1
+                print(f"[{business_id}] 인증 오류 ({status}), 쿠키를 다시 획득합니다.")
+                review_session.invalidate()
+                yield ("sleep", 3 * attempt_count)
+            elif status >= 500:
+                attempt_count += 1
+                print(f"[{business_id}] 서버 오류 ({status})")
+                yield ("sleep", 5 * attempt_count)
+            else:
+                print(f"치명적 에러 발생: 클라이언트 또는 예상치 못한 오류 ({status}): {body}. {business_id} 수집 일시 종료.")
+                return collected_count, is_completed
 
-    except Exception as e:
-        print(f"마지막 커서 읽기 오류: {e}")
-        traceback.print_exc()
-        return None
-    
-    return None
-
-def scrape_reviews_by_api(business_id, max_reviews=10000, cursor=None):
-    # 초기 설정
-    # 재시도 설정
-    MAX_NETWORK_RETRIES = 5
-
-    # API 설정
-    API_URL = "https://pcmap-api.place.naver.com/graphql"
-    HEADERS = {
-        "Accept": "*/*",
-        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Origin": "https://pcmap.place.naver.com",
-        "Referer": f"https://pcmap.place.naver.com/restaurant/{business_id}/review/visitor",
-    }
-    payload_template = [
-        {
-            "operationName": "getVisitorReviews",
-            "variables": {
-                "input": {
-                    "businessId": f"{business_id}",
-                    "after": None,
-
-                    "businessType": "restaurant",
-                    "item": "0",
-                    "bookingBusinessId": None,
-                    "size": 50,
-                    "isPhotoUsed": False,
-                    "includeContent": True,
-                    "getUserStats": True,
-                    "includeReceiptPhotos": True,
-                    "cidList": None,
-                    "getReactions": True,
-                    "getTrailer": True,
-                }
-            },
-            "query": """query getVisitorReviews($input: VisitorReviewsInput) {
-                        visitorReviews(input: $input) {
-                            items {
-                            id
-                            cursor
-                            reviewId
-                            rating
-                            author {
-                                id
-                                nickname
-                                from
-                                imageUrl
-                                borderImageUrl
-                                objectId
-                                url
-                                review {
-                                totalCount
-                                imageCount
-                                avgRating
-                                __typename
-                                }
-                                theme {
-                                totalCount
-                                __typename
-                                }
-                                isFollowing
-                                followerCount
-                                followRequested
-                                __typename
-                            }
-                            body
-                            thumbnail
-                            media {
-                                type
-                                thumbnail
-                                thumbnailRatio
-                                class
-                                videoId
-                                videoUrl
-                                trailerUrl
-                                __typename
-                            }
-                            tags
-                            status
-                            visitCount
-                            viewCount
-                            visited
-                            created
-                            reply {
-                                editUrl
-                                body
-                                editedBy
-                                created
-                                date
-                                replyTitle
-                                isReported
-                                isSuspended
-                                status
-                                __typename
-                            }
-                            originType
-                            item {
-                                name
-                                code
-                                options
-                                __typename
-                            }
-                            language
-                            highlightRanges {
-                                start
-                                end
-                                __typename
-                            }
-                            apolloCacheId
-                            translatedText
-                            businessName
-                            showBookingItemName
-                            bookingItemName
-                            votedKeywords {
-                                code
-                                iconUrl
-                                iconCode
-                                name
-                                __typename
-                            }
-                            userIdno
-                            loginIdno
-                            receiptInfoUrl
-                            reactionStat {
-                                id
-                                typeCount {
-                                name
-                                count
-                                __typename
-                                }
-                                totalCount
-                                __typename
-                            }
-                            hasViewerReacted {
-                                id
-                                reacted
-                                __typename
-                            }
-                            nickname
-                            showPaymentInfo
-                            visitCategories {
-                                code
-                                name
-                                keywords {
-                                code
-                                name
-                                __typename
-                                }
-                                __typename
-                            }
-                            representativeVisitDateTime
-                            showRepresentativeVisitDateTime
-                            __typename
-                            }
-                            starDistribution {
-                            score
-                            count
-                            __typename
-                            }
-                            hideProductSelectBox
-                            total
-                            showRecommendationSort
-                            itemReviewStats {
-                            score
-                            count
-                            itemId
-                            starDistribution {
-                                score
-                                count
-                                __typename
-                            }
-                            __typename
-                            }
-                            __typename
-                        }
-                        }"""
-        }
-    ]
-
-    # payload를 독립적으로 운용하기 위해 deepcopy
-    payload_to_send = deepcopy(payload_template)
+        # break 안된 경우
+        if attempt_count >= MAX_NETWORK_RETRIES:
+            print(f"최대 재시도 횟수 ({MAX_NETWORK_RETRIES}) 초과. {business_id} 수집 일시 종료.")
+            return collected_count, is_completed
 
-    all_reviews = []
-    is_completed = False
-    current_cursor = cursor
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page(
-             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36 Edg/141.0.0.0"
-        )
+        # 무조건 성공 전제
         try:
-            page.goto(f"https://pcmap.place.naver.com/restaurant/{business_id}/review/visitor", wait_until="networkidle")
+            reviews_data = body[0].get("data", {}).get("visitorReviews", {})
+            items = reviews_data.get("items", [])
+            if on_total and reviews_data.get("total") is not None:
+                on_total(reviews_data["total"])
+
+            if not items:
+                print(f"[{business_id}] 더 이상 가져올 리뷰가 없습니다.")
+                is_completed = True
+                break
+
+            records = [extract_review_record(item, profile) for item in items]
+            next_cursor = items[-1]['cursor']
         except Exception as e:
-            print(f"[{business_id}] 쿠키 획득용 페이지 접속 실패: {e}")
-            browser.close()
-            return [], False
-
-        api_request_context = page.request
-
-        # 페이징 루프(한번에 50개 씩) 
-        # 위험 요소로 50개 단위 크롤링이므로 최대 리뷰가 50의 배수가 아니라면 초과 가능성
-        # 어짜피 다 크롤링 할 거라 일단 진행
-        while len(all_reviews) < max_reviews:
-            payload_to_send[0]["variables"]["input"]["after"] = current_cursor
-            response = None
-            attempt_count = 0
-            is_429 = False
-
-            # API 요청 재시도 전략
-            while attempt_count < MAX_NETWORK_RETRIES:
+            print(f"[{business_id}] 요청 중 심각한 오류 발생: {e}")
+            traceback.print_exc()
+            break
+
+        # 페이지 단위로 바로 저장
+        caught_up = yield ("page", records)
+        collected_count += len(records)
+        current_cursor = next_cursor
+
+        print(f"[{business_id}] 리뷰 {len(records)}개 수집 완료. (총 {collected_count}개)")
+        if caught_up:
+            print(f"[{business_id}] 이미 수집한 리뷰에 도달했습니다.")
+            is_completed = True
+            break
+        if budget is not None and budget.spend_page():
+            break
+        yield ("sleep", next_page_delay())
+    return collected_count, is_completed
+
+def _post_review_page(review_session, business_id, payload):
+    try:
+        response = review_session.post_graphql(business_id, payload, timeout=10)
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+        raise ReviewNetworkError(e) from e
+    return response.status_code, (response.json() if response.status_code == 200 else response.text)
+
+# 페이지(최대 50개)를 받을 때마다 on_page(records) 호출, 리뷰를 메모리에 쌓지 않음
+# on_page가 True를 반환하면 (갱신 모드에서 이미 저장한 리뷰에 도달) 완료로 보고 중단
+# on_total(total): API가 알려준 카페 전체 리뷰 수 (스케줄러 통계용)
+# budget(ChunkBudget)을 주면 분량을 다 쓴 시점에서 멈춤 (완료 아님)
+# (수집한 개수, 완료 여부) 반환. on_page에서 난 예외(저장 실패)는 그대로 호출자에게 전달
+def stream_reviews_by_api(business_id, on_page, max_reviews=10000, cursor=None, review_session=None, profile=DEFAULT_QUERY_PROFILE, sort=None, on_total=None, budget=None):
+    # 워커가 넘겨준 세션이 없으면 이번 호출 전용 세션 생성
+    own_session = review_session is None
+    if own_session:
+        review_session = ReviewSession()
+    try:
+        review_session.bootstrap(business_id)
+    except Exception as e:
+        print(f"[{business_id}] 쿠키 획득용 페이지 접속 실패: {e}")
+        if own_session:
+            review_session.close()
+        return 0, False
+
+    steps = review_paging_steps(business_id, review_session, max_reviews, cursor, profile, sort, on_total, budget)
+    try:
+        reply, error = None, None
+        while True:
+            try:
+                kind, value = steps.throw(error) if error else steps.send(reply)
+            except StopIteration as stop:
+                return stop.value
+            reply, error = None, None
+            if kind == "post":
                 try:
-                    response = api_request_context.post(API_URL, data=payload_to_send, headers=HEADERS, timeout=10000)
-
-                    if response.status == 200:
-                        break
-                    elif response.status == 429:
-                        default_wait = 540
-                        retry_after = response.headers.get("Retry-After")
-                        retry_after_seconds = default_wait # 기본값으로 설정
-                        
-                        if retry_after:
-                            try:
-                                # 숫자인지 먼저 시도
-                                retry_after_seconds = int(retry_after)
-                            except ValueError:
-                                # 숫자가 아니면 그냥 9분 대기
-                                retry_after_seconds = default_wait
-                        wait_time = min(retry_after_seconds, default_wait) # 9분과 헤더 값 중 작은 시간
-
-                        print(f"429 발생 {wait_time}초 대기...") # 20분 컨트롤 하기 위함
-                        time.sleep(wait_time)
-                        if(is_429):
-                            print("429 2회째 발생, 작업 일시 중지...")
-                            browser.close()
-                            return all_reviews, is_completed
-                        is_429 = True
-                        continue
-                    elif response.status >= 500:
-                        attempt_count += 1
-                        print(f"서버 오류 ({response.status})")
-                        time.sleep(5 * attempt_count)
-                        continue
-                    else:
-                        raise Exception(f"클라이언트 또는 예상치 못한 오류 ({response.status}): {response.text()}")
-
-                except PlaywrightTimeoutError as e:
-                    attempt_count += 1
-                    print(f"네트워크 에러 발생 ({e})")
-                    time.sleep(3 * attempt_count)
-                    continue
+                    reply = _post_review_page(review_session, business_id, value)
                 except Exception as e:
-                    print(f"치명적 에러 발생: {e}. {business_id} 수집 일시 종료.")
-                    traceback.print_exc()
-                    browser.close()
-                    return all_reviews, is_completed
-
-            # break 안된 경우
-            if attempt_count >= MAX_NETWORK_RETRIES:
-                print(f"최대 재시도 횟수 ({MAX_NETWORK_RETRIES}) 초과. {business_id} 수집 일시 종료.")
-                browser.close()
-                return all_reviews, is_completed
-
-            # 무조건 성공 전제
-            try:
-                data = response.json()
-                reviews_data = data[0].get("data", {}).get("visitorReviews", {})
-                items = reviews_data.get("items", [])
-                
-                if not items:
-                    print("더 이상 가져올 리뷰가 없습니다.")
-                    is_completed = True
-                    break
+                    error = e
+            elif kind == "sleep":
+                time.sleep(value)
+            else:
+                reply = on_page(value)
+    finally:
+        steps.close()
+        if own_session:
+            review_session.close()
+
+class ChunkBudget:
+    def __init__(self, max_pages=CHUNK_MAX_PAGES, max_seconds=CHUNK_MAX_SECONDS):
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.pages = 0
+        self.started_at = time.monotonic()
+
+    # 페이지 하나를 쓰고, 분량을 다 썼으면 True
+    def spend_page(self):
+        self.pages += 1
+        return self.exhausted
+
+    @property
+    def exhausted(self):
+        if self.max_pages and self.pages >= self.max_pages:
+            return True
+        return bool(self.max_seconds) and time.monotonic() - self.started_at >= self.max_seconds
+
+
+# 전체 리뷰를 리스트로 받는 기존 방식 (소량 수집/디버깅용)
+def scrape_reviews_by_api(business_id, max_reviews=10000, cursor=None, review_session=None, profile=DEFAULT_QUERY_PROFILE):
+    all_reviews = []
+    collected_count, is_completed = stream_reviews_by_api(business_id, all_reviews.extend, max_reviews, cursor, review_session, profile)
+    return all_reviews, is_completed
 
-                for item in items:
-                    author_info = item.get("author", {})
-                    extracted_data = {
-                        "author_id": author_info.get("id"),
-                        "body": item.get("body"),
-                        "visit_count": item.get("visitCount"),
-                        "visit_time": item.get("representativeVisitDateTime"),
-                        "cursor": item.get("cursor"),
-                    }
-                    all_reviews.append(extracted_data)
-                    
-                current_cursor = items[-1]['cursor']
-                
-                print(f"리뷰 {len(items)}개 수집 완료. (총 {len(all_reviews)}개)")
-                time.sleep(random.uniform(2, 4)) # 2초~4초 사이 랜덤 대기
+_review_store = None
+_crawl_stats = None
+_lease_manager = None
+_run_state = None
+_completion_index = None
+_completed_reviews = None
+
+def get_review_store():
+    global _review_store
+    if _review_store is None:
+        _review_store = open_review_store(REVIEW_STORE_KIND, REVIEW_DIR, MARKER_DIR, SEGMENT_DIR)
+    return _review_store
+
+def get_lease_manager():
+    global _lease_manager
+    if _lease_manager is None:
+        _lease_manager = open_lease_manager(LEASE_BACKEND, LOCK_DIR, LEASE_DB_PATH)
+    return _lease_manager
+
+# 큐에서 받은 게 없을 때: True면 워커 종료, False면 잠시 기다린 뒤 다시 받기 (run_state.py의 종료 절차)
+def handle_idle_worker(work_queue, worker_id, label=""):
+    action = get_run_state().decide_idle(worker_id)
+    if action == "exit":
+        print(f"{label}실행이 끝났거나 남은 작업은 다른 워커가 처리 중입니다. 워커를 종료합니다. ({format_progress(get_run_state().snapshot())})")
+        return True
+    if action == "standby":
+        print(f"{label}대기 워커로 남아 이어하기 작업을 기다립니다. {STANDBY_POLL_SECONDS}초 후 다시 확인합니다.")
+        return False
+
+    # 처리 중인 워커가 없음: 큐에 재시도 대기 메시지(처리 중으로 보임)가 남았는지만 확인
+    visible_count, inflight_count = work_queue.backlog()
+    if visible_count == 0 and inflight_count == 0:
+        state = get_run_state().mark_completed()
+        print(f"{label}모든 작업(대기+처리 중)이 0입니다. 실행 종료를 기록하고 워커를 종료합니다. ({format_progress(state)})")
+        return True
+    print(f"{label}재시도 대기 중인 메시지 {visible_count + inflight_count}개... {STANDBY_POLL_SECONDS}초 후 다시 확인합니다.")
+    return False
+
+# sqs 클라이언트를 넘기면 설정과 관계없이 SQS 백엔드 사용
+def open_crawl_work_queue(sqs=None):
+    if sqs is None and WORK_QUEUE_BACKEND == "sqlite":
+        return open_work_queue("sqlite", SQS_QUEUE_URLS, db_path=WORK_QUEUE_DB_PATH)
+    return open_work_queue("sqs", SQS_QUEUE_URLS, sqs=sqs or boto3.client('sqs', region_name=SQS_REGION), prefetch=SQS_PREFETCH)
+
+def get_run_state():
+    global _run_state
+    if _run_state is None:
+        _run_state = RunState(RUN_STATE_PATH)
+    return _run_state
+
+# 완료 표시의 원본 디렉토리 (색인의 세대 파일 위치)
+def review_source_dir():
+    return MARKER_DIR if REVIEW_STORE_KIND == "jsonl" else SEGMENT_DIR
+
+# 처음 열 때 색인이 비어 있거나 원본 세대가 바뀌었으면 저장소의 완료 목록으로 채움
+# reconcile=True: 다른 머신의 완료까지 보도록 저장소 전체와 맞춤 (프로듀서가 시작할 때)
+def get_completion_index(reconcile=False):
+    global _completion_index
+    if _completion_index is None:
+        _completion_index = CompletionIndex(COMPLETION_INDEX_PATH)
+    elif not reconcile:
+        return _completion_index
+    _completion_index.ensure_built("reviews", lambda: review_index_rows(get_review_store()), review_source_dir(), reconcile)
+    return _completion_index
+
+# 완료된 카페 집합 (한 번 읽고 주기적으로 바뀐 것만 다시 읽음, 메시지마다 마커 파일을 stat하지 않음)
+def get_completed_reviews():
+    global _completed_reviews
+    if _completed_reviews is None:
+        _completed_reviews = CompletedSet(get_completion_index(), "reviews")
+    return _completed_reviews
+
+def get_crawl_stats():
+    global _crawl_stats
+    if _crawl_stats is None:
+        _crawl_stats = CrawlStatsLog(CRAWL_STATS_DIR)
+    return _crawl_stats
+
+# 색인은 조회용이라 기록 실패가 작업 결과에 영향을 주지 않도록 함 (빠진 기록은 다음에 체크포인트를 보고 다시 채움)
+def record_review_completion(target_id, writer):
+    try:
+        status = COMPLETED if writer.is_completed else PARTIAL
+        get_completion_index().record("reviews", target_id, status, writer.checkpoint["review_count"], writer.last_cursor)
+        if writer.is_completed:
+            get_completed_reviews().add(target_id)
+    except Exception as e:
+        print(f"[{target_id}] 완료 색인 기록 중 오류: {e}")
 
-                if random.random() < 0.8: # 80% 확률로 추가 대기
-                    time.sleep(random.uniform(0.5, 3))
+# 통계는 스케줄링 참고용이라 기록 실패가 작업 결과에 영향을 주지 않도록 함
+def record_review_job(target_id, writer, total):
+    try:
+        get_crawl_stats().record(target_id, writer.is_completed, total, writer.checkpoint["review_count"])
+    except Exception as e:
+        print(f"[{target_id}] 수집 통계 기록 중 오류: {e}")
+    record_review_completion(target_id, writer)
 
-                if random.random() < 0.1: # 10% 확률로 추가 대기
-                    time.sleep(random.uniform(4, 6))
+# 큐에 넣은 카페 기록 (표준 큐는 중복 제거 ID가 없으므로 프로듀서를 다시 실행해도 같은 카페를 두 번 넣지 않도록)
+#   처리한 워커가 reviews 기록을 더 나중 시각으로 남기면 더 이상 큐에 있는 것으로 보지 않음
+#   at: 보내기 시작한 시각 (보낸 뒤에 기록해도 그사이 처리한 워커의 기록보다 앞서도록)
+def queue_mode(refresh=REFRESH_MODE):
+    return "refresh" if refresh else "full"
 
-            except Exception as e:
-                print(f"요청 중 심각한 오류 발생: {e}")
-                traceback.print_exc()
-                break
-        browser.close()     
-    return all_reviews, is_completed
+def record_queued_reviews(cafe_ids, refresh=REFRESH_MODE, at=None):
+    get_completion_index().record_many("reviews_queued", [(cafe_id, queue_mode(refresh), None, None) for cafe_id in cafe_ids], at=at)
 
-# 반환 값을 string
-def process_and_save_reviews(target_id, max_reviews):
-    LOCK_TIMEOUT_SECONDS = 1200 # 락 제한 시간
+def queued_review_ids(refresh=REFRESH_MODE):
+    return get_completion_index().pending_ids("reviews_queued", queue_mode(refresh), "reviews", time.time() - QUEUED_TTL_SECONDS)
 
-    EFS_BASE_PATH = "/mnt/efs_data" # EFS 마운트 경로
-    REVIEW_DIR = f"{EFS_BASE_PATH}/data/cafe_reviews"
-    MARKER_DIR = f"{EFS_BASE_PATH}/data/cafe_reviews_completed" # 마커 파일 저장 위치
-    LOCK_DIR = f"{EFS_BASE_PATH}/data/cafe_reviews_locks" # 락 파일 저장 위치
-    
-    output_file = f"{REVIEW_DIR}/{target_id}_reviews.jsonl"
-    marker_file = f"{MARKER_DIR}/{target_id}.COMPLETED"
-    lock_file = f"{LOCK_DIR}/{target_id}.LOCKED"
+# 색인에 아직 없는 완료 카페: 작성기를 열 때 읽은 체크포인트로 확인해서 스킵하고 색인에 기록
+# 마커가 지워진 카페는 체크포인트가 완료여도 다시 수집 (마커가 원본)
+def skip_completed_by_checkpoint(target_id, writer, refresh=False):
+    if refresh or not writer.is_completed or not get_review_store().is_completed(target_id):
+        return None
+    print(f"[{target_id}] 스킵: 체크포인트에 완료로 기록된 카페입니다. 완료 색인에 추가합니다.")
+    record_review_completion(target_id, writer)
+    return "SKIPPED_COMPLETED"
 
-    if os.path.exists(marker_file):
-        print(f"[{target_id}] 스킵: 이미 '.COMPLETED' 마커 파일이 존재합니다.")
-        return "SKIPPED_COMPLETED"
-    
-    # 락 확인 로직
+# (상태, 임대) 반환. 상태가 None이면 임대를 잡은 것이므로 반드시 release_review_lease 호출
+def begin_review_job(target_id, refresh=False):
+    if not refresh and target_id in get_completed_reviews():
+        print(f"[{target_id}] 스킵: 이미 완료 표시된 카페입니다.")
+        return "SKIPPED_COMPLETED", None
+
+    # 만료된 임대는 acquire가 바로 다음 토큰으로 가져감 (따로 지우지 않음)
     try:
-        if os.path.exists(lock_file):
-            # 락 파일이 존재하면, 얼마나 오래됐는지 확인
-            file_mod_time = os.path.getmtime(lock_file)
-            age_seconds = time.time() - file_mod_time
-            
-            if age_seconds < LOCK_TIMEOUT_SECONDS:
-                # 락이 아직 '신선함' -> 다른 워커가 작업 중
-                print(f"[{target_id}] 스킵: 다른 워커가 작업 중 (.LOCKED 파일 존재, {int(age_seconds)}초 경과).")
-                return "SKIPPED_LOCKED"
-            else:
-                # 락이 '오래됨' -> 이전 워커가 죽었다고 간주
-                print(f"[{target_id}] 경고: 락 타임아웃({LOCK_TIMEOUT_SECONDS}초) 초과. 락을 제거하고 작업을 시작합니다.")
-                os.remove(lock_file) 
-        
-        # os.O_CREAT | os.O_EXCL로 원자적(Atomic) 락파일 생성 시도
-        directory = os.path.dirname(lock_file)
-        if directory and not os.path.exists(directory):
-             os.makedirs(directory, exist_ok=True)
-        
-        fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-        os.write(fd, f"Locked by PID {os.getpid()} at {time.time()}".encode())
-        os.close(fd)
-        
-    except FileExistsError:
-        # 락을 생성하려는데 그사이에 다른 워커가 락을 먼저 생성함
-        print(f"[{target_id}] 스킵: 다른 워커가 방금 락을 획득함.")
-        return "SKIPPED_LOCKED"
+        lease = get_lease_manager().acquire(target_id)
     except Exception as e:
         print(f"[{target_id}] 락 처리 중 오류: {e}")
         traceback.print_exc()
-        return "FAILED_LOCK_ERROR"
-    
-    # 완료되지 않은 카페라면
-    last_cursor = get_last_cursor_from_jsonl(output_file) # 마지막 커서
-    if last_cursor:
-        print(f"[{target_id}] 작업 재개: 마지막 커서 '{last_cursor[:10]}...' 부터 시작합니다.")
+        return "FAILED_LOCK_ERROR", None
+
+    if lease is None:
+        print(f"[{target_id}] 스킵: 다른 워커가 작업 중 (임대 유효).")
+        return "SKIPPED_LOCKED", None
+    return None, lease
+
+def log_resume_point(target_id, writer):
+    if writer.last_cursor:
+        print(f"[{target_id}] 작업 재개: 리뷰 {writer.checkpoint['review_count']}개, 마지막 커서 '{writer.last_cursor[:10]}...' 부터 시작합니다.")
     else:
         print(f"[{target_id}] 작업 시작: 처음부터 수집합니다.")
 
-    reviews_data, is_completed = scrape_reviews_by_api(target_id, max_reviews, last_cursor)
-    # 파일 생성
+# 갱신 모드에서 페이지마다 호출: 저장 후 이미 있던 리뷰가 섞여 있거나, 페이지의 모든 리뷰가 기준선(high_water)보다 오래된 방문이면 중단 신호
+# 최신순은 작성 순서라 그 뒤는 모두 저장된 리뷰. 방문 시각은 작성 순서와 다를 수 있으므로(오래전 방문을 나중에 작성)
+# 오래된 방문이 일부 섞였다고 멈추지 않음. 기준선은 이번 갱신을 시작할 때의 값으로 고정
+def refresh_page_handler(writer):
+    high_water = writer.checkpoint.get("high_water")
+
+    def on_page(records):
+        duplicates = writer.duplicates
+        writer.write_page(records, cursor_field="refresh_cursor")
+        if writer.duplicates > duplicates:
+            return True
+        return bool(high_water) and bool(records) and all(record.get("visit_time") and record["visit_time"] < high_water for record in records)
+    return on_page
+
+def log_refresh_point(target_id, writer):
+    high_water = writer.checkpoint.get("high_water") or "없음"
+    if writer.checkpoint.get("refresh_cursor"):
+        print(f"[{target_id}] 갱신 재개: 최신순 커서 '{writer.checkpoint['refresh_cursor'][:10]}...' 부터, 기준 방문 시각 {high_water}")
+    else:
+        print(f"[{target_id}] 갱신 시작: 최신순으로 기준 방문 시각 {high_water} 이후 리뷰만 수집합니다.")
+
+def finish_refresh_job(target_id, writer, is_caught_up, budget=None):
+    print(f"[{target_id}] 갱신: 새 리뷰 {writer.count}개 저장 (총 {writer.checkpoint['review_count']}개).")
+    if is_caught_up:
+        writer.mark_refreshed()
+        print(f"[{target_id}] 갱신 완료. 다음 기준 방문 시각: {writer.checkpoint.get('high_water')}")
+        return f"SUCCESS_COMPLETED: {target_id}"
+    if budget is not None and budget.exhausted:
+        return continue_status(target_id, budget)
+    # 중간에 끊기면 refresh_cursor가 남아서 다음 갱신이 그 위치부터 이어감
+    return f"INCOMPLETE: {target_id}"
+
+# 결과 상태 문자열 반환 (완료 표시는 writer.mark_completed가 저장소에 기록)
+def continue_status(target_id, budget):
+    print(f"[{target_id}] 이번 분량({budget.pages}페이지, {time.monotonic() - budget.started_at:.0f}초) 완료. 이어하기 작업으로 넘깁니다.")
+    return f"CONTINUE: {target_id}"
+
+def finish_review_job(target_id, collected_count, is_completed, duplicates=0, budget=None):
+    if collected_count > 0:
+        print(f"[{target_id}] 이번 실행에서 {collected_count - duplicates}개 리뷰 저장됨 ({REVIEW_STORE_KIND} 저장소).")
+        if duplicates:
+            print(f"[{target_id}] 이미 저장된 리뷰 {duplicates}개는 중복으로 제외했습니다.")
+    else:
+        print(f"[{target_id}] 이번 실행에서 수집된 새 리뷰 없음.")
+
+    if(is_completed):
+        print(f"[{target_id}] API가 '완료' 신호를 보냈습니다. 완료 표시를 남겼습니다.")
+        return f"SUCCESS_COMPLETED: {target_id}"
+    elif budget is not None and budget.exhausted:
+        return continue_status(target_id, budget)
+    else:
+        return f"INCOMPLETE: {target_id}"
+
+def start_lease_heartbeat(lease):
+    return LeaseHeartbeat(get_lease_manager(), lease).start()
+
+# 펜싱: 하트비트가 임대를 잃었으면 (다른 워커가 더 높은 토큰으로 가져감) 더 이상 저장하지 않음
+def fenced_page_writer(lease, on_page):
+    def write(records):
+        if lease.lost:
+            raise LeaseLostError(f"{lease.key}: 임대를 잃어 저장을 중단합니다 (token {lease.token})")
+        return on_page(records)
+    return write
+
+def release_review_lease(target_id, lease):
     try:
-        if len(reviews_data) > 0:
-            print(f"[{target_id}] {len(reviews_data)}개 리뷰 수집됨. 파일에 이어쓰기...")
-            directory = os.path.dirname(output_file)
-            # 디렉토리 없으면 생성
-            if directory and not os.path.exists(directory):
-                os.makedirs(directory, exist_ok=True)
-            # 'a' 모드로 이어쓰기
-            with open(output_file, "a", encoding="utf-8") as f:
-                for review in reviews_data:
-                    f.write(json.dumps(review, ensure_ascii=False) + "\n")
-            print(f"[{target_id}] 파일 저장 완료: {output_file}")
+        get_lease_manager().release(lease)
+    except Exception as e:
+        print(f"[{target_id}] 락 해제 중 오류: {e}")
+        traceback.print_exc()
+
+# 카페 하나의 한 분량 작업: 임대 -> 작성기 열기 -> (수집은 호출한 쪽) -> 완료 처리/기록 -> 정리
+# 동기 process_and_save_reviews와 crawl_async가 같이 씀. 메서드는 모두 블로킹 (async 쪽은 스레드로 넘김)
+#   start() -> 스킵 상태 또는 None (None이면 on_page/cursor/sort로 수집 후 finish)
+#   finish(수집한 개수, 완료 여부) -> 상태, fail(예외) -> 상태 (except 블록 안에서 호출), close()는 항상 호출
+class ReviewJob:
+    def __init__(self, target_id, refresh=REFRESH_MODE, budget=None):
+        self.target_id = target_id
+        self.refresh = refresh
+        self.budget = budget or ChunkBudget()
+        self.totals = []
+        self.lease = None
+        self.writer = None
+        self.refreshing = False
+        self.on_page = None
+        self.cursor = None
+        self.sort = None
+        self._heartbeat = None
+
+    def start(self):
+        skip_status, self.lease = begin_review_job(self.target_id, self.refresh)
+        if skip_status:
+            return skip_status
+        self._heartbeat = start_lease_heartbeat(self.lease)
+        # 페이지를 받을 때마다 바로 저장소에 기록, 재개 커서는 체크포인트에서 읽음
+        self.writer = get_review_store().open_writer(self.target_id)
+        skip_status = skip_completed_by_checkpoint(self.target_id, self.writer, self.refresh)
+        if skip_status:
+            return skip_status
+        self.refreshing = self.refresh and self.writer.is_completed
+        if self.refreshing:
+            log_refresh_point(self.target_id, self.writer)
+            self.on_page = fenced_page_writer(self.lease, refresh_page_handler(self.writer))
+            self.cursor = self.writer.checkpoint.get("refresh_cursor")
+            self.sort = RECENT_SORT
         else:
-            print(f"[{target_id}] 이번 실행에서 수집된 새 리뷰 없음.")
+            log_resume_point(self.target_id, self.writer)
+            self.on_page = fenced_page_writer(self.lease, self.writer.write_page)
+            self.cursor = self.writer.last_cursor
+        return None
 
-        if(is_completed):
-            print(f"[{target_id}] API가 '완료' 신호를 보냈습니다. 마커 파일을 생성합니다.")
-            create_completion_marker(marker_file)
-            return f"SUCCESS_COMPLETED: {target_id}"
+    def finish(self, collected_count, is_done):
+        # 완료 표시는 아직 임대를 가진 경우에만
+        if is_done:
+            get_lease_manager().validate(self.lease)
+        if self.refreshing:
+            status = finish_refresh_job(self.target_id, self.writer, is_done, self.budget)
         else:
-            return f"INCOMPLETE: {target_id}"
+            if is_done:
+                self.writer.mark_completed()
+            status = finish_review_job(self.target_id, collected_count, is_done, self.writer.duplicates, self.budget)
+        record_review_job(self.target_id, self.writer, self.totals[-1] if self.totals else None)
+        return status
+
+    def fail(self, error):
+        if isinstance(error, LeaseLostError):
+            print(f"[{self.target_id}] {error}")
+            return f"FAILED_LEASE_LOST: {self.target_id}"
+        print(f"[{self.target_id}] 파일 저장 중 오류 발생: {error}")
+        traceback.print_exc()
+        return f"FAILED_SAVE_ERROR: {self.target_id}"
+
+    def close(self):
+        try:
+            if self.writer is not None:
+                self.writer.close()
+        finally:
+            # 락 해제
+            if self._heartbeat is not None:
+                self._heartbeat.stop()
+            if self.lease is not None:
+                release_review_lease(self.target_id, self.lease)
+
+# 반환 값을 string
+# 분량(budget, 기본은 CHUNK_MAX_PAGES/CHUNK_MAX_SECONDS)을 다 쓰면 "CONTINUE: id" -> 워커가 이어하기 메시지를 넣음
+def process_and_save_reviews(target_id, max_reviews, review_session=None, refresh=REFRESH_MODE, budget=None):
+    job = ReviewJob(target_id, refresh, budget)
+    try:
+        skip_status = job.start()
+        if skip_status:
+            return skip_status
+        collected_count, is_done = stream_reviews_by_api(
+            target_id, job.on_page, max_reviews, job.cursor, review_session, sort=job.sort, on_total=job.totals.append, budget=job.budget,
+        )
+        return job.finish(collected_count, is_done)
     except Exception as e:
-            print(f"[{target_id}] 파일 저장 중 오류 발생: {e}")
-            traceback.print_exc()
-            return f"FAILED_SAVE_ERROR: {target_id}"
+        return job.fail(e)
     finally:
-        # 락 해제
-        if os.path.exists(lock_file):
-            try:
-                os.remove(lock_file)
-            except Exception as e:
-                print(f"[{target_id}] 락 해제 중 오류: {e}")
-                traceback.print_exc()
-
-def create_completion_marker(marker_file):
-    directory = os.path.dirname(marker_file)
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-    # 빈 파일 생성
-    with open(marker_file, "w") as f:
-        pass
-    print(f"[{os.path.basename(marker_file)}] 마커 파일 생성 완료.")
-
-def main():
-    SQS_QUEUE_URL = "https://sqs.ap-northeast-2.amazonaws.com/181474919825/cafe_queue"
-    SQS_REGION = "ap-northeast-2"
-    
-    sqs = boto3.client('sqs', region_name=SQS_REGION)
+        job.close()
+
+# 처리 결과에 따라 메시지 정리
+#   완료/스킵(완료): 삭제 대기열에 추가 (배치 삭제)
+#   이어하기: 이어하기 메시지를 먼저 넣고 현재 메시지를 바로 삭제 (둘 사이에 죽어도 작업이 사라지지 않음, 중복은 임대/체크포인트가 처리)
+#     배치 삭제를 기다리면 그사이 가시성이 끝난 원본이 다시 보여서 이어하기 메시지가 계속 늘어날 수 있으므로 기다리지 않음
+#   그 외(실패/락 스킵): 가시성 연장을 멈추고 잠시 뒤 다른 워커가 재시도
+def settle_review_task(work_queue, task, result_status):
+    cafe_id = task.body
+    if "SUCCESS_COMPLETED" in result_status or "SKIPPED_COMPLETED" in result_status:
+        work_queue.ack(task)
+        print(f"[{cafe_id}] 작업 완료, 큐에서 메시지 삭제 예약.")
+    elif "CONTINUE" in result_status:
+        try:
+            record_queued_reviews([cafe_id])
+        except Exception as e:
+            print(f"[{cafe_id}] 큐 기록 중 오류: {e}")
+        # 원본과 다른 중복 제거 ID (FIFO 큐에서 5분 안에 보낸 원본과 같은 ID면 이어하기가 버려짐)
+        work_queue.send(task.queue_url, cafe_id, dedup_id=f"continue-{task.message_id}")
+        work_queue.ack_now(task)
+        print(f"[{cafe_id}] 이어하기 메시지를 큐에 다시 넣었습니다.")
+    else:
+        work_queue.nack(task)
+        print(f"[{cafe_id}] 작업 실패. {NACK_DELAY_SECONDS}초 뒤 다시 보이도록 큐에 돌려줍니다 (자동 재시도).")
+
+def main(sqs=None):
+    # SQS는 SQS_PREFETCH개(기본 1개)씩 받아서 처리, 가지고 있는 메시지는 하트비트가 가시성 연장
+    work_queue = open_crawl_work_queue(sqs)
+    # 워커 하나당 HTTP 세션 하나 (쿠키 수명 동안 브라우저 재실행 없음)
+    review_session = ReviewSession()
+    worker_id = default_worker_id()
     
-    print("--- SQS 크롤링 워커 시작 ---")
+    print(f"--- 크롤링 워커 시작 (작업 큐: {type(work_queue).__name__}) ---")
 
     # 큐가 빌 때까지 무한 반복
     while True:
         try:
-            print("\nSQS 큐에서 새 작업 수신 대기 중... (최대 20초)")
-            
-            response = sqs.receive_message(
-                QueueUrl=SQS_QUEUE_URL,
-                MaxNumberOfMessages=1,
-                WaitTimeSeconds=20 # 큐가 비어있으면 20초간 대기
-            )
+            print("\n작업 큐에서 새 작업 수신 대기 중... (최대 20초)")
             
-            messages = response.get('Messages', [])
+            task = work_queue.receive()
             
-            if len(messages) > 0:
-                message = messages[0]
-                cafe_id = message['Body']
-                receipt_handle = message['ReceiptHandle']
+            if task is not None:
+                cafe_id = task.body
                 
                 print(f"--- 작업 시작: [Cafe ID: {cafe_id}] ---")
-                result_status = process_and_save_reviews(cafe_id, 10000)
-                print(f"작업 결과: [Cafe ID: {cafe_id}] - {result_status}")
-
-                if "SUCCESS_COMPLETED" in result_status or "SKIPPED_COMPLETED" in result_status:
-                    sqs.delete_message(QueueUrl=SQS_QUEUE_URL, ReceiptHandle=receipt_handle)
-                    print(f"[{cafe_id}] 작업 완료, 큐에서 메시지 삭제 완료.")
-                else:
-                    print(f"[{cafe_id}] 작업 실패. 큐에 남겨둡니다 (자동 재시도).")
+                get_run_state().begin(worker_id, cafe_id)
+                result_status = "FAILED_UNKNOWN"
+                try:
+                    result_status = process_and_save_reviews(cafe_id, 10000, review_session)
+                    print(f"작업 결과: [Cafe ID: {cafe_id}] - {result_status}")
+                    settle_review_task(work_queue, task, result_status)
+                finally:
+                    get_run_state().finish(worker_id, "SUCCESS_COMPLETED" in result_status)
                 
                 # 다음 카페 작업을 받기 전, 25~35초 랜덤 대기
                 time.sleep(random.uniform(25, 35))
             else: 
-                print("큐가 비어있음. '진짜' 작업이 끝났는지 확인 중...")
-                # 큐의 현재 상태 속성을 가져옴
-                attrs = sqs.get_queue_attributes(
-                    QueueUrl=SQS_QUEUE_URL,
-                    AttributeNames=[
-                        'ApproximateNumberOfMessages',          # 큐에 보이는 메시지 수
-                        'ApproximateNumberOfMessagesNotVisible' # '처리 중'(투명)인 메시지 수
-                    ]
-                )
-                    
-                visible_count = int(attrs['Attributes']['ApproximateNumberOfMessages'])
-                inflight_count = int(attrs['Attributes']['ApproximateNumberOfMessagesNotVisible'])
-
-                # '진짜' 종료 조건:
-                if visible_count == 0 and inflight_count == 0:
-                    print("모든 작업(대기+처리 중)이 0입니다. 워커를 종료합니다.")
+                print("큐가 비어있음. 실행 상태로 종료 여부 확인 중...")
+                if handle_idle_worker(work_queue, worker_id):
                     break
-                else:
-                    # 큐는 비었지만, 다른 워커가 아직 일하고 있는 경우
-                    print(f"다른 워커가 아직 {inflight_count}개 작업 처리 중... 30초 후 다시 확인합니다.")
-                    time.sleep(30)
+                time.sleep(STANDBY_POLL_SECONDS)
 
         except KeyboardInterrupt:
             print("\n수동으로 종료 신호 받음. 워커를 종료합니다.")
@@ -543,7 +593,11 @@ def main():
             print("10초 후 재시도...")
             time.sleep(10)
 
-    print("--- SQS 크롤링 워커 종료 ---")
+    get_run_state().leave(worker_id)
+    work_queue.close()
+    review_session.close()
+    print(f"작업 큐 호출 수: {work_queue.stats()}")
+    print("--- 크롤링 워커 종료 ---")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,34 +1,31 @@
 from playwright.sync_api import sync_playwright
 import time
-import re
 import json
 import random
 import os
+from apollo_state import extract_apollo_entries, LIST_ENTRY_PREFIXES, LIST_ROOT_FIELDS
+from page_load import open_page
+
+# 목록에 필요한 항목(RestaurantListSummary, ROOT_QUERY의 restaurantList*)만 디코딩 (apollo_state.py)
+def extract_list_apollo_state(script_content):
+    return extract_apollo_entries(script_content, LIST_ENTRY_PREFIXES, LIST_ROOT_FIELDS)
+
+def parse_apollo_cafes(initial_apollo_state, cafes):
+    for key, value in initial_apollo_state.items():
+        # Key가 "RestaurantListSummary:"로 시작하는 항목만 찾음
+        if key.startswith("RestaurantListSummary:"):
+            cafe_info = {
+                "id" : value.get("id"),
+                "name" : value.get("name"),
+                "category" : value.get("category")
+            }
+            cafes.append(cafe_info)
 
 def parse_script_content(script_content, cafes):
-    # 패턴 내부 데이터 추출
-    match = re.search(r"window\.__APOLLO_STATE__\s*=\s*({.*?});", script_content, re.DOTALL)
-    if match:
-        json_string = match.group(1)
-        try:
-            initial_apollo_state = json.loads(json_string)
-            for key, value in initial_apollo_state.items():
-                # Key가 "RestaurantListSummary:"로 시작하는 항목만 찾음
-                if key.startswith("RestaurantListSummary:"):
-                    cafe_info = {
-                        "id" : value.get("id"),
-                        "name" : value.get("name"),
-                        "category" : value.get("category")
-                    }
-                    cafes.append(cafe_info)
-            print('파싱 및 리스트 추가 완료')
-
-        except json.JSONDecodeError as e:
-            print(f"초기 데이터 JSON 파싱 오류: {e}")
-        except KeyError as e:
-            print(f"초기 데이터 구조 탐색 오류 (KeyError): {e}")
-    else:
-        print("스크립트에서 APOLLO_STATE 패턴을 찾지 못했습니다.")
+    initial_apollo_state = extract_list_apollo_state(script_content)
+    if initial_apollo_state is not None:
+        parse_apollo_cafes(initial_apollo_state, cafes)
+        print('파싱 및 리스트 추가 완료')
 
 def parse_graphql_data(response_body, cafes):
     try:
@@ -58,65 +55,91 @@ def is_valid_cafe_list_response(response):
     return False
     
 
-def extract_cafe_list(url):
-    script_content = None
+# var naver를 포함한 스크립트 검색
+NAVER_SCRIPT_JS = """
+    () => {
+        const scripts = document.querySelectorAll('script'); // 모든 script 태그 선택
+        const searchPattern = 'var naver=typeof naver'; // 찾으려는 정확한 패턴
+        for (const script of scripts) {
+            if (script.textContent && script.textContent.includes(searchPattern)) {
+                return script.textContent; // 찾으면 내용 반환
+            }
+        }
+        return null; // 못 찾으면 null 반환
+    }
+    """
+
+# 목록 페이지를 열고 페이지 버튼을 차례로 눌러가며 페이지마다 on_page(page_num, page_cafes) 호출
+# start_page 이전 페이지는 (이어하기) 버튼만 누르고 넘어감
+# 마지막 페이지까지 갔으면 True, 중간에 오류로 멈췄으면 False
+def paginate_cafe_list(page, url, on_page, start_page=1):
+    open_page(page, url, "list", timeout=10000, ready="networkidle") # 버튼을 눌러야 하므로 화면이 그려질 때까지
+    script_content = page.evaluate(NAVER_SCRIPT_JS) # 브라우저에서 위 코드 실행
+
+    # 스크립트가 존재하지 않음
+    if not script_content:
+        print("'var naver'을 가진 스크립트를 찾을 수 없습니다.")
+        return False
+
+    print("스크립트 내용 찾음!")
+    first_page_cafes = []
+    parse_script_content(script_content, first_page_cafes)
+    if not first_page_cafes:
+        return False
+    if start_page <= 1:
+        on_page(1, first_page_cafes)
+
+    # 1페이지가 추가되었다면 페이지 이동
+    page_num = 1
+    while(True):
+        page_num+=1
+        try:
+            page_button = page.get_by_role("button", name=str(page_num), exact=True) # 페이지 버튼 찾기
+
+            if not page_button.is_visible():
+                print(f"{page_num}페이지 버튼을 찾을 수 없습니다.")
+                return True
+
+            # GraphQL 응답 캡처를 먼저 설정하고 버튼 클릭
+            with page.expect_response(lambda res: "/graphql" in res.url and is_valid_cafe_list_response(res), timeout=10000) as response_info:
+                print(f"{page_num}페이지 버튼 클릭...")
+                page_button.click()
+
+            if page_num < start_page:
+                continue
+
+            response = response_info.value
+            print("GraphQL 응답 수신!")
+
+            page_cafes = []
+            parse_graphql_data(response.json(), page_cafes)
+            on_page(page_num, page_cafes)
+            # 다음 페이지 이동까지 잠깐 대기
+            time.sleep(random.uniform(1.5, 2.0))
+        except Exception as e:
+            print(f"{page_num}페이지 처리 중 오류: {e}")
+            return False
+
+# browser_pool을 주면 풀의 브라우저에서 새 컨텍스트만 열어서 사용
+def extract_cafe_list(url, browser_pool=None, on_page=None, start_page=1):
     cafes = []
+
+    def handle_page(page_num, page_cafes):
+        cafes.extend(page_cafes)
+        if on_page:
+            on_page(page_num, page_cafes)
+
+    if browser_pool:
+        with browser_pool.new_page() as page:
+            finished = paginate_cafe_list(page, url, handle_page, start_page)
+        return cafes, finished
+
+    finished = False
     with sync_playwright() as p:
         try:
             browser = p.chromium.launch(headless=True) 
             page = browser.new_page()
-            page.goto(url, wait_until="networkidle", timeout=10000)
-
-            # var naver를 포함한 스크립트 검색
-            js_code = """
-            () => {
-                const scripts = document.querySelectorAll('script'); // 모든 script 태그 선택
-                const searchPattern = 'var naver=typeof naver'; // 찾으려는 정확한 패턴
-                for (const script of scripts) {
-                    if (script.textContent && script.textContent.includes(searchPattern)) {
-                        return script.textContent; // 찾으면 내용 반환
-                    }
-                }
-                return null; // 못 찾으면 null 반환
-            }
-            """
-            script_content = page.evaluate(js_code) # 브라우저에서 위 코드 실행
-            
-            # 스크립트가 존재
-            if script_content:
-                print("스크립트 내용 찾음!")
-                parse_script_content(script_content, cafes)
-
-                if(len(cafes) > 0):
-                    # 1페이지가 추가되었다면 페이지 이동
-                    page_num = 1
-                    while(True):
-                        page_num+=1
-                        try:
-                            page_button = page.get_by_role("button", name=str(page_num), exact=True) # 페이지 버튼 찾기
-
-                            if page_button.is_visible():
-                                # GraphQL 응답 캡처를 먼저 설정하고 버튼 클릭
-                                with page.expect_response(lambda res: "/graphql" in res.url and is_valid_cafe_list_response(res), timeout=10000) as response_info:
-                                    print(f"{page_num}페이지 버튼 클릭...")
-                                    page_button.click()
-                                
-                                response = response_info.value
-                                print("GraphQL 응답 수신!")
-
-                                response_body = response.json()
-                                parse_graphql_data(response_body, cafes)
-                                # 다음 페이지 이동까지 잠깐 대기
-                                time.sleep(random.uniform(1.5, 2.0))
-                            else:
-                                print(f"{page_num}페이지 버튼을 찾을 수 없습니다.")
-                                break
-                        except Exception as e:
-                            print(f"{page_num}페이지 처리 중 오류: {e}")
-                            break
-            else:
-                # 스크립트가 존재하지 않음
-                print("'var naver'을 가진 스크립트를 찾을 수 없습니다.")
+            finished = paginate_cafe_list(page, url, handle_page, start_page)
             browser.close()
             
         except Exception as e:
@@ -124,7 +147,7 @@ def extract_cafe_list(url):
             if 'browser' in locals() and browser.is_connected():
                 browser.close()
 
-    return cafes
+    return cafes, finished
 
 def save_extracted_cafe_list(cafes, filename="./data/cafe_list.jsonl"):
     if not cafes:
@@ -149,7 +172,7 @@ if __name__ == "__main__":
     # 우선은 성수 카페만
     target_url = "https://pcmap.place.naver.com/restaurant/list?query=%EC%84%B1%EC%88%98%20%EC%B9%B4%ED%8E%98" 
     
-    cafes = extract_cafe_list(target_url)
+    cafes, _ = extract_cafe_list(target_url)
     
     if cafes:
         save_extracted_cafe_list(cafes)
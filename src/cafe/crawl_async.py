@@ -0,0 +1,208 @@
+import asyncio
+import os
+import random
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from playwright.async_api import async_playwright
+from playwright.async_api import Error as PlaywrightError
+from browser_pool import DEFAULT_USER_AGENT
+from rate_limit import HostRateLimiter, host_of
+from page_load import open_page_async
+from review_api import API_URL, PLACE_BASE_URL, review_page_url, build_review_headers, parse_retry_after, DEFAULT_QUERY_PROFILE
+from crawl import REFRESH_MODE, ReviewJob, ReviewNetworkError, review_paging_steps, settle_review_task, open_crawl_work_queue, get_run_state, handle_idle_worker
+from run_state import STANDBY_POLL_SECONDS, default_worker_id
+
+# 워커 한 프로세스에서 동시에 진행할 카페 수
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", "10"))
+
+
+# ReviewSession의 async 버전
+# 브라우저로 쿠키만 받고, 이후에는 Playwright의 APIRequestContext(브라우저 없는 HTTP 클라이언트)로 페이징
+class AsyncReviewSession:
+    def __init__(self, cookie_ttl=1800, api_url=API_URL, base_url=PLACE_BASE_URL, user_agent=DEFAULT_USER_AGENT, rate_limiter=None):
+        self.cookie_ttl = cookie_ttl
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.api_host = host_of(api_url)
+        self.api_url = api_url
+        self.base_url = base_url
+        self.user_agent = user_agent
+        self.bootstrapped_at = None
+        self._playwright = None
+        self._request = None
+        self._retired = [] # 쿠키 갱신 전 컨텍스트 (진행 중 요청이 끝나도록 종료 시점에 정리)
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self):
+        return self.bootstrapped_at is not None and time.time() - self.bootstrapped_at < self.cookie_ttl
+
+    def invalidate(self):
+        self.bootstrapped_at = None
+
+    async def bootstrap(self, business_id, force=False):
+        async with self._lock:
+            if not force and self.is_fresh():
+                return
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            browser = await self._playwright.chromium.launch(headless=True)
+            try:
+                context = await browser.new_context(user_agent=self.user_agent)
+                page = await context.new_page()
+                await open_page_async(page, review_page_url(business_id, self.base_url), "review", ready="networkidle")
+                storage_state = await context.storage_state()
+            finally:
+                await browser.close()
+
+            if self._request is not None:
+                self._retired.append(self._request)
+            self._request = await self._playwright.request.new_context(
+                storage_state=storage_state,
+                extra_http_headers={"User-Agent": self.user_agent},
+            )
+            self.bootstrapped_at = time.time()
+            print(f"[{business_id}] 쿠키 {len(storage_state.get('cookies', []))}개 획득 (이후 HTTP 컨텍스트 사용)")
+
+    async def post_graphql(self, business_id, payload, timeout=10):
+        await self.bootstrap(business_id)
+        await self.rate_limiter.acquire_async(self.api_host)
+        response = await self._request.post(
+            self.api_url, data=payload,
+            headers=build_review_headers(business_id, self.base_url), timeout=timeout * 1000,
+        )
+        if response.status == 429:
+            # Playwright 응답 헤더 이름은 소문자
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            await asyncio.to_thread(self.rate_limiter.on_throttle, self.api_host, retry_after)
+        elif response.status == 200:
+            await asyncio.to_thread(self.rate_limiter.on_success, self.api_host)
+        return response
+
+    async def close(self):
+        for request_context in self._retired + ([self._request] if self._request else []):
+            try:
+                await request_context.dispose()
+            except Exception as e:
+                print(f"HTTP 컨텍스트 정리 중 오류: {e}")
+        self._retired = []
+        self._request = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+async def _post_review_page_async(review_session, business_id, payload):
+    try:
+        response = await review_session.post_graphql(business_id, payload, timeout=10)
+    except PlaywrightError as e:
+        # 타임아웃/연결 오류 (TimeoutError도 Error의 하위 클래스)
+        raise ReviewNetworkError(e) from e
+    return response.status, (await response.json() if response.status == 200 else await response.text())
+
+# stream_reviews_by_api의 async 드라이버 (재시도/대기/커서 처리는 review_paging_steps를 같이 씀), sleep만 await로 양보
+# on_page는 페이지마다 await 되는 코루틴 함수, True를 반환하면 완료로 보고 중단
+async def stream_reviews_async(business_id, review_session, on_page, max_reviews=10000, cursor=None, profile=DEFAULT_QUERY_PROFILE, sort=None, on_total=None, budget=None):
+    try:
+        await review_session.bootstrap(business_id)
+    except Exception as e:
+        print(f"[{business_id}] 쿠키 획득용 페이지 접속 실패: {e}")
+        return 0, False
+
+    steps = review_paging_steps(business_id, review_session, max_reviews, cursor, profile, sort, on_total, budget)
+    try:
+        reply, error = None, None
+        while True:
+            try:
+                kind, value = steps.throw(error) if error else steps.send(reply)
+            except StopIteration as stop:
+                return stop.value
+            reply, error = None, None
+            if kind == "post":
+                try:
+                    reply = await _post_review_page_async(review_session, business_id, value)
+                except Exception as e:
+                    error = e
+            elif kind == "sleep":
+                # 이 카페만 쉬는 동안 이벤트 루프는 다른 카페를 진행
+                await asyncio.sleep(value)
+            else:
+                reply = await on_page(value)
+    finally:
+        steps.close()
+
+# process_and_save_reviews의 async 버전 (작업 단계는 ReviewJob을 같이 씀). EFS 파일 작업은 블로킹이므로 스레드로 넘김
+async def process_and_save_reviews_async(target_id, max_reviews, review_session, refresh=REFRESH_MODE, budget=None):
+    job = ReviewJob(target_id, refresh, budget)
+    try:
+        skip_status = await asyncio.to_thread(job.start)
+        if skip_status:
+            return skip_status
+        collected_count, is_done = await stream_reviews_async(
+            target_id, review_session, lambda records: asyncio.to_thread(job.on_page, records),
+            max_reviews, job.cursor, sort=job.sort, on_total=job.totals.append, budget=job.budget,
+        )
+        return await asyncio.to_thread(job.finish, collected_count, is_done)
+    except Exception as e:
+        return job.fail(e)
+    finally:
+        await asyncio.to_thread(job.close)
+
+# main()의 루프 하나에 해당. 슬롯마다 카페 하나씩 처리하고 카페 사이 25~35초 대기는 그대로 유지
+# 슬롯들이 작업 큐(받아 둔 메시지 버퍼) 하나를 공유, 실행 상태에는 슬롯마다 워커 하나로 기록
+async def worker_slot(slot_id, work_queue, review_session):
+    worker_id = f"{default_worker_id()}-{slot_id}"
+    while True:
+        try:
+            task = await asyncio.to_thread(work_queue.receive)
+
+            if task is not None:
+                cafe_id = task.body
+
+                print(f"--- [슬롯 {slot_id}] 작업 시작: [Cafe ID: {cafe_id}] ---")
+                await asyncio.to_thread(get_run_state().begin, worker_id, cafe_id)
+                result_status = "FAILED_UNKNOWN"
+                try:
+                    result_status = await process_and_save_reviews_async(cafe_id, 10000, review_session)
+                    print(f"[슬롯 {slot_id}] 작업 결과: [Cafe ID: {cafe_id}] - {result_status}")
+                    await asyncio.to_thread(settle_review_task, work_queue, task, result_status)
+                finally:
+                    await asyncio.to_thread(get_run_state().finish, worker_id, "SUCCESS_COMPLETED" in result_status)
+
+                await asyncio.sleep(random.uniform(25, 35))
+            else:
+                # 슬롯 하나가 끝나도 다른 슬롯은 계속 (실행이 끝났으면 다른 슬롯도 큐가 빌 때 같은 판단으로 종료)
+                if await asyncio.to_thread(handle_idle_worker, work_queue, worker_id, f"[슬롯 {slot_id}] "):
+                    break
+                await asyncio.sleep(STANDBY_POLL_SECONDS)
+
+        except Exception:
+            print(f"[슬롯 {slot_id}] 루프에서 치명적 오류 발생!")
+            traceback.print_exc()
+            await asyncio.sleep(10)
+    await asyncio.to_thread(get_run_state().leave, worker_id)
+
+async def main_async(concurrency=CRAWL_CONCURRENCY):
+    # to_thread가 쓰는 기본 실행기를 슬롯 수에 맞춤 (SQS 롱폴링이 스레드를 점유)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency + 4))
+
+    work_queue = open_crawl_work_queue()
+    review_session = AsyncReviewSession()
+
+    print(f"--- 비동기 크롤링 워커 시작 (동시 카페 {concurrency}개, 작업 큐: {type(work_queue).__name__}) ---")
+    try:
+        await asyncio.gather(*(worker_slot(i, work_queue, review_session) for i in range(concurrency)))
+    finally:
+        await asyncio.to_thread(work_queue.close)
+        await review_session.close()
+    print(f"작업 큐 호출 수: {work_queue.stats()}")
+    print("--- 비동기 크롤링 워커 종료 ---")
+
+def main():
+    try:
+        asyncio.run(main_async())
+    except KeyboardInterrupt:
+        print("\n수동으로 종료 신호 받음. 워커를 종료합니다.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from browser_pool import BrowserPool
+from basic_info_api import BasicInfoSession
+from review_api import PLACE_BASE_URL
+from crawl_cafe_basic_info import BASIC_INFO_FETCH_MODE, BASIC_INFO_INDEX_PATH, OUTPUT_DIR, crawl_cafe_basic_info, save_cafe_info_to_json, load_cafe_ids_from_jsonl, open_basic_info_index, pending_basic_info_ids
+from completion_index import COMPLETED
+from rate_limit import DEFAULT_RATE
+
+# 기본 정보 수집을 여러 프로세스로 (스레드 방식은 JSON 파싱이 GIL에 묶이고 스레드마다 Playwright 드라이버가 뜸)
+#   - 워커 프로세스 N개가 각자 Playwright 하나 + 브라우저 하나(BrowserPool(size=1))를 계속 재사용
+#   - 부모가 크기 제한이 있는 작업 큐에 id를 넣고 (워커가 밀리면 넣는 쪽이 기다림), 결과는 결과 큐로 받아 부모 혼자 파일에 씀
+#   - 프로세스별 처리 개수와 분당 처리 속도를 주기적으로 출력
+# http 방식의 요청 속도는 프로세스 수와 상관없이 머신 전체 호스트 한도(HostRateLimiter, CAFE_RATE_PER_HOST 기본 초당 1회)를 모든 프로세스가 나눠 씀
+#   한도는 차단을 피하기 위한 머신 단위 합계라 프로세스 수에 맞춰 늘리지 않음 (늘리려면 CAFE_RATE_PER_HOST를 직접 조정)
+#   그래서 http 방식에서 프로세스를 늘리면 JSON 파싱 같은 CPU 작업만 빨라지고, 한도에 닿은 뒤로는 처리 속도가 그대로
+#   프로세스 수가 처리 속도를 올리는 건 페이지 렌더링이 병목인 browser 방식 (브라우저 이동은 호스트 한도를 거치지 않음)
+BASIC_INFO_PROCESSES = int(os.environ.get("CAFE_BASIC_INFO_PROCESSES", str(os.cpu_count() or 1)))
+QUEUE_DEPTH_PER_PROCESS = 4 # 프로세스당 미리 넣어둘 id 수
+REPORT_SECONDS = 30
+MAX_PAGES_PER_BROWSER = 100
+INDEX_FLUSH_EVERY = 100 # 완료 색인에 모아서 기록하는 개수 (빠진 기록은 다음 실행에서 다시 수집될 뿐)
+
+
+def basic_info_worker(worker_index, task_queue, result_queue, fetch_mode, max_pages_per_browser, base_url=PLACE_BASE_URL):
+    browser_pool = BrowserPool(size=1, max_pages_per_browser=max_pages_per_browser) # 처음 필요할 때 실행
+    http_session = BasicInfoSession(pool_maxsize=1, base_url=base_url) if fetch_mode == "http" else None
+    processed = 0
+    try:
+        while True:
+            business_id = task_queue.get()
+            if business_id is None:
+                break
+            try:
+                cafe_info = crawl_cafe_basic_info(business_id, browser_pool, http_session)
+            except Exception as e:
+                print(f"[proc-{worker_index}][{business_id}] 처리 중 예외 발생: {e}")
+                cafe_info = None
+            processed += 1
+            result_queue.put(("result", worker_index, business_id, cafe_info))
+    finally:
+        browser_pool.close()
+        if http_session:
+            http_session.close()
+        result_queue.put(("done", worker_index, processed, None))
+
+def format_worker_rates(progress, now):
+    parts = []
+    for worker_index, (count, started_at) in sorted(progress.items()):
+        minutes = max(now - started_at, 1e-9) / 60
+        parts.append(f"proc-{worker_index} {count}개 ({count / minutes:.1f}개/분)")
+    return ", ".join(parts)
+
+def run_basic_info_processes(cafe_ids, processes=BASIC_INFO_PROCESSES, fetch_mode=BASIC_INFO_FETCH_MODE,
+                             output_dir=OUTPUT_DIR, max_pages_per_browser=MAX_PAGES_PER_BROWSER, report_seconds=REPORT_SECONDS, base_url=PLACE_BASE_URL,
+                             index_path=BASIC_INFO_INDEX_PATH):
+    # 완료 색인 한 번 읽기로 거름 (id마다 출력 파일을 stat하지 않음), 완료 기록도 부모만 씀
+    completion_index = open_basic_info_index(index_path, output_dir)
+    pending = pending_basic_info_ids(cafe_ids, completion_index)
+    print(f"기본 정보 수집: 대상 {len(cafe_ids)}개 중 남은 {len(pending)}개, 프로세스 {processes}개 (수집 방식: {fetch_mode})")
+    if fetch_mode == "http":
+        print(f"http 요청은 프로세스 합계 초당 {DEFAULT_RATE}회로 제한됩니다 (CAFE_RATE_PER_HOST). 프로세스는 파싱만 나눠 처리합니다.")
+    if not pending:
+        completion_index.close()
+        return {"saved": 0, "failed": 0}
+
+    # Playwright 드라이버 스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+    context = multiprocessing.get_context("spawn")
+    task_queue = context.Queue(maxsize=processes * QUEUE_DEPTH_PER_PROCESS)
+    result_queue = context.Queue()
+    workers = {
+        worker_index: context.Process(target=basic_info_worker, name=f"basic-info-{worker_index}",
+                                      args=(worker_index, task_queue, result_queue, fetch_mode, max_pages_per_browser, base_url))
+        for worker_index in range(processes)
+    }
+    for worker in workers.values():
+        worker.start()
+
+    stop_feeding = threading.Event()
+
+    # 큐가 차 있으면 기다렸다가 넣음 (백프레셔), 워커가 모두 죽으면 그만 넣음
+    def feed():
+        for item in pending + [None] * processes:
+            while not stop_feeding.is_set():
+                try:
+                    task_queue.put(item, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+
+    feeder = threading.Thread(target=feed, name="basic-info-feeder", daemon=True)
+    feeder.start()
+
+    started_at = time.time()
+    progress = {worker_index: (0, started_at) for worker_index in workers}
+    finished = set()
+    saved = failed = 0
+    last_report = started_at
+    index_rows = []
+    # 부모 프로세스 하나만 파일을 씀
+    while len(finished) < processes:
+        try:
+            kind, worker_index, business_id, cafe_info = result_queue.get(timeout=1)
+        except queue.Empty:
+            for worker_index, worker in workers.items():
+                if worker_index not in finished and not worker.is_alive():
+                    print(f"[proc-{worker_index}] 비정상 종료 (exitcode={worker.exitcode}), 처리 중이던 id는 다음 실행에서 다시 수집")
+                    finished.add(worker_index)
+            if len(finished) == processes:
+                stop_feeding.set()
+            continue
+
+        if kind == "done":
+            finished.add(worker_index)
+            continue
+        count, worker_started_at = progress[worker_index]
+        progress[worker_index] = (count + 1, worker_started_at)
+        saved_size = save_cafe_info_to_json(cafe_info, directory=output_dir) if cafe_info else False
+        if saved_size:
+            index_rows.append((business_id, COMPLETED, saved_size, None))
+            saved += 1
+            print(f"SUCCESS: {business_id}")
+        else:
+            failed += 1
+            print(f"FAILED: {business_id}")
+
+        if len(index_rows) >= INDEX_FLUSH_EVERY:
+            completion_index.record_many("basic_info", index_rows)
+            index_rows = []
+
+        now = time.time()
+        if now - last_report >= report_seconds:
+            last_report = now
+            print(f"진행: {saved + failed}/{len(pending)}개, 전체 {(saved + failed) / ((now - started_at) / 60):.1f}개/분 | {format_worker_rates(progress, now)}")
+
+    completion_index.record_many("basic_info", index_rows)
+    stop_feeding.set()
+    for worker in workers.values():
+        worker.join(timeout=30)
+    elapsed = time.time() - started_at
+    print(f"기본 정보 수집 종료: 저장 {saved}개, 실패 {failed}개, {elapsed:.1f}초, 전체 {(saved + failed) / max(elapsed / 60, 1e-9):.1f}개/분")
+    print(f"프로세스별: {format_worker_rates(progress, time.time())}")
+    completion_index.close()
+    return {"saved": saved, "failed": failed}
+
+# python crawl_basic_info_procs.py [프로세스 수]
+if __name__ == "__main__":
+    process_count = int(sys.argv[1]) if len(sys.argv) > 1 else BASIC_INFO_PROCESSES
+    run_basic_info_processes(load_cafe_ids_from_jsonl("./data/cafe_list.jsonl"), processes=process_count)
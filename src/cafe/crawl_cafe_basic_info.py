@@ -2,9 +2,19 @@ import json
 import os
 import time
 import random
-import re
-from concurrent.futures import ThreadPoolExecutor
 from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from apollo_state import extract_apollo_entries, DETAIL_ENTRY_PREFIXES, DETAIL_ROOT_FIELDS
+from page_load import open_page
+from basic_info_api import BasicInfoSession, HomePageFetchError, home_page_url
+from completion_index import CompletionIndex, basic_info_index_rows, COMPLETED
+
+# http: 홈 페이지 HTML을 HTTP로 받아서 파싱하고, 받은 페이지가 차단 페이지이거나 파싱에 실패할 때만 브라우저 사용
+#   (429/요청 실패는 브라우저로 넘기지 않고 실패로 남김, 다음 실행에서 다시 수집) browser: 항상 브라우저
+BASIC_INFO_FETCH_MODE = os.environ.get("CAFE_BASIC_INFO_FETCH_MODE", "http")
+OUTPUT_DIR = "./data/cafe_info"
+# 수집이 끝난 카페 색인 (카페마다 출력 파일을 stat하지 않음, completion_index.py)
+BASIC_INFO_INDEX_PATH = os.environ.get("CAFE_BASIC_INFO_INDEX", "./data/cafe_info_index.sqlite3")
 
 def process_apollo_item(item_value, cafe_info_ref):
     if not isinstance(item_value, dict) or '__typename' not in item_value:
@@ -69,25 +79,40 @@ def process_apollo_item(item_value, cafe_info_ref):
             # 위 case에 해당하지 않는 나머지 모든 경우 (기본값)
             pass
 
+# 필요한 항목(PlaceDetailBase, Menu, InformationFacilities, ROOT_QUERY의 placeDetail*)만 디코딩 (apollo_state.py)
 def extract_apollo_state(script_content):
-    match = re.search(r"window\.__APOLLO_STATE__\s*=\s*({.*?});", script_content, re.DOTALL)
-    if not match:
-        print("스크립트에서 APOLLO_STATE 패턴을 찾지 못했습니다.")
+    if not script_content:
         return None
-
-    json_string = match.group(1)
-    try:
-        data = json.loads(json_string)
+    data = extract_apollo_entries(script_content, DETAIL_ENTRY_PREFIXES, DETAIL_ROOT_FIELDS)
+    if data is not None:
         print("APOLLO_STATE 파싱 성공!")
-        return data
-    except json.JSONDecodeError as e:
-        print(f"JSON 파싱 오류: {e}")
-        return None
+    return data
+
+# challenge=True: HTTP 응답이 보안 확인 페이지였던 경우. 스크립트를 막으면 통과하지 못하고 APOLLO_STATE를 기다리다 시간 초과
+def read_apollo_state_from_page(page, target_url, challenge=False):
+    if challenge:
+        open_page(page, target_url, "challenge", timeout=30000, ready="networkidle")
+    else:
+        open_page(page, target_url, "detail", timeout=30000)
+    time.sleep(random.uniform(2.0, 6.0)) # 이상 탐지 방지
 
+    js_code = """
+    () => {
+        const scripts = document.querySelectorAll('script');
+        const searchPattern = 'var naver=typeof naver';
+        for (const script of scripts) {
+            if (script.textContent && script.textContent.includes(searchPattern)) {
+                return script.textContent;
+            }
+        }
+        return null;
+    }
+    """
+    script_content = page.evaluate(js_code)
+    return extract_apollo_state(script_content)
 
-def crawl_cafe_basic_info(business_id):
-    target_url = f"https://pcmap.place.naver.com/restaurant/{business_id}/home"
-    cafe_info = {
+def new_cafe_info(business_id):
+    return {
         "id": business_id,
         "name": None,
         "category": None,
@@ -106,45 +131,50 @@ def crawl_cafe_basic_info(business_id):
         "image_url": [],
     }
 
+def read_apollo_state_with_browser(business_id, browser_pool=None, challenge=False):
+    target_url = home_page_url(business_id)
+    if browser_pool:
+        # 풀에서 격리된 컨텍스트만 새로 받음 (브라우저 재사용)
+        with browser_pool.new_page() as page:
+            return read_apollo_state_from_page(page, target_url, challenge)
     with sync_playwright() as p:
-        browser = None
+        browser = p.chromium.launch(headless=True)
         try:
-            browser = p.chromium.launch(headless=True)
             page = browser.new_page()
-            
-            page.goto(target_url, wait_until="networkidle", timeout=30000)
-            time.sleep(random.uniform(2.0, 6.0)) # 이상 탐지 방지
-
-            js_code = """
-            () => {
-                const scripts = document.querySelectorAll('script');
-                const searchPattern = 'var naver=typeof naver';
-                for (const script of scripts) {
-                    if (script.textContent && script.textContent.includes(searchPattern)) {
-                        return script.textContent;
-                    }
-                }
-                return null;
-            }
-            """
-            script_content = page.evaluate(js_code)
-            apollo_state = extract_apollo_state(script_content)
-
-            if(not apollo_state):
-                return None
-
-            for key, value in apollo_state.items():
-                process_apollo_item(value, cafe_info)
-            
-        except Exception as e:
-            print(f"[{business_id}] 크롤링 중 심각한 오류 발생: {e}")
-            cafe_info = None # All or Nothing
+            return read_apollo_state_from_page(page, target_url, challenge)
         finally:
-            if browser and browser.is_connected():
+            if browser.is_connected():
                 browser.close()
+
+# http_session(BasicInfoSession)을 주면 HTTP로 먼저 시도하고, 실패하면 브라우저로 다시 시도
+def crawl_cafe_basic_info(business_id, browser_pool=None, http_session=None):
+    cafe_info = new_cafe_info(business_id)
+
+    try:
+        try:
+            apollo_state = http_session.read_apollo_state(business_id) if http_session else None
+        except HomePageFetchError as e:
+            print(f"[{business_id}] HTTP 수집 실패, 브라우저로 넘기지 않음: {e}")
+            return None
+        if apollo_state is None:
+            if http_session:
+                # HTTP 응답에 APOLLO_STATE가 없음 (대부분 보안 확인 페이지) -> 스크립트를 허용한 브라우저로 재시도
+                print(f"[{business_id}] HTTP 수집 실패, 브라우저로 재시도")
+            apollo_state = read_apollo_state_with_browser(business_id, browser_pool, challenge=http_session is not None)
+
+        if(not apollo_state):
+            return None
+
+        for key, value in apollo_state.items():
+            process_apollo_item(value, cafe_info)
+
+    except Exception as e:
+        print(f"[{business_id}] 크롤링 중 심각한 오류 발생: {e}")
+        cafe_info = None # All or Nothing
     return cafe_info
 
-def save_cafe_info_to_json(cafe_info, directory="./data/cafe_info"):
+# 성공하면 저장한 바이트 수, 실패하면 False
+def save_cafe_info_to_json(cafe_info, directory=OUTPUT_DIR):
     if not cafe_info or not cafe_info.get('id'):
         print("유효하지 않은 카페 정보입니다. 저장하지 않습니다.")
         return False
@@ -159,7 +189,7 @@ def save_cafe_info_to_json(cafe_info, directory="./data/cafe_info"):
         # "w" 모드: 파일이 있으면 덮어쓰고, 없으면 새로 생성
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(cafe_info, f, ensure_ascii=False, indent=2)
-        return True
+            return f.tell()
     except Exception as e:
         print(f"파일 저장 중 오류 발생: {e}")
         return False
@@ -189,20 +219,35 @@ def load_cafe_ids_from_jsonl(filename):
     print(f"총 {len(cafe_ids)}개의 카페 ID를 로드했습니다.")
     return cafe_ids
 
-def process_single_cafe(business_id):
-    output_dir = "./data/cafe_info"
+# 처음 열 때 색인이 비어 있으면 출력 디렉토리를 한 번 훑어서 채움, 이후에는 출력 디렉토리의 세대가 바뀌었을 때만 다시 훑어서 맞춤
+def open_basic_info_index(path=BASIC_INFO_INDEX_PATH, output_dir=OUTPUT_DIR):
+    completion_index = CompletionIndex(path)
+    completion_index.ensure_built("basic_info", lambda: basic_info_index_rows(output_dir), output_dir)
+    return completion_index
+
+# 완료 색인 한 번 읽기로 남은 id만 (100k개도 파일 시스템 조회 없이)
+def pending_basic_info_ids(cafe_ids, completion_index):
+    completed_ids = completion_index.completed_ids("basic_info")
+    return [business_id for business_id in cafe_ids if business_id not in completed_ids]
+
+# completion_index를 주면 호출한 쪽에서 pending_basic_info_ids로 이미 거른 것으로 보고 파일을 확인하지 않음
+def process_single_cafe(business_id, browser_pool=None, http_session=None, completion_index=None):
+    output_dir = OUTPUT_DIR
     output_file = f"{output_dir}/{business_id}_info.json"
     
     try:
         # 0 바이트 쓰레기 파일도 크롤링 하기 위함
-        if os.path.exists(output_file) and os.path.getsize(output_file) > 100:
+        if completion_index is None and os.path.exists(output_file) and os.path.getsize(output_file) > 100:
             # print(f"SKIPPED: {business_id}")
             return
             
-        basic_info = crawl_cafe_basic_info(business_id)
+        basic_info = crawl_cafe_basic_info(business_id, browser_pool, http_session)
         
         if basic_info:
-            if save_cafe_info_to_json(basic_info, directory=output_dir):
+            saved_size = save_cafe_info_to_json(basic_info, directory=output_dir)
+            if saved_size:
+                if completion_index is not None:
+                    completion_index.record("basic_info", business_id, COMPLETED, saved_size)
                 print(f"SUCCESS: {business_id}")
             else:
                 print(f"FAILED: {business_id}")
@@ -214,17 +259,26 @@ def process_single_cafe(business_id):
 
 if __name__ == "__main__":
     MAX_THREADS = 5
+    MAX_PAGES_PER_BROWSER = 100 # 브라우저 하나당 처리할 카페 수 (이후 재시작)
     CAFE_LIST_FILE = "./data/cafe_list.jsonl"
     
-    cafe_ids_to_process = load_cafe_ids_from_jsonl(CAFE_LIST_FILE)
+    completion_index = open_basic_info_index()
+    cafe_ids = load_cafe_ids_from_jsonl(CAFE_LIST_FILE)
+    cafe_ids_to_process = pending_basic_info_ids(cafe_ids, completion_index)
+    print(f"완료 색인 기준 {len(cafe_ids) - len(cafe_ids_to_process)}개는 이미 수집됨")
     
     if not cafe_ids_to_process:
         print("수집할 카페 ID가 없습니다. 프로그램을 종료합니다.")
     else:
         print(f"총 {len(cafe_ids_to_process)}개 ID 로드. {MAX_THREADS}개 스레드로 작업 시작...")
-        with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            # iterable 데이터를 받아서 내부적으로 순회
-            # 각 경쟁은 원자적으로 이뤄짐
-            results = executor.map(process_single_cafe, cafe_ids_to_process)
-                        
+        # 스레드마다 브라우저 하나를 계속 재사용 (카페마다 새 컨텍스트만 생성)
+        # 브라우저는 처음 필요할 때 실행되므로 HTTP로 모두 성공하면 브라우저를 띄우지 않음
+        browser_pool = BrowserPool(size=MAX_THREADS, max_pages_per_browser=MAX_PAGES_PER_BROWSER)
+        http_session = BasicInfoSession(pool_maxsize=MAX_THREADS) if BASIC_INFO_FETCH_MODE == "http" else None
+        browser_pool.map(lambda business_id: process_single_cafe(business_id, browser_pool, http_session, completion_index), cafe_ids_to_process)
+
+        if http_session:
+            print(f"HTTP 수집 {http_session.stats['http']}개, 실패 {http_session.stats['failed']}개, 차단 페이지 {http_session.stats['challenge']}개, "
+                  f"429 {http_session.stats['throttled']}회 (차단/파싱 실패만 브라우저로 재시도)")
+            http_session.close()
         print("--- 모든 작업 완료 ---")
\ No newline at end of file
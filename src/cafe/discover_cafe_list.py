@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+from browser_pool import BrowserPool
+from crawl_all_cafe_list import extract_cafe_list
+from list_api import CafeListSession, fetch_cafe_list_graphql
+
+# 여러 검색어/지역 타일로 카페 목록 수집
+#   - 대상(검색어 또는 검색어+좌표 타일)마다 브라우저 풀의 스레드 하나가 페이지를 넘기며 수집
+#   - 겹치는 검색 결과에 같은 카페가 나오므로 id 기준으로 중복을 빼고 cafe_list.jsonl에 추가
+#   - 대상별로 저장한 마지막 페이지를 체크포인트에 남겨서 중단 후 다시 실행하면 끝난 대상은 건너뛰고 나머지는 이어서 수집
+LIST_BASE_URL = "https://pcmap.place.naver.com/restaurant/list"
+DISCOVERY_THREADS = int(os.environ.get("CAFE_DISCOVERY_THREADS", "4"))
+# click: 페이지 버튼 클릭, graphql: 첫 페이지만 브라우저로 열고 나머지는 GraphQL 직접 요청 (list_api.py)
+LIST_FETCH_MODE = os.environ.get("CAFE_LIST_FETCH_MODE", "click")
+DISCOVERY_TARGETS_FILE = "./data/discovery_targets.txt"
+DISCOVERY_CHECKPOINT_FILE = "./data/discovery_checkpoint.jsonl"
+CAFE_LIST_FILE = "./data/cafe_list.jsonl"
+
+
+# 대상: {"query": "성수 카페"} 또는 타일 {"query": "카페", "x": 경도, "y": 위도, "bounds": "서;남;동;북"}
+def build_list_url(target):
+    params = {"query": target["query"]}
+    for key in ("x", "y", "bounds"):
+        if target.get(key) is not None:
+            params[key] = target[key]
+    return f"{LIST_BASE_URL}?{urlencode(params)}"
+
+# 영역(서, 남, 동, 북)을 rows x cols 타일로 나눠 같은 검색어를 타일마다 검색 (검색 결과 개수 제한을 넘는 지역용)
+def grid_tiles(query, west, south, east, north, rows, cols):
+    tiles = []
+    width = (east - west) / cols
+    height = (north - south) / rows
+    for row in range(rows):
+        for col in range(cols):
+            tile_west, tile_south = west + col * width, south + row * height
+            tile_east, tile_north = tile_west + width, tile_south + height
+            tiles.append({
+                "query": query,
+                "x": round((tile_west + tile_east) / 2, 6),
+                "y": round((tile_south + tile_north) / 2, 6),
+                "bounds": f"{tile_west:.6f};{tile_south:.6f};{tile_east:.6f};{tile_north:.6f}",
+            })
+    return tiles
+
+# 한 줄에 검색어 하나 또는 JSON 대상 하나, 타일 생성은 {"query": ..., "grid": [서, 남, 동, 북, rows, cols]}
+def load_discovery_targets(filename):
+    targets = []
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if not line.startswith("{"):
+                targets.append({"query": line})
+                continue
+            target = json.loads(line)
+            if "grid" in target:
+                targets.extend(grid_tiles(target["query"], *target["grid"]))
+            else:
+                targets.append(target)
+    return targets
+
+
+# 대상 URL별 마지막으로 저장한 페이지와 완료 여부 (추가 기록만 하고 읽을 때 마지막 값 사용)
+class DiscoveryCheckpoint:
+    def __init__(self, path):
+        self.path = path
+        self.progress = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # 쓰다 만 마지막 줄
+                    self.progress[entry["target"]] = entry
+
+    def is_done(self, key):
+        return self.progress.get(key, {}).get("done", False)
+
+    def last_page(self, key):
+        return self.progress.get(key, {}).get("page", 0)
+
+    def record(self, key, page, done=False, found=0):
+        entry = {"target": key, "page": page, "done": done, "found": found, "at": time.time()}
+        with self._lock:
+            self.progress[key] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+# 기존 목록의 id를 읽어두고 처음 보는 카페만 추가 (여러 스레드가 같이 사용)
+class CafeListWriter:
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.seen_ids = set()
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.seen_ids.add(json.loads(line)["id"])
+                    except (json.JSONDecodeError, KeyError):
+                        continue
+
+    # 새로 추가한 개수 반환. 체크포인트보다 먼저 디스크에 남도록 flush + fsync
+    def add(self, cafes):
+        with self._lock:
+            new_cafes = []
+            for cafe in cafes:
+                if not cafe.get("id") or cafe["id"] in self.seen_ids:
+                    self.duplicates += 1
+                    continue
+                self.seen_ids.add(cafe["id"])
+                new_cafes.append(cafe)
+            if new_cafes:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for cafe in new_cafes:
+                        f.write(json.dumps(cafe, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            return len(new_cafes)
+
+
+def discover_target(target, browser_pool, writer, checkpoint, list_session=None):
+    key = build_list_url(target)
+    label = target["query"] if "bounds" not in target else f"{target['query']} @ {target['x']},{target['y']}"
+    if checkpoint.is_done(key):
+        print(f"[{label}] 스킵: 이미 수집 완료")
+        return
+    start_page = checkpoint.last_page(key) + 1
+    if start_page > 1:
+        print(f"[{label}] {start_page}페이지부터 이어서 수집")
+
+    found = {"count": 0}
+    def on_page(page_num, page_cafes):
+        added = writer.add(page_cafes)
+        found["count"] += len(page_cafes)
+        checkpoint.record(key, page_num, found=len(page_cafes))
+        print(f"[{label}] {page_num}페이지: {len(page_cafes)}개 중 새 카페 {added}개")
+
+    if list_session is not None:
+        finished = fetch_cafe_list_graphql(key, target, list_session, on_page, start_page)
+    else:
+        _, finished = extract_cafe_list(key, browser_pool, on_page, start_page)
+    if finished:
+        checkpoint.record(key, checkpoint.last_page(key), done=True, found=found["count"])
+        print(f"[{label}] 수집 완료")
+    else:
+        print(f"[{label}] 중간에 멈춤 ({checkpoint.last_page(key)}페이지까지 저장), 다시 실행하면 이어서 수집")
+
+def discover_cafe_list(targets, browser_pool=None, list_file=CAFE_LIST_FILE, checkpoint_file=DISCOVERY_CHECKPOINT_FILE, threads=DISCOVERY_THREADS, mode=LIST_FETCH_MODE, list_session=None):
+    browser_pool = browser_pool or BrowserPool(size=threads)
+    if mode == "graphql":
+        list_session = list_session or CafeListSession(browser_pool)
+    writer = CafeListWriter(list_file)
+    checkpoint = DiscoveryCheckpoint(checkpoint_file)
+    known_count = len(writer.seen_ids)
+    started_at = time.time()
+
+    print(f"목록 수집 방식: {mode}, 대상 {len(targets)}개, 남은 대상 {sum(1 for t in targets if not checkpoint.is_done(build_list_url(t)))}개, 기존 카페 {known_count}개")
+    browser_pool.map(lambda target: discover_target(target, browser_pool, writer, checkpoint, list_session), targets)
+
+    done_count = sum(1 for t in targets if checkpoint.is_done(build_list_url(t)))
+    print(f"수집 종료: 새 카페 {len(writer.seen_ids) - known_count}개 (중복 {writer.duplicates}개 제외), 완료 대상 {done_count}/{len(targets)}개, {time.time() - started_at:.1f}초")
+    return writer
+
+# python discover_cafe_list.py [대상 파일]
+if __name__ == "__main__":
+    targets_file = sys.argv[1] if len(sys.argv) > 1 else DISCOVERY_TARGETS_FILE
+    discover_cafe_list(load_discovery_targets(targets_file))
@@ -0,0 +1,200 @@
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+from storage_config import EFS_BASE_PATH, open_configured_review_store
+from crawl_cafe_basic_info import new_cafe_info
+from review_api import DEFAULT_QUERY_PROFILE, review_record_fields
+from review_store import read_checkpoint, write_checkpoint
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# 수집 결과(리뷰 JSONL/세그먼트, 카페 정보 JSON)를 분석용 컬럼 포맷(Parquet 또는 Arrow IPC)으로 압축
+# 증분 방식: 이전 실행 이후 새로 완료된 카페와, 갱신으로 리뷰가 늘어난 카페의 늘어난 리뷰만 새 part 파일로 추가
+#   export_state.json의 reviews: {cafe_id: 내보낸 리뷰 수} (저장소는 이어쓰기만 하므로 앞에서부터 그 수만큼은 이미 내보낸 리뷰)
+#   python export.py [parquet|arrow]
+EXPORT_DIR = f"{EFS_BASE_PATH}/data/export"
+CAFE_INFO_DIR = "./data/cafe_info"
+BATCH_SIZE = 50000 # 한 번에 메모리에 올리는 행 수
+
+# 지정하지 않은 컬럼은 문자열 (리스트/딕셔너리 값은 JSON 문자열로 저장)
+REVIEW_COLUMN_TYPES = {
+    "visit_count": "int64",
+    "view_count": "int64",
+    "author_review_count": "int64",
+    "reaction_count": "int64",
+    "rating": "float64",
+    "tags": "list<string>",
+}
+
+
+def _arrow_type(type_name):
+    if type_name == "int64":
+        return pa.int64()
+    if type_name == "float64":
+        return pa.float64()
+    if type_name == "list<string>":
+        return pa.list_(pa.string())
+    return pa.string()
+
+# 스키마는 쿼리 프로필의 레코드 필드와 cafe_info 기본 키에서 파생
+def review_schema(profile=DEFAULT_QUERY_PROFILE):
+    fields = [pa.field("cafe_id", pa.string())]
+    for name in review_record_fields(profile):
+        fields.append(pa.field(name, _arrow_type(REVIEW_COLUMN_TYPES.get(name))))
+    return pa.schema(fields)
+
+def cafe_info_schema():
+    return pa.schema([pa.field(name, pa.string()) for name in new_cafe_info(None)])
+
+def _coerce(value, arrow_type):
+    if value is None:
+        return None
+    try:
+        if pa.types.is_int64(arrow_type):
+            return int(value)
+        if pa.types.is_float64(arrow_type):
+            return float(value)
+        if pa.types.is_list(arrow_type):
+            return [str(v) for v in value] if isinstance(value, list) else None
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+# Parquet/Arrow IPC 공통으로 batch_size 행씩 잘라서 기록 (메모리 사용량 고정)
+# 임시 파일에 쓰고 닫은 뒤 rename 하므로 중간에 죽어도 깨진 part 파일이 보이지 않음
+class ColumnarPartWriter:
+    def __init__(self, path, schema, fmt, batch_size=BATCH_SIZE):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.schema = schema
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.rows = 0
+        self._columns = {name: [] for name in schema.names}
+        self._pending = 0
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(self.tmp_path, schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(self.tmp_path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def append(self, row):
+        for field in self.schema:
+            self._columns[field.name].append(_coerce(row.get(field.name), field.type))
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        batch = pa.record_batch([pa.array(self._columns[field.name], type=field.type) for field in self.schema], schema=self.schema)
+        if self.fmt == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+        self.rows += self._pending
+        self._columns = {name: [] for name in self.schema.names}
+        self._pending = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        if self.fmt != "parquet":
+            self._sink.close()
+        if self.rows:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+
+
+def _part_path(export_dir, table, fmt):
+    extension = "parquet" if fmt == "parquet" else "arrow"
+    return f"{export_dir}/{table}/part-{time.time_ns()}.{extension}"
+
+# exported_counts: {cafe_id: 내보낸 리뷰 수}. 이번에 내보낸 카페의 {cafe_id: 리뷰 수}와 행 수 반환
+def export_reviews(review_store, exported_counts, export_dir, fmt, profile=DEFAULT_QUERY_PROFILE):
+    changed = {}
+    for cafe_id in sorted(review_store.completed_cafe_ids()):
+        count = review_store.review_count(cafe_id)
+        if count > exported_counts.get(cafe_id, 0):
+            changed[cafe_id] = count
+    if not changed:
+        print("[reviews] 새로 완료되거나 리뷰가 늘어난 카페 없음")
+        return {}, 0
+
+    writer = ColumnarPartWriter(_part_path(export_dir, "reviews", fmt), review_schema(profile), fmt)
+    start = time.perf_counter()
+    for cafe_id, count in changed.items():
+        # 읽는 중에 갱신이 이어써도 이번에 센 수까지만 (나머지는 다음 실행에서)
+        for record in itertools.islice(review_store.iter_cafe_reviews(cafe_id), exported_counts.get(cafe_id, 0), count):
+            writer.append(dict(record, cafe_id=cafe_id))
+    writer.close()
+    elapsed = time.perf_counter() - start
+    updated = sum(1 for cafe_id in changed if cafe_id in exported_counts)
+    print(f"[reviews] 카페 {len(changed)}개 (갱신 {updated}개), {writer.rows}행 기록 ({writer.rows / max(elapsed, 1e-9):,.0f}행/초) -> {writer.path}")
+    return changed, writer.rows
+
+def export_cafe_info(exported_ids, export_dir, fmt, info_dir=CAFE_INFO_DIR):
+    new_files = []
+    for path in glob.glob(f"{info_dir}/*_info.json"):
+        cafe_id = os.path.basename(path)[:-len("_info.json")]
+        if cafe_id not in exported_ids:
+            new_files.append((cafe_id, path))
+    if not new_files:
+        print("[cafe_info] 새 카페 정보 없음")
+        return [], 0
+
+    writer = ColumnarPartWriter(_part_path(export_dir, "cafe_info", fmt), cafe_info_schema(), fmt)
+    start = time.perf_counter()
+    exported = []
+    for cafe_id, path in sorted(new_files):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cafe_info = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[{cafe_id}] 카페 정보 읽기 오류, 건너뜀: {e}")
+            continue
+        writer.append(cafe_info)
+        exported.append(cafe_id)
+    writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"[cafe_info] {writer.rows}행 기록 ({writer.rows / max(elapsed, 1e-9):,.0f}행/초) -> {writer.path}")
+    return exported, writer.rows
+
+def run_export(fmt="parquet", export_dir=EXPORT_DIR, review_store=None, info_dir=CAFE_INFO_DIR):
+    if pa is None:
+        raise RuntimeError("컬럼 포맷 내보내기에는 pyarrow가 필요합니다. (pip install pyarrow)")
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"지원하지 않는 포맷: {fmt}")
+
+    state_file = f"{export_dir}/export_state.json"
+    state = read_checkpoint(state_file) or {"reviews": {}, "cafe_info": []}
+    review_store = review_store or open_configured_review_store()
+
+    # part 파일이 rename 된 뒤에만 상태를 갱신 (중간에 죽으면 다음 실행에서 다시 내보냄)
+    review_counts, review_rows = export_reviews(review_store, state["reviews"], export_dir, fmt)
+    state["reviews"] = dict(state["reviews"], **review_counts)
+    write_checkpoint(state_file, state)
+
+    info_ids, info_rows = export_cafe_info(set(state["cafe_info"]), export_dir, fmt, info_dir)
+    state["cafe_info"] = state["cafe_info"] + info_ids
+    write_checkpoint(state_file, state)
+    return review_rows, info_rows
+
+if __name__ == "__main__":
+    run_export(sys.argv[1] if len(sys.argv) > 1 else "parquet")
@@ -0,0 +1,336 @@
+import fcntl
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+# 카페 작업 락을 임대(lease)로 관리: acquire -> renew(하트비트) -> release
+# 임대마다 키별로 단조 증가하는 펜싱 토큰을 발급. 만료된 임대는 다음 acquire가 바로 가져가고 토큰이 올라가므로
+# 예전 소유자는 renew/validate에서 LeaseLostError로 밀려남
+#   sqlite : 한 머신 안의 여러 프로세스용 (로컬 디스크 전용, NFS/EFS 위에서는 쓰지 말 것)
+#   file   : EFS 공유 디렉토리용. 상태 파일은 rename으로 교체, 토큰 선점은 O_EXCL claim 파일로 한 워커만 성공
+LEASE_TTL_SECONDS = 300 # 갱신 없이 이 시간이 지나면 다른 워커가 가져갈 수 있음
+LEASE_RENEW_SECONDS = 60 # 하트비트 주기
+CLAIM_STALE_SECONDS = 30 # claim 파일만 만들고 상태 파일을 못 쓴 채 죽은 워커로 보는 시간
+LOCK_STRIPES = 256 # 파일 백엔드의 키 락 파일 수 (키를 해시해서 나눠 씀, 카페마다 락 파일을 만들지 않음)
+# lockf는 프로세스 단위라 같은 프로세스의 스레드(매니저 여러 개 포함)끼리는 이 스레드 락으로 막음
+_STRIPE_THREAD_LOCKS = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+class LeaseLostError(Exception):
+    pass
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class Lease:
+    def __init__(self, key, owner, token, expires_at):
+        self.key = key
+        self.owner = owner
+        self.token = token # 펜싱 토큰
+        self.expires_at = expires_at
+        self.lost = False # 하트비트가 임대를 잃으면 True (저장 전에 확인)
+
+    def __repr__(self):
+        return f"Lease({self.key!r}, token={self.token}, owner={self.owner!r})"
+
+
+# acquire 지연 시간 기록 (백엔드 공통)
+class _AcquireStats:
+    def _init_stats(self):
+        self._latencies = []
+        self._stats_lock = threading.Lock()
+
+    def _record_acquire(self, started_at):
+        with self._stats_lock:
+            self._latencies.append(time.perf_counter() - started_at)
+
+    def acquire_stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "avg_ms": sum(latencies) / len(latencies) * 1000,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+
+
+class SqliteLeaseManager(_AcquireStats):
+    def __init__(self, path, ttl=LEASE_TTL_SECONDS):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self._init_stats()
+        self._lock = threading.Lock()
+        # 트랜잭션이 짧아서 기본 저널(DELETE)로 충분. 여러 프로세스가 동시에 열 때 WAL 전환 경합도 피함
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        # 해제해도 행을 지우지 않고 owner만 비움 (토큰이 계속 증가하도록)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, token INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def acquire(self, key, owner=None):
+        started_at = time.perf_counter()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT owner, token, expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+                now = time.time()
+                if row and row[0] is not None and row[2] > now:
+                    self._conn.execute("ROLLBACK")
+                    self._record_acquire(started_at)
+                    return None
+                lease = Lease(key, owner or default_owner(), (row[1] if row else 0) + 1, now + self.ttl)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO leases (key, owner, token, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, lease.owner, lease.token, lease.expires_at),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._record_acquire(started_at)
+        return lease
+
+    def renew(self, lease):
+        now = time.time()
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE key = ? AND token = ? AND owner IS NOT NULL AND expires_at > ?",
+                (now + self.ttl, lease.key, lease.token, now),
+            ).rowcount
+        if not updated:
+            lease.lost = True
+            raise LeaseLostError(f"{lease.key}: 임대를 잃었습니다 (token {lease.token})")
+        lease.expires_at = now + self.ttl
+
+    def validate(self, lease):
+        with self._lock:
+            row = self._conn.execute("SELECT owner, token, expires_at FROM leases WHERE key = ?", (lease.key,)).fetchone()
+        if not row or row[0] is None or row[1] != lease.token or row[2] <= time.time():
+            lease.lost = True
+            raise LeaseLostError(f"{lease.key}: 임대를 잃었습니다 (token {lease.token})")
+
+    def release(self, lease):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE leases SET owner = NULL, expires_at = 0 WHERE key = ? AND token = ?", (lease.key, lease.token),
+            )
+
+    # 현재 유효한 임대의 키 집합 (프로듀서가 작업 중인 카페를 거를 때)
+    def held_keys(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT key FROM leases WHERE owner IS NOT NULL AND expires_at > ?", (time.time(),)).fetchall()
+        return {row[0] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# EFS 호환 백엔드
+#   {key}.lease         : {owner, token, expires_at} (임시 파일에 쓰고 rename)
+#   {key}.{token}.claim : 토큰 선점 표시. O_EXCL 생성에 성공한 워커만 그 토큰의 임대를 가짐 (해제하면 삭제)
+#   .lock-{n}           : 키 락. acquire/renew/release의 읽기-확인-쓰기를 같은 락 안에서 해서
+#                         갱신이 확인한 뒤 쓰기 전에 다른 워커가 가져가는 경우를 막음 (POSIX 바이트 범위 락, EFS/NFSv4 지원)
+# 만료된 임대를 지우고 다시 만드는 대신 다음 토큰을 선점하므로, 동시에 가져가려는 워커 중 정확히 하나만 성공
+class FileLeaseManager(_AcquireStats):
+    def __init__(self, lease_dir, ttl=LEASE_TTL_SECONDS):
+        if not os.path.exists(lease_dir):
+            os.makedirs(lease_dir, exist_ok=True)
+        self.lease_dir = lease_dir
+        self.ttl = ttl
+        self._init_stats()
+
+    @contextmanager
+    def _key_lock(self, key):
+        stripe = zlib.crc32(key.encode("utf-8")) % LOCK_STRIPES
+        with _STRIPE_THREAD_LOCKS[stripe]:
+            with open(f"{self.lease_dir}/.lock-{stripe}", "a") as f:
+                fcntl.lockf(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.lockf(f, fcntl.LOCK_UN)
+
+    def _lease_path(self, key):
+        return f"{self.lease_dir}/{key}.lease"
+
+    def _claim_path(self, key, token):
+        return f"{self.lease_dir}/{key}.{token}.claim"
+
+    def _read(self, key):
+        try:
+            with open(self._lease_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"owner": None, "token": 0, "expires_at": 0}
+
+    def _write(self, key, state):
+        tmp_path = f"{self._lease_path(key)}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._lease_path(key))
+
+    def _is_held(self, state, now):
+        return state["owner"] is not None and state["expires_at"] > now
+
+    def acquire(self, key, owner=None):
+        started_at = time.perf_counter()
+        try:
+            with self._key_lock(key):
+                return self._acquire(key, owner or default_owner())
+        finally:
+            self._record_acquire(started_at)
+
+    def _acquire(self, key, owner):
+        state = self._read(key)
+        now = time.time()
+        if self._is_held(state, now):
+            return None
+
+        token = state["token"] + 1
+        while True:
+            try:
+                fd = os.open(self._claim_path(key, token), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, owner.encode())
+                os.close(fd)
+                break
+            except FileExistsError:
+                # 다른 워커가 먼저 선점. 선점만 하고 죽은 경우(오래된 claim)에만 다음 토큰으로 넘어감
+                try:
+                    claim_age = time.time() - os.path.getmtime(self._claim_path(key, token))
+                except FileNotFoundError:
+                    return None
+                if claim_age < CLAIM_STALE_SECONDS or self._read(key)["token"] >= token:
+                    return None
+                token += 1
+
+        # 선점 사이에 더 새로운 임대가 기록됐으면 양보
+        current = self._read(key)
+        if current["token"] >= token or (current["token"] != state["token"] and self._is_held(current, time.time())):
+            self._remove_claim(key, token)
+            return None
+
+        lease = Lease(key, owner, token, time.time() + self.ttl)
+        self._write(key, {"owner": owner, "token": token, "expires_at": lease.expires_at})
+        for old_token in range(state["token"], token):
+            self._remove_claim(key, old_token)
+        return lease
+
+    def _remove_claim(self, key, token):
+        try:
+            os.remove(self._claim_path(key, token))
+        except FileNotFoundError:
+            pass
+
+    def _check(self, lease, now):
+        state = self._read(lease.key)
+        # 다음 토큰이 선점됐다면 이미 다른 워커가 가져가는 중
+        if state["token"] != lease.token or not self._is_held(state, now) or os.path.exists(self._claim_path(lease.key, lease.token + 1)):
+            lease.lost = True
+            raise LeaseLostError(f"{lease.key}: 임대를 잃었습니다 (token {lease.token})")
+
+    # 확인과 다시 쓰기를 acquire와 같은 키 락 안에서 (확인 뒤에 가져간 임대를 덮어쓰지 않도록)
+    def renew(self, lease):
+        with self._key_lock(lease.key):
+            now = time.time()
+            self._check(lease, now)
+            lease.expires_at = now + self.ttl
+            self._write(lease.key, {"owner": lease.owner, "token": lease.token, "expires_at": lease.expires_at})
+
+    def validate(self, lease):
+        self._check(lease, time.time())
+
+    def release(self, lease):
+        with self._key_lock(lease.key):
+            state = self._read(lease.key)
+            if state["token"] == lease.token:
+                self._write(lease.key, {"owner": None, "token": lease.token, "expires_at": 0})
+                self._remove_claim(lease.key, lease.token)
+
+    # claim 파일은 임대 중에만 남아 있으므로 디렉토리 목록 한 번으로 작업 중인 키를 알 수 있음
+    # (해제 없이 죽은 워커의 키도 포함되지만, 그 카페의 메시지는 아직 큐에 남아 있음)
+    def held_keys(self):
+        return {name[:-len(".claim")].rsplit(".", 1)[0] for name in os.listdir(self.lease_dir) if name.endswith(".claim")}
+
+    def close(self):
+        pass
+
+
+def open_lease_manager(kind, lease_dir, sqlite_path, ttl=LEASE_TTL_SECONDS):
+    if kind == "file":
+        return FileLeaseManager(lease_dir, ttl)
+    if kind == "sqlite":
+        return SqliteLeaseManager(sqlite_path, ttl)
+    raise ValueError(f"지원하지 않는 임대 백엔드: {kind}")
+
+
+# 작업하는 동안 주기적으로 renew. 임대를 잃으면 lease.lost를 세우고 멈춤
+class LeaseHeartbeat:
+    def __init__(self, manager, lease, interval=LEASE_RENEW_SECONDS):
+        self.manager = manager
+        self.lease = lease
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.manager.renew(self.lease)
+            except LeaseLostError as e:
+                print(f"[{self.lease.key}] 경고: {e}")
+                return
+            except sqlite3.Error as e:
+                # SQLite 백엔드 오류(잠김 시간 초과/연결 종료 등): 갱신됐는지 알 수 없으므로 잃은 것으로 보고 저장을 멈춤
+                self.lease.lost = True
+                print(f"[{self.lease.key}] 임대 갱신 오류, 임대를 잃은 것으로 처리: {e}")
+                return
+            except OSError as e:
+                # EFS 일시 오류는 다음 주기에 다시 시도 (TTL 안에 성공하면 유지)
+                print(f"[{self.lease.key}] 임대 갱신 오류: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+# 백엔드별 acquire 지연 시간 측정
+#   python lease.py [키 개수] [작업 디렉토리]   (EFS에서 측정하려면 작업 디렉토리를 EFS 경로로 지정)
+if __name__ == "__main__":
+    key_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    work_dir = tempfile.mkdtemp(dir=sys.argv[2] if len(sys.argv) > 2 else None)
+    try:
+        for kind in ("file", "sqlite"):
+            manager = open_lease_manager(kind, f"{work_dir}/leases", f"{work_dir}/leases.sqlite3")
+            leases = [manager.acquire(str(key)) for key in range(key_count)]
+            contended = [manager.acquire(str(key)) for key in range(key_count)]
+            for lease in leases:
+                manager.release(lease)
+            stats = manager.acquire_stats()
+            manager.close()
+            print(f"[{kind}] acquire {stats['count']}회 (중복 획득 {sum(lease is not None for lease in contended)}회) | "
+                  f"평균 {stats['avg_ms']:.2f}ms, p50 {stats['p50_ms']:.2f}ms, p95 {stats['p95_ms']:.2f}ms, 최대 {stats['max_ms']:.2f}ms")
+    finally:
+        shutil.rmtree(work_dir)
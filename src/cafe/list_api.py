@@ -0,0 +1,186 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from playwright.sync_api import sync_playwright
+from browser_pool import DEFAULT_USER_AGENT
+from page_load import open_page
+from crawl_all_cafe_list import NAVER_SCRIPT_JS, extract_list_apollo_state, parse_apollo_cafes, parse_graphql_data
+from rate_limit import HostRateLimiter, host_of
+from review_api import API_URL, PLACE_BASE_URL, parse_retry_after
+
+# 카페 목록을 페이지 버튼 클릭 대신 restaurants GraphQL 요청을 직접 보내서 수집
+#   - 브라우저는 첫 페이지(__APOLLO_STATE__에 들어 있는 1페이지 결과와 전체 개수)와 쿠키를 얻는 데만 사용
+#   - 나머지 페이지는 start/display 변수만 바꿔 HTTP 세션으로 요청, 머신 공유 토큰 버킷 아래에서 여러 페이지를 동시에 요청
+#   - 페이지 크기는 첫 페이지 개수를 그대로 써서 페이지 번호가 버튼 클릭 방식과 같음 (체크포인트 호환)
+LIST_PAGE_SIZE = 50
+LIST_PARALLEL_PAGES = int(os.environ.get("CAFE_LIST_PARALLEL_PAGES", "4"))
+LIST_PAGE_RETRIES = 3
+
+# 목록 화면이 페이지를 넘길 때 보내는 요청에서 저장에 필요한 필드만 남김
+RESTAURANT_LIST_QUERY = """query getRestaurants($restaurantListInput: RestaurantListInput) {
+    restaurants: restaurantList(input: $restaurantListInput) {
+        items {
+        id
+        name
+        category
+        }
+        total
+    }
+    }"""
+
+
+def build_list_headers(referer, base_url=PLACE_BASE_URL):
+    return {
+        "Accept": "*/*",
+        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Origin": base_url,
+        "Referer": referer,
+    }
+
+# target: {"query": ...} 또는 타일 {"query", "x", "y", "bounds"} (discover_cafe_list의 대상 형식)
+def build_list_payload(target, page, size=LIST_PAGE_SIZE):
+    list_input = {
+        "query": target["query"],
+        "start": (page - 1) * size + 1,
+        "display": size,
+        "deviceType": "pcmap",
+        "isPcmap": True,
+    }
+    for key in ("x", "y", "bounds"):
+        if target.get(key) is not None:
+            list_input[key] = str(target[key])
+    return [
+        {
+            "operationName": "getRestaurants",
+            "variables": {"restaurantListInput": list_input},
+            "query": RESTAURANT_LIST_QUERY,
+        }
+    ]
+
+# 첫 페이지 APOLLO_STATE의 ROOT_QUERY에서 검색 결과 전체 개수 (없으면 None)
+def apollo_list_total(apollo_state):
+    for key, value in apollo_state.get("ROOT_QUERY", {}).items():
+        if key.startswith("restaurantList") and isinstance(value, dict) and value.get("total") is not None:
+            return int(value["total"])
+    return None
+
+
+# ReviewSession과 같은 구조: 브라우저는 첫 페이지에만, 이후는 keep-alive HTTP 세션 (여러 스레드가 같이 사용)
+class CafeListSession:
+    def __init__(self, browser_pool=None, pool_maxsize=LIST_PARALLEL_PAGES * 2,
+                 api_url=API_URL, base_url=PLACE_BASE_URL, user_agent=DEFAULT_USER_AGENT, rate_limiter=None):
+        self.browser_pool = browser_pool
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.api_host = host_of(api_url)
+        self.api_url = api_url
+        self.base_url = base_url
+        self.user_agent = user_agent
+        self._cookie_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": user_agent})
+
+    def _read_first_page(self, page, url):
+        open_page(page, url, "list", timeout=10000, ready="networkidle") # 스크립트가 주는 쿠키까지 받음
+        script_content = page.evaluate(NAVER_SCRIPT_JS)
+        return script_content, page.context.cookies()
+
+    # 목록 URL을 브라우저로 한 번 열어서 (1페이지 카페, 전체 개수) 반환하고 쿠키는 HTTP 세션에 옮김
+    def open_list(self, url):
+        if self.browser_pool:
+            with self.browser_pool.new_page() as page:
+                script_content, cookies = self._read_first_page(page, url)
+        else:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True)
+                try:
+                    page = browser.new_context(user_agent=self.user_agent).new_page()
+                    script_content, cookies = self._read_first_page(page, url)
+                finally:
+                    browser.close()
+
+        with self._cookie_lock:
+            for cookie in cookies:
+                self.session.cookies.set(
+                    cookie["name"], cookie["value"],
+                    domain=cookie.get("domain"), path=cookie.get("path", "/"),
+                )
+
+        if not script_content:
+            print("'var naver'을 가진 스크립트를 찾을 수 없습니다.")
+            return [], None
+        apollo_state = extract_list_apollo_state(script_content)
+        if apollo_state is None:
+            return [], None
+        cafes = []
+        parse_apollo_cafes(apollo_state, cafes)
+        return cafes, apollo_list_total(apollo_state)
+
+    # 페이지 하나 요청. 실패하면 None (429는 토큰 버킷에 알려서 머신 전체가 같이 멈춤)
+    def fetch_page(self, target, page_num, size, referer):
+        for attempt in range(LIST_PAGE_RETRIES):
+            self.rate_limiter.acquire(self.api_host)
+            try:
+                response = self.session.post(
+                    self.api_url, json=build_list_payload(target, page_num, size),
+                    headers=build_list_headers(referer, self.base_url), timeout=10,
+                )
+            except requests.exceptions.RequestException as e:
+                print(f"{page_num}페이지 요청 오류 (시도 {attempt + 1}/{LIST_PAGE_RETRIES}): {e}")
+                time.sleep(2 ** attempt)
+                continue
+            if response.status_code == 429:
+                self.rate_limiter.on_throttle(self.api_host, parse_retry_after(response.headers.get("Retry-After")))
+                continue
+            if response.status_code != 200:
+                print(f"{page_num}페이지 응답 오류: {response.status_code} (시도 {attempt + 1}/{LIST_PAGE_RETRIES})")
+                time.sleep(2 ** attempt)
+                continue
+            self.rate_limiter.on_success(self.api_host)
+            body = response.json()
+            # 빈 페이지(끝)와 구분하기 위해 restaurants가 없는 응답은 오류로 처리
+            if not body or (body[0].get("data") or {}).get("restaurants") is None:
+                print(f"{page_num}페이지 응답에 restaurants가 없음: {str(body)[:200]}")
+                time.sleep(2 ** attempt)
+                continue
+            cafes = []
+            parse_graphql_data(body, cafes)
+            return cafes
+        return None
+
+    def close(self):
+        self.session.close()
+
+
+# extract_cafe_list와 같은 규약: 페이지 번호 순서대로 on_page(page_num, page_cafes) 호출, 마지막 페이지까지 갔으면 True
+# 한 번에 parallel개 페이지를 동시에 요청하고, 결과는 번호 순서로 넘김 (체크포인트가 중간을 건너뛰지 않도록)
+# 페이지 위치(start)는 요청에 보내는 display(page_size) 기준 (첫 페이지가 짧거나 길게 와도 나머지 페이지가 밀리지 않도록)
+def fetch_cafe_list_graphql(url, target, list_session, on_page, start_page=1, parallel=LIST_PARALLEL_PAGES, page_size=LIST_PAGE_SIZE):
+    first_page_cafes, total = list_session.open_list(url)
+    if not first_page_cafes:
+        return False
+    if start_page <= 1:
+        on_page(1, first_page_cafes)
+
+    last_page = math.ceil(total / page_size) if total is not None else None
+    page_num = max(start_page, 2)
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        while last_page is None or page_num <= last_page:
+            wave = list(range(page_num, page_num + parallel if last_page is None else min(page_num + parallel, last_page + 1)))
+            results = list(executor.map(lambda n: list_session.fetch_page(target, n, page_size, url), wave))
+            for wave_page, page_cafes in zip(wave, results):
+                if page_cafes is None:
+                    print(f"{wave_page}페이지 수집 실패, 중단")
+                    return False
+                if not page_cafes:
+                    return True # 전체 개수를 모를 때 빈 페이지 = 끝
+                on_page(wave_page, page_cafes)
+            page_num = wave[-1] + 1
+    return True
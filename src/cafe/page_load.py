@@ -0,0 +1,106 @@
+import os
+
+# 페이지를 열 때 필요 없는 리소스(이미지/미디어/폰트/분석 스크립트)는 요청 단계에서 막고,
+# networkidle 대신 인라인 __APOLLO_STATE__ 스크립트가 생기면 바로 읽음
+#   - 페이지 종류(detail/review/list)마다 허용할 리소스 종류와, 종류와 상관없이 허용할 URL을 정함
+#   - 분석/광고 URL은 허용 목록에 없으면 종류와 상관없이 차단
+#   - CAFE_BLOCK_RESOURCES=0이면 차단 없이 기존처럼 networkidle까지 기다림
+BLOCK_RESOURCES = os.environ.get("CAFE_BLOCK_RESOURCES", "1") != "0"
+
+PAGE_RESOURCE_POLICIES = {
+    # 상세: SSR HTML의 인라인 스크립트만 읽으므로 문서만 받음
+    "detail": {"resource_types": {"document"}, "allow_urls": ()},
+    # 상세 페이지 대신 받은 보안 확인 페이지: 스크립트가 실행돼야 통과하므로 스크립트/요청을 허용하고 networkidle까지 기다림
+    "challenge": {"resource_types": {"document", "script", "xhr", "fetch", "stylesheet"}, "allow_urls": ()},
+    # 리뷰/목록 첫 페이지: 쿠키만 받음. 스크립트가 보내는 쿠키 발급 요청(lcs)은 허용
+    "review": {"resource_types": {"document", "script", "xhr", "fetch"}, "allow_urls": ("lcs.naver.com",)},
+    # 목록: 페이지 버튼 클릭/GraphQL 응답 캡처를 위해 화면은 그려져야 함 (스크립트/스타일 유지)
+    "list": {"resource_types": {"document", "script", "xhr", "fetch", "stylesheet"}, "allow_urls": ("lcs.naver.com",)},
+}
+# 분석/광고 (허용 목록에 없으면 항상 차단)
+TRACKER_URL_PATTERNS = (
+    "wcs.naver.net", "wcslog", "lcs.naver.com", "veta.naver.com", "nelo2-col",
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+)
+
+APOLLO_READY_JS = """
+    () => Array.from(document.scripts).some(
+        (script) => script.textContent && script.textContent.includes('window.__APOLLO_STATE__')
+    )
+    """
+
+
+def should_block(page_type, resource_type, url):
+    policy = PAGE_RESOURCE_POLICIES[page_type]
+    if any(pattern in url for pattern in policy["allow_urls"]):
+        return False
+    if any(pattern in url for pattern in TRACKER_URL_PATTERNS):
+        return True
+    return resource_type not in policy["resource_types"]
+
+def new_load_stats():
+    return {"allowed": 0, "blocked": 0, "blocked_types": {}}
+
+def _count(stats, blocked, resource_type):
+    if blocked:
+        stats["blocked"] += 1
+        stats["blocked_types"][resource_type] = stats["blocked_types"].get(resource_type, 0) + 1
+    else:
+        stats["allowed"] += 1
+
+# page(또는 context)의 모든 요청에 정책 적용, 차단/허용 개수를 stats에 누적
+def install_resource_policy(target, page_type, stats=None):
+    stats = stats if stats is not None else new_load_stats()
+
+    def handle(route):
+        request = route.request
+        blocked = should_block(page_type, request.resource_type, request.url)
+        _count(stats, blocked, request.resource_type)
+        if blocked:
+            route.abort()
+        else:
+            route.continue_()
+
+    target.route("**/*", handle)
+    return stats
+
+async def install_resource_policy_async(target, page_type, stats=None):
+    stats = stats if stats is not None else new_load_stats()
+
+    async def handle(route):
+        request = route.request
+        blocked = should_block(page_type, request.resource_type, request.url)
+        _count(stats, blocked, request.resource_type)
+        if blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await target.route("**/*", handle)
+    return stats
+
+# ready: "apollo"(인라인 APOLLO_STATE가 생길 때까지) 또는 "networkidle"(화면 조작이나 스크립트가 주는 쿠키가 필요한 페이지)
+# block=False면 차단/준비 신호 없이 기존 방식 (반환 stats는 None)
+def open_page(page, url, page_type, timeout=30000, ready="apollo", block=None):
+    if not (BLOCK_RESOURCES if block is None else block):
+        page.goto(url, wait_until="networkidle", timeout=timeout)
+        return None
+    stats = install_resource_policy(page, page_type)
+    if ready == "networkidle":
+        page.goto(url, wait_until="networkidle", timeout=timeout)
+    else:
+        page.goto(url, wait_until="commit", timeout=timeout)
+        page.wait_for_function(APOLLO_READY_JS, timeout=timeout)
+    return stats
+
+async def open_page_async(page, url, page_type, timeout=30000, ready="apollo", block=None):
+    if not (BLOCK_RESOURCES if block is None else block):
+        await page.goto(url, wait_until="networkidle", timeout=timeout)
+        return None
+    stats = await install_resource_policy_async(page, page_type)
+    if ready == "networkidle":
+        await page.goto(url, wait_until="networkidle", timeout=timeout)
+    else:
+        await page.goto(url, wait_until="commit", timeout=timeout)
+        await page.wait_for_function(APOLLO_READY_JS, timeout=timeout)
+    return stats
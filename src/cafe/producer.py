@@ -1,50 +1,171 @@
-import json
+import hashlib
 import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import boto3
+from botocore.config import Config
 from crawl_cafe_basic_info import load_cafe_ids_from_jsonl
+from crawl import SQS_QUEUE_URLS, SQS_REGION, CRAWL_STATS_DIR, REFRESH_MODE, WORK_QUEUE_BACKEND, WORK_QUEUE_DB_PATH, get_completion_index, get_lease_manager, get_run_state, queued_review_ids, record_queued_reviews
+from run_state import format_progress
+from work_queue import open_work_queue
+from scheduler import DEFAULT_POLICY, load_crawl_stats, plan_schedule, print_schedule_summary
 
 
-def send_ids_to_sqs(queue_url, id_list):
-    sqs = boto3.client('sqs', region_name='ap-northeast-2')
-    batch_size = 10  # SQS 배치 전송 최대 10개
-    
-    print(f"총 {len(id_list)}개의 ID를 SQS 큐로 전송 시작...")
-
-    for i in range(0, len(id_list), batch_size):
-        # 10개씩 묶기
-        batch_ids = id_list[i:i + batch_size]
-        
-        # SQS 배치 형식에 맞게 변환
-        entries = []
-        for index, cafe_id in enumerate(batch_ids):
-            entries.append({
-                'Id': str(index),       # 배치 내 고유 ID
-                'MessageBody': cafe_id  # 실제 보낼 데이터
-            })
-
-        # 배치 전송
+PRODUCER_THREADS = int(os.environ.get("CAFE_PRODUCER_THREADS", "16")) # 동시에 전송하는 배치 수
+SEND_MAX_ATTEMPTS = 5
+SEND_BACKOFF_SECONDS = 0.5
+SQS_BATCH_SIZE = 10  # SQS 배치 전송 최대 10개
+
+def create_sqs_client():
+    # 스레드들이 클라이언트 하나를 같이 쓰므로 연결 풀을 스레드 수만큼
+    return boto3.client('sqs', region_name=SQS_REGION, config=Config(max_pool_connections=PRODUCER_THREADS))
+
+# 같은 카페/모드는 항상 같은 중복 제거 ID (FIFO 큐는 5분 안에 다시 보낸 메시지를 버림, 로컬 큐는 큐에 남아 있는 동안 버림)
+# 표준 SQS 큐(cafe_queue)는 중복 제거를 하지 않으므로 재실행 중복은 완료 색인의 큐 기록(queued_review_ids)으로 거름
+def message_dedup_id(cafe_id):
+    mode = "refresh" if REFRESH_MODE else "full"
+    return hashlib.sha256(f"{mode}:{cafe_id}".encode("utf-8")).hexdigest()
+
+def build_entries(queue_url, batch_ids):
+    is_fifo = queue_url.endswith(".fifo")
+    entries = []
+    for index, cafe_id in enumerate(batch_ids):
+        entry = {
+            'Id': str(index),       # 배치 내 고유 ID
+            'MessageBody': cafe_id  # 실제 보낼 데이터
+        }
+        # 표준 큐는 중복 제거 ID를 받지 않음
+        if is_fifo:
+            entry['MessageGroupId'] = cafe_id # 카페끼리 순서를 지킬 필요가 없으므로 카페마다 그룹을 나눠 병렬 처리
+            entry['MessageDeduplicationId'] = message_dedup_id(cafe_id)
+        entries.append(entry)
+    return entries
+
+# 배치 하나를 보내고 실패한 항목만 백오프 후 재시도. (성공한 id 목록, 최종 실패 항목, 재시도 수) 반환
+def send_batch_with_retry(sqs, queue_url, batch_ids):
+    pending = build_entries(queue_url, batch_ids)
+    sent = []
+    retries = 0
+    for attempt in range(SEND_MAX_ATTEMPTS):
+        if attempt > 0:
+            retries += 1
+            time.sleep(SEND_BACKOFF_SECONDS * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
         try:
-            response = sqs.send_message_batch(
-                QueueUrl=queue_url,
-                Entries=entries
-            )
-            if 'Successful' in response:
-                print(f"  {len(response['Successful'])}개 메시지 전송 성공 (ID {i+1} ~ {i+len(batch_ids)})")
-            if 'Failed' in response and response['Failed']:
-                print(f"  [경고] {len(response['Failed'])}개 메시지 전송 실패: {response['Failed']}")
-                
+            response = sqs.send_message_batch(QueueUrl=queue_url, Entries=pending)
         except Exception as e:
-            print(f"SQS 전송 중 오류 발생: {e}")
+            print(f"  SQS 전송 중 오류 (시도 {attempt + 1}/{SEND_MAX_ATTEMPTS}): {e}")
+            continue
+        successful_ids = {s['Id'] for s in response.get('Successful', [])}
+        sent.extend(entry['MessageBody'] for entry in pending if entry['Id'] in successful_ids)
+        failed = response.get('Failed') or []
+        # 요청 자체가 잘못된 항목(SenderFault)은 다시 보내도 실패하므로 재시도하지 않음
+        sender_faults = [f for f in failed if f.get('SenderFault')]
+        if sender_faults:
+            print(f"  [경고] {len(sender_faults)}개 메시지 전송 거부: {sender_faults}")
+        retry_ids = {f['Id'] for f in failed if not f.get('SenderFault')}
+        pending = [entry for entry in pending if entry['Id'] in retry_ids]
+        if not pending:
+            return sent, sender_faults, retries
+    return sent, pending, retries
+
+def send_ids_to_sqs(queue_url, id_list, sqs=None, threads=PRODUCER_THREADS):
+    sqs = sqs or create_sqs_client()
+    batches = [id_list[i:i + SQS_BATCH_SIZE] for i in range(0, len(id_list), SQS_BATCH_SIZE)]
+    report_every = max(1, len(batches) // 10)
+    sent = []
+    failed = []
+    retries = 0
+    started_at = time.time()
+
+    print(f"총 {len(id_list)}개의 ID를 SQS 큐로 전송 시작... (스레드 {threads}개)")
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(send_batch_with_retry, sqs, queue_url, batch) for batch in batches]
+        for done, future in enumerate(as_completed(futures), 1):
+            batch_sent, batch_failed, batch_retries = future.result()
+            sent.extend(batch_sent)
+            failed.extend(batch_failed)
+            retries += batch_retries
+            if done % report_every == 0 or done == len(batches):
+                print(f"  진행: 배치 {done}/{len(batches)}, 성공 {len(sent)}개, 실패 {len(failed)}개, 재시도 {retries}회")
+
+    elapsed = time.time() - started_at
+    print(f"전송 완료: 성공 {len(sent)}/{len(id_list)}개, 실패 {len(failed)}개 ({elapsed:.1f}초, {len(id_list) / max(elapsed, 1e-9):,.0f}개/초)")
+    if failed:
+        print(f"  [경고] 최종 실패 ID: {[entry.get('MessageBody', entry.get('Id')) for entry in failed][:20]}")
+    return {"sent": len(sent), "sent_ids": sent, "failed": len(failed), "retries": retries, "seconds": elapsed}
+
+# 로컬(SQLite) 큐는 한 트랜잭션으로 추가. 같은 중복 제거 ID가 아직 큐에 있으면 무시됨
+def send_ids_to_local_queue(work_queue, queue_url, id_list):
+    started_at = time.time()
+    added = work_queue.send_many(queue_url, id_list, [message_dedup_id(cafe_id) for cafe_id in id_list])
+    elapsed = time.time() - started_at
+    print(f"전송 완료: {added}/{len(id_list)}개 추가, {len(id_list) - added}개는 이미 큐에 있음 ({elapsed:.1f}초)")
+    return {"sent": added, "sent_ids": list(id_list), "failed": 0, "retries": 0, "seconds": elapsed}
+
+# 완료 표시가 있거나, 다른 워커가 임대 중이거나, 이미 큐에 넣고 아직 처리되지 않은 카페 제외
+#   갱신 수집(refresh)은 완료된 카페가 대상이므로 완료 여부는 보지 않음
+def filter_pending_ids(cafe_ids, completed_ids, in_progress_ids, refresh=False, queued_ids=()):
+    counts = {"input": len(cafe_ids), "duplicate": 0, "completed": 0, "in_progress": 0, "queued": 0}
+    pending = []
+    seen = set()
+    for cafe_id in cafe_ids:
+        if cafe_id in seen:
+            counts["duplicate"] += 1
+        elif cafe_id in in_progress_ids:
+            counts["in_progress"] += 1
+        elif cafe_id in queued_ids:
+            counts["queued"] += 1
+        elif cafe_id in completed_ids and not refresh:
+            counts["completed"] += 1
+        else:
+            pending.append(cafe_id)
+        seen.add(cafe_id)
+    counts["pending"] = len(pending)
+    return pending, counts
 
-    print("모든 ID 전송 완료.")
+# 스케줄 순서대로 전송. 큐가 여러 개면 등급(high/normal/low)별 큐로, 등급이 큐보다 많으면 마지막 큐로 보냄
+#   SQS 배치들은 병렬로 나가므로 큐 안의 순서는 대략적인 스케줄 순서
+#   work_queue(로컬 SQLite 큐)를 넘기면 SQS 대신 그쪽으로 보냄
+def send_schedule_to_sqs(queue_urls, schedule, sqs=None, work_queue=None):
+    sqs = sqs or (create_sqs_client() if work_queue is None else None)
+    results = []
+    for index, queue_url in enumerate(queue_urls):
+        is_last = index == len(queue_urls) - 1
+        ids = [job["cafe_id"] for job in schedule if job["tier"] == index or (is_last and job["tier"] > index)]
+        if ids and work_queue is not None:
+            results.append(send_ids_to_local_queue(work_queue, queue_url, ids))
+        elif ids:
+            results.append(send_ids_to_sqs(queue_url, ids, sqs))
+    return results
 
+# python producer.py [ljf|stale|file] [최대 전송 개수]
 if __name__ == "__main__":
-    QUEUE_URL = "https://sqs.ap-northeast-2.amazonaws.com/181474919825/cafe_queue"
     CAFE_LIST_FILE = "./data/cafe_list.jsonl"
+    policy = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_POLICY
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
 
     cafe_ids = load_cafe_ids_from_jsonl(CAFE_LIST_FILE)
+    # 색인은 머신별이라 다른 머신의 완료도 보도록 저장소 완료 목록과 맞춘 뒤 한 번 읽음
+    completed_ids = get_completion_index(reconcile=True).completed_ids("reviews")
+    cafe_ids, counts = filter_pending_ids(cafe_ids, completed_ids, get_lease_manager().held_keys(), REFRESH_MODE, queued_review_ids())
+    print(f"입력 {counts['input']}개 중 전송 대상 {counts['pending']}개 (완료 {counts['completed']}, 작업 중 {counts['in_progress']}, 큐에 있음 {counts['queued']}, 중복 {counts['duplicate']} 제외)")
+    schedule = plan_schedule(cafe_ids, load_crawl_stats(CRAWL_STATS_DIR), completed_ids, policy, REFRESH_MODE)
+    # 한 번에 큐에 쌓는 양 조절 (점수가 높은 것부터)
+    schedule = schedule[:limit] if limit else schedule
     
-    if len(cafe_ids) > 0:
-        send_ids_to_sqs(QUEUE_URL, cafe_ids)
+    if len(schedule) > 0:
+        print_schedule_summary(schedule, policy)
+        queued_at = time.time()
+        if WORK_QUEUE_BACKEND == "sqlite":
+            work_queue = open_work_queue("sqlite", SQS_QUEUE_URLS, db_path=WORK_QUEUE_DB_PATH)
+            results = send_schedule_to_sqs(SQS_QUEUE_URLS, schedule, work_queue=work_queue)
+            work_queue.close()
+        else:
+            results = send_schedule_to_sqs(SQS_QUEUE_URLS, schedule)
+        record_queued_reviews([cafe_id for result in results for cafe_id in result["sent_ids"]], at=queued_at)
+        # 워커들의 종료 판단용 실행 상태에 이번에 넣은 개수를 더함 (이전 실행이 끝났으면 새 실행 시작)
+        print(format_progress(get_run_state().add_expected(sum(result["sent"] for result in results))))
     else:
         print("전송할 ID가 없습니다.")
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# 같은 머신의 모든 워커(스레드/프로세스)가 공유하는 상태 파일 위치 (EFS가 아닌 로컬 디스크)
+RATE_LIMIT_DIR = os.environ.get("CAFE_RATE_LIMIT_DIR", "/tmp/cafe_rate_limit")
+
+DEFAULT_RATE = float(os.environ.get("CAFE_RATE_PER_HOST", "1.0")) # 호스트당 초당 요청 수 (머신 전체 합계)
+DEFAULT_BURST = 3
+# Retry-After 없는 429의 대기: 처음에는 짧게, 연속으로 받을 때마다 두 배 (머신 전체가 멈추므로 길게 시작하지 않음)
+THROTTLE_WAIT_SECONDS = 30
+MAX_THROTTLE_WAIT_SECONDS = 540
+
+
+def host_of(url):
+    return urlparse(url).netloc
+
+
+# 호스트별 토큰 버킷. 상태는 호스트마다 작은 JSON 파일 하나에 두고 flock으로 직렬화
+# (flock은 open 단위라 같은 프로세스의 다른 스레드 사이에서도 동작)
+# 429를 받으면 속도를 절반으로 줄이고 Retry-After(없으면 30초부터 연속 429마다 두 배) 동안 머신 전체가 멈춤, 성공하면 조금씩 다시 올림
+class HostRateLimiter:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=None, max_rate=None,
+                 backoff_factor=0.5, recover_factor=1.02, state_dir=RATE_LIMIT_DIR):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.max_rate = max_rate if max_rate is not None else rate * 2
+        self.backoff_factor = backoff_factor
+        self.recover_factor = recover_factor
+        self.state_dir = state_dir
+
+    def _state_file(self, host):
+        return os.path.join(self.state_dir, f"{host.replace(':', '_')}.json")
+
+    @contextmanager
+    def _locked_state(self, host):
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self._state_file(host), "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else {}
+                except json.JSONDecodeError:
+                    state = {}
+                now = time.time()
+                state.setdefault("rate", self.rate)
+                state.setdefault("tokens", float(self.burst))
+                state.setdefault("updated", now)
+                state.setdefault("blocked_until", 0.0)
+                state.setdefault("throttle_wait", THROTTLE_WAIT_SECONDS)
+
+                # 지난 시간만큼 토큰 보충
+                elapsed = max(0.0, now - state["updated"])
+                state["tokens"] = min(float(self.burst), state["tokens"] + elapsed * state["rate"])
+                state["updated"] = now
+
+                yield state, now
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    # 토큰을 얻으면 0, 아니면 다시 시도하기까지 기다릴 시간(초)
+    def try_acquire(self, host):
+        with self._locked_state(host) as (state, now):
+            if now < state["blocked_until"]:
+                return state["blocked_until"] - now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / state["rate"]
+
+    def acquire(self, host):
+        while True:
+            wait = self.try_acquire(host)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, host):
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, host)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def on_success(self, host):
+        with self._locked_state(host) as (state, now):
+            state["rate"] = min(self.max_rate, state["rate"] * self.recover_factor)
+            state["throttle_wait"] = THROTTLE_WAIT_SECONDS
+
+    # 429: 머신 전체가 retry_after 동안 멈추고 이후 줄어든 속도로 재개
+    # retry_after가 None(Retry-After 없음)이면 지금 대기 시간만큼 멈추고 다음 대기 시간은 두 배 (성공하면 처음으로)
+    def on_throttle(self, host, retry_after=None):
+        with self._locked_state(host) as (state, now):
+            if retry_after is None:
+                retry_after = state["throttle_wait"]
+                state["throttle_wait"] = min(MAX_THROTTLE_WAIT_SECONDS, state["throttle_wait"] * 2)
+            state["rate"] = max(self.min_rate, state["rate"] * self.backoff_factor)
+            state["tokens"] = 0.0
+            state["blocked_until"] = max(state["blocked_until"], now + retry_after)
+            print(f"[{host}] 429 감지: 요청 속도 {state['rate']:.2f}/초로 감소, {retry_after}초 동안 전체 대기")
+
+    def snapshot(self, host):
+        with self._locked_state(host) as (state, now):
+            return dict(state)
@@ -0,0 +1,373 @@
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from playwright.sync_api import sync_playwright
+from browser_pool import DEFAULT_USER_AGENT
+from rate_limit import HostRateLimiter, host_of
+from page_load import open_page
+
+API_URL = "https://pcmap-api.place.naver.com/graphql"
+PLACE_BASE_URL = "https://pcmap.place.naver.com"
+
+
+def review_page_url(business_id, base_url=PLACE_BASE_URL):
+    return f"{base_url}/restaurant/{business_id}/review/visitor"
+
+def build_review_headers(business_id, base_url=PLACE_BASE_URL):
+    return {
+        "Accept": "*/*",
+        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Origin": base_url,
+        "Referer": review_page_url(business_id, base_url),
+    }
+
+
+FULL_REVIEWS_QUERY = """query getVisitorReviews($input: VisitorReviewsInput) {
+    visitorReviews(input: $input) {
+        items {
+        id
+        cursor
+        reviewId
+        rating
+        author {
+            id
+            nickname
+            from
+            imageUrl
+            borderImageUrl
+            objectId
+            url
+            review {
+            totalCount
+            imageCount
+            avgRating
+            __typename
+            }
+            theme {
+            totalCount
+            __typename
+            }
+            isFollowing
+            followerCount
+            followRequested
+            __typename
+        }
+        body
+        thumbnail
+        media {
+            type
+            thumbnail
+            thumbnailRatio
+            class
+            videoId
+            videoUrl
+            trailerUrl
+            __typename
+        }
+        tags
+        status
+        visitCount
+        viewCount
+        visited
+        created
+        reply {
+            editUrl
+            body
+            editedBy
+            created
+            date
+            replyTitle
+            isReported
+            isSuspended
+            status
+            __typename
+        }
+        originType
+        item {
+            name
+            code
+            options
+            __typename
+        }
+        language
+        highlightRanges {
+            start
+            end
+            __typename
+        }
+        apolloCacheId
+        translatedText
+        businessName
+        showBookingItemName
+        bookingItemName
+        votedKeywords {
+            code
+            iconUrl
+            iconCode
+            name
+            __typename
+        }
+        userIdno
+        loginIdno
+        receiptInfoUrl
+        reactionStat {
+            id
+            typeCount {
+            name
+            count
+            __typename
+            }
+            totalCount
+            __typename
+        }
+        hasViewerReacted {
+            id
+            reacted
+            __typename
+        }
+        nickname
+        showPaymentInfo
+        visitCategories {
+            code
+            name
+            keywords {
+            code
+            name
+            __typename
+            }
+            __typename
+        }
+        representativeVisitDateTime
+        showRepresentativeVisitDateTime
+        __typename
+        }
+        starDistribution {
+        score
+        count
+        __typename
+        }
+        hideProductSelectBox
+        total
+        showRecommendationSort
+        itemReviewStats {
+        score
+        count
+        itemId
+        starDistribution {
+            score
+            count
+            __typename
+        }
+        __typename
+        }
+        __typename
+    }
+    }"""
+
+
+# 저장 레코드에 필요한 필드만 요청 (작성자 통계/미디어/반응/키워드/별점 분포 제외)
+MINIMAL_REVIEWS_QUERY = """query getVisitorReviews($input: VisitorReviewsInput) {
+    visitorReviews(input: $input) {
+        items {
+        id
+        reviewId
+        cursor
+        author {
+            id
+        }
+        body
+        visitCount
+        representativeVisitDateTime
+        }
+        total
+    }
+    }"""
+
+# 쿼리 프로필: GraphQL 선택 필드, 입력 플래그, 저장 레코드 스키마(레코드 키 -> 아이템 내 경로)를 함께 정의
+# 레코드 스키마는 항상 프로필에서 파생되므로 쿼리에 없는 필드를 저장하려다 None만 쌓이는 일이 없음
+MINIMAL_RECORD_FIELDS = {
+    "author_id": ("author", "id"),
+    "body": ("body",),
+    "visit_count": ("visitCount",),
+    "visit_time": ("representativeVisitDateTime",),
+    "cursor": ("cursor",),
+    "review_id": ("reviewId",),
+}
+
+REVIEW_QUERY_PROFILES = {
+    "minimal": {
+        "query": MINIMAL_REVIEWS_QUERY,
+        "input": {
+            "getUserStats": False,
+            "includeReceiptPhotos": False,
+            "getReactions": False,
+            "getTrailer": False,
+        },
+        "record_fields": MINIMAL_RECORD_FIELDS,
+    },
+    "full": {
+        "query": FULL_REVIEWS_QUERY,
+        "input": {
+            "getUserStats": True,
+            "includeReceiptPhotos": True,
+            "getReactions": True,
+            "getTrailer": True,
+        },
+        "record_fields": {
+            **MINIMAL_RECORD_FIELDS,
+            "rating": ("rating",),
+            "author_nickname": ("author", "nickname"),
+            "author_review_count": ("author", "review", "totalCount"),
+            "tags": ("tags",),
+            "status": ("status",),
+            "view_count": ("viewCount",),
+            "visited": ("visited",),
+            "created": ("created",),
+            "reply_body": ("reply", "body"),
+            "reaction_count": ("reactionStat", "totalCount"),
+        },
+    },
+}
+
+DEFAULT_QUERY_PROFILE = os.environ.get("CAFE_QUERY_PROFILE", "minimal")
+RECENT_SORT = "recent" # 최신순 정렬 값
+
+
+def review_record_fields(profile=DEFAULT_QUERY_PROFILE):
+    return list(REVIEW_QUERY_PROFILES[profile]["record_fields"])
+
+# sort: None이면 기본 정렬, "recent"면 최신순 (갱신 수집용)
+def build_review_payload(business_id, cursor=None, size=50, profile=DEFAULT_QUERY_PROFILE, sort=None):
+    query_profile = REVIEW_QUERY_PROFILES[profile]
+    payload = [
+        {
+            "operationName": "getVisitorReviews",
+            "variables": {
+                "input": {
+                    "businessId": f"{business_id}",
+                    "after": cursor,
+
+                    "businessType": "restaurant",
+                    "item": "0",
+                    "bookingBusinessId": None,
+                    "size": size,
+                    "isPhotoUsed": False,
+                    "includeContent": True,
+                    "cidList": None,
+                    **query_profile["input"],
+                }
+            },
+            "query": query_profile["query"],
+        }
+    ]
+    if sort:
+        payload[0]["variables"]["input"]["sort"] = sort
+    return payload
+
+# API 아이템 하나에서 프로필 스키마에 있는 필드만 추출
+def extract_review_record(item, profile=DEFAULT_QUERY_PROFILE):
+    record = {}
+    for key, path in REVIEW_QUERY_PROFILES[profile]["record_fields"].items():
+        value = item
+        for name in path:
+            value = value.get(name) if isinstance(value, dict) else None
+        record[key] = value
+    return record
+
+# 429 응답의 Retry-After 값 (최대 9분). 숫자가 아니거나 없으면 None -> 레이트 리미터가 짧게 시작해서 연속 429마다 두 배로 대기
+def parse_retry_after(retry_after, max_wait=540):
+    if not retry_after:
+        return None
+    try:
+        return min(int(retry_after), max_wait)
+    except ValueError:
+        return None
+
+# 페이지 사이 대기 시간 (이상 탐지 방지용 랜덤 지연)
+def next_page_delay():
+    delay = random.uniform(2, 4) # 2초~4초 사이 랜덤 대기
+    if random.random() < 0.8: # 80% 확률로 추가 대기
+        delay += random.uniform(0.5, 3)
+    if random.random() < 0.1: # 10% 확률로 추가 대기
+        delay += random.uniform(4, 6)
+    return delay
+
+
+# 브라우저는 쿠키 획득에만 한 번 쓰고, 이후 GraphQL 페이징은 keep-alive HTTP 세션으로 처리
+# 워커 하나당 하나 생성해서 여러 카페에 재사용 (쿠키 수명이 지나면 다시 부트스트랩)
+class ReviewSession:
+    def __init__(self, browser_pool=None, cookie_ttl=1800, pool_maxsize=10,
+                 api_url=API_URL, base_url=PLACE_BASE_URL, user_agent=DEFAULT_USER_AGENT, rate_limiter=None):
+        self.browser_pool = browser_pool
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.api_host = host_of(api_url)
+        self.cookie_ttl = cookie_ttl
+        self.api_url = api_url
+        self.base_url = base_url
+        self.user_agent = user_agent
+        self.bootstrapped_at = None
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": user_agent})
+
+    def _read_cookies(self, business_id):
+        url = review_page_url(business_id, self.base_url)
+        if self.browser_pool:
+            with self.browser_pool.new_context() as context:
+                open_page(context.new_page(), url, "review", ready="networkidle")
+                return context.cookies()
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            try:
+                context = browser.new_context(user_agent=self.user_agent)
+                open_page(context.new_page(), url, "review", ready="networkidle")
+                return context.cookies()
+            finally:
+                browser.close()
+
+    # 쿠키 만료 전이면 아무것도 하지 않음
+    def bootstrap(self, business_id, force=False):
+        with self._lock:
+            if not force and self.is_fresh():
+                return
+            cookies = self._read_cookies(business_id)
+            self.session.cookies.clear()
+            for cookie in cookies:
+                self.session.cookies.set(
+                    cookie["name"], cookie["value"],
+                    domain=cookie.get("domain"), path=cookie.get("path", "/"),
+                )
+            self.bootstrapped_at = time.time()
+            print(f"[{business_id}] 쿠키 {len(cookies)}개 획득 (브라우저 종료, 이후 HTTP 세션 사용)")
+
+    def is_fresh(self):
+        return self.bootstrapped_at is not None and time.time() - self.bootstrapped_at < self.cookie_ttl
+
+    # 401/403 등 쿠키 문제로 보이는 응답을 받으면 다음 요청 전에 다시 부트스트랩
+    def invalidate(self):
+        self.bootstrapped_at = None
+
+    # 머신 전체 공유 토큰 버킷을 거쳐서 요청, 429는 버킷에 알려 다른 워커도 같이 멈추게 함
+    def post_graphql(self, business_id, payload, timeout=10):
+        self.bootstrap(business_id)
+        self.rate_limiter.acquire(self.api_host)
+        response = self.session.post(
+            self.api_url, json=payload,
+            headers=build_review_headers(business_id, self.base_url), timeout=timeout,
+        )
+        if response.status_code == 429:
+            self.rate_limiter.on_throttle(self.api_host, parse_retry_after(response.headers.get("Retry-After")))
+        elif response.status_code == 200:
+            self.rate_limiter.on_success(self.api_host)
+        return response
+
+    def close(self):
+        self.session.close()
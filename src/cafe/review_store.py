@@ -0,0 +1,616 @@
+import glob
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+from dedupe import ReviewDedupeIndex
+
+
+# JSONL 파일의 마지막 줄을 읽음
+def get_last_cursor_from_jsonl(filename):
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return None
+    
+    try:
+        with open(filename, 'rb') as f: # 바이너리(rb) 모드로 읽기
+            f.seek(0, os.SEEK_END)
+            buffer_size = 1024 # 적절한 버퍼 크기
+            
+            buffer = bytearray()
+            
+            current_pos = f.tell()
+            while current_pos > 0:
+                read_size = min(buffer_size, current_pos)
+                new_pos = current_pos - read_size
+                current_pos = new_pos
+                f.seek(new_pos)
+                
+                # 데이터를 읽어서 버퍼 앞에 추가 (거꾸로 쌓음)
+                buffer = f.read(read_size) + buffer
+                
+                try:
+                    # 처음에 있는 빈 줄 제거
+                    temp_buffer = buffer.rstrip()
+                    if not temp_buffer:
+                        continue
+                    
+                    # 버퍼에서 마지막 줄바꿈 문자(\n)를 찾음
+                    last_newline = temp_buffer.rindex(b'\n')
+                    last_line_bytes = temp_buffer[last_newline+1:]
+                    
+                    # 빈 줄이 아닐 경우
+                    if last_line_bytes:
+                        last_line_str = last_line_bytes.decode('utf-8')
+                        data = json.loads(last_line_str)
+                        return data.get('cursor')
+                except ValueError:
+                    # 버퍼 안에 줄바꿈이 아직 없음
+                    pass
+            
+            # 파일 전체를 다 읽었는데 줄바꿈이 없는 경우
+            if buffer.rstrip():
+                try:
+                    last_line_str = buffer.rstrip().decode('utf-8')
+                    data = json.loads(last_line_str)
+                    return data.get('cursor')
+                except Exception as e:
+                    print(f"마지막 줄 파싱 오류: {e}")
+                    traceback.print_exc()
+
+    except Exception as e:
+        print(f"마지막 커서 읽기 오류: {e}")
+        traceback.print_exc()
+        return None
+    
+    return None
+
+# 체크포인트 사이드카: 마지막 커서/리뷰 수/바이트 오프셋/상태를 작은 JSON 하나에 기록
+# 임시 파일에 쓰고 fsync 후 rename 하므로 읽는 쪽은 항상 완전한 레코드만 봄
+def read_checkpoint(checkpoint_file):
+    try:
+        with open(checkpoint_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"체크포인트 읽기 오류 ({checkpoint_file}): {e}")
+        return None
+
+def write_checkpoint(checkpoint_file, checkpoint):
+    directory = os.path.dirname(checkpoint_file)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    checkpoint = dict(checkpoint, updated_at=time.time())
+    tmp_file = f"{checkpoint_file}.tmp.{os.getpid()}"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, checkpoint_file)
+    return checkpoint
+
+# 체크포인트가 없는 기존 파일용: 끊긴 마지막 줄을 잘라내고 커서/개수를 한 번 계산해서 체크포인트 생성
+def _checkpoint_from_legacy_jsonl(output_file):
+    size = os.path.getsize(output_file)
+    review_count = 0
+    last_newline_end = 0
+    with open(output_file, "rb") as f:
+        position = 0
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            review_count += chunk.count(b"\n")
+            newline_index = chunk.rfind(b"\n")
+            if newline_index >= 0:
+                last_newline_end = position + newline_index + 1
+            position += len(chunk)
+    if last_newline_end < size:
+        print(f"[{os.path.basename(output_file)}] 끊긴 마지막 줄 {size - last_newline_end}바이트 제거")
+        os.truncate(output_file, last_newline_end)
+    return {
+        "last_cursor": get_last_cursor_from_jsonl(output_file),
+        "review_count": review_count,
+        "byte_offset": last_newline_end,
+        "status": "in_progress",
+    }
+
+
+# 페이지 단위로 JSONL에 이어쓰고 페이지 경계마다 flush + fsync 후 체크포인트 갱신
+# 크래시가 나도 잃는 건 쓰던 페이지 하나뿐이고, 메모리에는 한 페이지만 머무름
+# 재개 시에는 체크포인트 하나만 읽고, 데이터 파일이 체크포인트보다 길면 기록된 오프셋으로 잘라냄
+class JsonlReviewWriter:
+    def __init__(self, output_file, checkpoint_file=None, marker_file=None):
+        directory = os.path.dirname(output_file)
+        # 디렉토리 없으면 생성
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.output_file = output_file
+        self.checkpoint_file = checkpoint_file or f"{output_file}.ckpt"
+        self.marker_file = marker_file
+        self.count = 0 # 이번 실행에서 쓴 리뷰 수
+        self.duplicates = 0 # 이번 실행에서 버린 중복 리뷰 수
+        self.checkpoint = self._resume()
+        self.dedupe = self._open_dedupe(f"{output_file}.seen")
+        self._file = open(output_file, "ab")
+
+    # 중복 제거용 키 파일도 데이터와 같은 방식으로 체크포인트의 크기까지만 인정
+    def _open_dedupe(self, dedupe_file):
+        dedupe = ReviewDedupeIndex(dedupe_file)
+        if "dedupe_size" in self.checkpoint and os.path.exists(dedupe_file):
+            return dedupe.load(self.checkpoint["dedupe_size"])
+        # 여기부터는 체크포인트를 새로 만든 경우 (키 파일이 없던 시절의 데이터, 데이터 파일과 불일치)
+        if self.checkpoint["byte_offset"] > 0:
+            # JSONL에서 한 번만 생성 (기존 키 파일은 교체)
+            print(f"[{os.path.basename(self.output_file)}] 중복 제거 키 파일 생성")
+            dedupe.rebuild_from_jsonl(self.output_file)
+        elif os.path.exists(dedupe_file):
+            # 데이터 없이 남은 키 파일은 믿을 수 없음 (그대로 두면 새 키가 뒤에 붙고, 다음에 열 때 예전 키만 남음)
+            print(f"[{os.path.basename(self.output_file)}] 데이터 파일 없이 남은 중복 제거 키 파일 삭제")
+            os.remove(dedupe_file)
+        self.checkpoint = write_checkpoint(self.checkpoint_file, dict(self.checkpoint, dedupe_size=dedupe.size))
+        return dedupe
+
+    def _resume(self):
+        checkpoint = read_checkpoint(self.checkpoint_file)
+        try:
+            size = os.path.getsize(self.output_file)
+        except FileNotFoundError:
+            size = None
+
+        if checkpoint and size is not None and size >= checkpoint["byte_offset"]:
+            if size > checkpoint["byte_offset"]:
+                # 체크포인트 이후에 쓰다 만 데이터 (끊긴 줄 포함) 제거
+                print(f"[{os.path.basename(self.output_file)}] 체크포인트 이후 {size - checkpoint['byte_offset']}바이트 제거")
+                os.truncate(self.output_file, checkpoint["byte_offset"])
+            return checkpoint
+        if checkpoint and size is None and checkpoint["byte_offset"] == 0:
+            return checkpoint
+
+        if size:
+            # 체크포인트 없음/데이터 파일과 불일치 -> 파일에서 한 번 복구
+            checkpoint = _checkpoint_from_legacy_jsonl(self.output_file)
+        else:
+            checkpoint = {"last_cursor": None, "review_count": 0, "byte_offset": 0, "status": "in_progress"}
+        return write_checkpoint(self.checkpoint_file, checkpoint)
+
+    @property
+    def last_cursor(self):
+        return self.checkpoint.get("last_cursor")
+
+    @property
+    def is_completed(self):
+        return self.checkpoint.get("status") == "completed"
+
+    # cursor_field: 전체 수집은 last_cursor, 갱신(최신순) 수집은 refresh_cursor에 진행 위치를 기록
+    def write_page(self, records, cursor_field="last_cursor"):
+        if not records:
+            return
+        # 이미 저장한 리뷰는 버림 (커서는 페이지 마지막 것으로 전진)
+        new_records, new_keys = self.dedupe.filter_new(records)
+        self.duplicates += len(records) - len(new_records)
+        # 한 번의 write로 페이지 전체를 기록 (중간에 끊긴 줄이 생길 여지를 줄임)
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in new_records).encode("utf-8")
+        if data:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self.dedupe.append(new_keys)
+        self.count += len(new_records)
+        checkpoint = dict(
+            self.checkpoint,
+            review_count=self.checkpoint["review_count"] + len(new_records),
+            byte_offset=self.checkpoint["byte_offset"] + len(data),
+            dedupe_size=self.dedupe.size,
+            max_visit_time=max_visit_time(new_records, self.checkpoint.get("max_visit_time")),
+        )
+        checkpoint[cursor_field] = records[-1].get("cursor")
+        self.checkpoint = write_checkpoint(self.checkpoint_file, checkpoint)
+
+    # 완료/갱신 시점까지 본 가장 최근 방문 시각이 다음 갱신의 기준선(high_water)
+    def mark_completed(self):
+        self.checkpoint = write_checkpoint(self.checkpoint_file, dict(
+            self.checkpoint, status="completed", high_water=self.checkpoint.get("max_visit_time"),
+        ))
+        if self.marker_file:
+            create_completion_marker(self.marker_file)
+
+    def mark_refreshed(self):
+        checkpoint = dict(self.checkpoint, high_water=self.checkpoint.get("max_visit_time"), refreshed_at=time.time())
+        checkpoint.pop("refresh_cursor", None)
+        self.checkpoint = write_checkpoint(self.checkpoint_file, checkpoint)
+
+    def close(self):
+        self.dedupe.close()
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+# 페이지 안에서 가장 최근 방문 시각 (ISO 문자열이라 문자열 비교로 충분)
+def max_visit_time(records, current=None):
+    visit_times = [record["visit_time"] for record in records if record.get("visit_time")]
+    if current:
+        visit_times.append(current)
+    return max(visit_times) if visit_times else None
+
+def create_completion_marker(marker_file):
+    directory = os.path.dirname(marker_file)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    # 빈 파일 생성
+    with open(marker_file, "w") as f:
+        pass
+    print(f"[{os.path.basename(marker_file)}] 마커 파일 생성 완료.")
+
+
+# 저장소 백엔드 공통 인터페이스
+#   open_writer(cafe_id) -> write_page(records, cursor_field) / mark_completed() / mark_refreshed() / last_cursor / is_completed / checkpoint / close()
+#   is_completed(cafe_id), completed_cafe_ids(), review_count(cafe_id), iter_cafe_reviews(cafe_id) -> record (저장한 순서), iter_reviews() -> (cafe_id, record)
+# 기존 방식: 카페 하나당 JSONL + 체크포인트 + .COMPLETED 마커 (호환용)
+class JsonlReviewStore:
+    def __init__(self, review_dir, marker_dir):
+        self.review_dir = review_dir
+        self.marker_dir = marker_dir
+
+    def review_file(self, cafe_id):
+        return f"{self.review_dir}/{cafe_id}_reviews.jsonl"
+
+    def marker_file(self, cafe_id):
+        return f"{self.marker_dir}/{cafe_id}.COMPLETED"
+
+    def open_writer(self, cafe_id):
+        return JsonlReviewWriter(self.review_file(cafe_id), marker_file=self.marker_file(cafe_id))
+
+    def is_completed(self, cafe_id):
+        return os.path.exists(self.marker_file(cafe_id))
+
+    # 디렉토리 목록 한 번으로 완료된 카페 전체 확인
+    def completed_cafe_ids(self):
+        if not os.path.exists(self.marker_dir):
+            return set()
+        return {name[:-len(".COMPLETED")] for name in os.listdir(self.marker_dir) if name.endswith(".COMPLETED")}
+
+    # 체크포인트의 리뷰 수 (체크포인트가 없는 예전 파일은 줄 수)
+    def review_count(self, cafe_id):
+        checkpoint = read_checkpoint(f"{self.review_file(cafe_id)}.ckpt")
+        if checkpoint:
+            return checkpoint["review_count"]
+        path = self.review_file(cafe_id)
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+
+    def iter_cafe_reviews(self, cafe_id):
+        path = self.review_file(cafe_id)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_reviews(self):
+        for path in sorted(glob.glob(f"{self.review_dir}/*_reviews.jsonl")):
+            cafe_id = os.path.basename(path)[:-len("_reviews.jsonl")]
+            for record in self.iter_cafe_reviews(cafe_id):
+                yield cafe_id, record
+
+
+# 세그먼트 방식: 여러 카페의 리뷰를 압축 샤드 파일 하나에 이어쓰기 (EFS 파일 수/메타데이터 작업 감소)
+#   shard-*.seg : 페이지마다 독립적으로 압축된 프레임(zstd, 없으면 gzip)을 이어붙임
+#   shard-*.keys: 프레임마다 새 리뷰의 중복 제거 키(dedupe.py, 8바이트씩)를 이어붙임 (작성기를 열 때 프레임을 풀지 않고 키만 읽음)
+#   shard-*.idx : 프레임마다 JSON 한 줄 {cafe_id, offset, length, count, last_cursor 또는 refresh_cursor, max_visit_time, codec, keys_offset, keys_length},
+#                 완료 시 {cafe_id, completed}, 갱신 완료 시 {cafe_id, refreshed}
+#   키 파일이 없던 샤드의 프레임(keys_offset 없음)은 예전처럼 프레임을 풀어서 키를 만듦
+# 샤드는 프로세스마다 따로 만들어서 쓰는 쪽이 하나뿐이도록 함. 인덱스에 기록되지 않은 프레임은 무시
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+
+def _compress(data):
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(data)
+    return "gzip", gzip.compress(data, compresslevel=6)
+
+def _decompress(codec, data):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd 프레임을 읽으려면 zstandard 패키지가 필요합니다.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _new_segment_state():
+    return {"last_cursor": None, "review_count": 0, "completed": False, "frames": [], "keys": [], "unkeyed_frames": [],
+            "max_visit_time": None, "high_water": None, "refresh_cursor": None, "refreshed_at": None}
+
+def _apply_index_entry(state, seg_file, entry):
+    if entry.get("completed") or entry.get("refreshed"):
+        state["completed"] = True
+        state["high_water"] = state["max_visit_time"]
+        if entry.get("refreshed"):
+            state["refresh_cursor"] = None
+            state["refreshed_at"] = entry["at"]
+        return
+    if "refresh_cursor" in entry:
+        state["refresh_cursor"] = entry["refresh_cursor"]
+    else:
+        state["last_cursor"] = entry["last_cursor"]
+    state["review_count"] += entry["count"]
+    state["max_visit_time"] = max(filter(None, (state["max_visit_time"], entry.get("max_visit_time"))), default=None)
+    frame = (seg_file, entry["offset"], entry["length"], entry["codec"])
+    state["frames"].append(frame)
+    if "keys_offset" in entry:
+        state["keys"].append((seg_file[:-len(".seg")] + ".keys", entry["keys_offset"], entry["keys_length"]))
+    elif entry["count"]:
+        state["unkeyed_frames"].append(frame)
+
+
+class SegmentReviewStore:
+    def __init__(self, segment_dir, max_shard_bytes=SEGMENT_MAX_BYTES):
+        self.segment_dir = segment_dir
+        self.max_shard_bytes = max_shard_bytes
+        self._shard = None
+        self._index_positions = {} # 인덱스 파일 -> 읽은 위치
+        self._entries = {} # cafe_id -> [(샤드 .seg 경로, 인덱스 항목)] 기록 시각 순
+        self._states = {} # cafe_id -> 합친 상태 (커서/개수/완료/프레임/키 범위)
+        self._lock = threading.RLock() # 같은 프로세스의 여러 스레드/코루틴이 샤드 하나를 공유
+
+    # 인덱스 파일들을 읽은 위치 이후만 이어서 읽고, 새 항목이 있는 카페의 상태만 갱신 (전체를 다시 합치지 않음)
+    def _refresh_states(self):
+        new_entries = {}
+        for index_file in glob.glob(f"{self.segment_dir}/*.idx"):
+            position = self._index_positions.get(index_file, 0)
+            with open(index_file, "rb") as f:
+                f.seek(position)
+                data = f.read()
+            complete = data[:data.rfind(b"\n") + 1] # 끊긴 마지막 줄은 다음에 다시 읽음
+            for line in complete.splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                new_entries.setdefault(entry["cafe_id"], []).append((index_file[:-len(".idx")] + ".seg", entry))
+            self._index_positions[index_file] = position + len(complete)
+
+        # 같은 카페가 여러 샤드에 걸친 경우 기록 시각 순으로 합침 (카페 락 때문에 동시에 쓰는 샤드는 없음)
+        # 새 항목이 이미 반영한 항목보다 늦으면 이어서 반영, 아니면(다른 머신의 시계 차이 등) 그 카페만 처음부터 다시 합침
+        for cafe_id, entries in new_entries.items():
+            entries.sort(key=lambda e: e[1]["at"])
+            known = self._entries.setdefault(cafe_id, [])
+            state = self._states.get(cafe_id)
+            if state is None or not known or entries[0][1]["at"] >= known[-1][1]["at"]:
+                known.extend(entries)
+                state = state or _new_segment_state()
+            else:
+                known.extend(entries)
+                known.sort(key=lambda e: e[1]["at"])
+                entries = known
+                state = _new_segment_state()
+            for seg_file, entry in entries:
+                _apply_index_entry(state, seg_file, entry)
+            self._states[cafe_id] = state
+
+    # 카페 하나의 상태 (없으면 빈 dict)
+    def _cafe_state(self, cafe_id):
+        with self._lock:
+            self._refresh_states()
+            return self._states.get(cafe_id, {})
+
+    # 전체 카페 상태 (완료 목록/전체 읽기용)
+    def _cafe_states(self):
+        with self._lock:
+            self._refresh_states()
+            return dict(self._states)
+
+    def _current_shard(self):
+        if self._shard is None or self._shard.size >= self.max_shard_bytes:
+            if self._shard is not None:
+                self._shard.close()
+            name = f"shard-{socket.gethostname()}-{os.getpid()}-{time.time_ns()}"
+            self._shard = _SegmentShard(f"{self.segment_dir}/{name}")
+        return self._shard
+
+    def open_writer(self, cafe_id):
+        state = self._cafe_state(cafe_id)
+        checkpoint = {
+            "last_cursor": state.get("last_cursor"),
+            "review_count": state.get("review_count", 0),
+            "status": "completed" if state.get("completed") else "in_progress",
+            "max_visit_time": state.get("max_visit_time"),
+            "high_water": state.get("high_water"),
+            "refresh_cursor": state.get("refresh_cursor"),
+            "refreshed_at": state.get("refreshed_at"),
+        }
+        # 샤드의 키 파일에서 이 카페의 키 범위만 읽음 (키 파일이 없던 프레임만 풀어서 만듦)
+        dedupe = ReviewDedupeIndex()
+        self._read_keys(dedupe, state.get("keys", []))
+        dedupe.add_records(record for _, record in self._iter_frames(cafe_id, state.get("unkeyed_frames", [])))
+        return SegmentReviewWriter(self, cafe_id, checkpoint, dedupe)
+
+    def _read_keys(self, dedupe, key_ranges):
+        open_files = {}
+        try:
+            for keys_file, offset, length in key_ranges:
+                f = open_files.get(keys_file)
+                if f is None:
+                    f = open_files[keys_file] = open(keys_file, "rb")
+                f.seek(offset)
+                dedupe.add_packed(f.read(length))
+        finally:
+            for f in open_files.values():
+                f.close()
+
+    def is_completed(self, cafe_id):
+        return self._cafe_state(cafe_id).get("completed", False)
+
+    def completed_cafe_ids(self):
+        return {cafe_id for cafe_id, state in self._cafe_states().items() if state["completed"]}
+
+    def review_count(self, cafe_id):
+        return self._cafe_state(cafe_id).get("review_count", 0)
+
+    def iter_cafe_reviews(self, cafe_id):
+        for _, record in self.iter_reviews([cafe_id]):
+            yield record
+
+    # cafe_ids를 주면 해당 카페만 읽음
+    def iter_reviews(self, cafe_ids=None):
+        if cafe_ids is None:
+            states = self._cafe_states()
+        else:
+            states = {cafe_id: self._cafe_state(cafe_id) for cafe_id in cafe_ids}
+        for cafe_id, state in states.items():
+            if not state:
+                continue
+            yield from self._iter_frames(cafe_id, list(state["frames"]))
+
+    def _iter_frames(self, cafe_id, frames):
+        open_files = {}
+        try:
+            for seg_file, offset, length, codec in frames:
+                f = open_files.get(seg_file)
+                if f is None:
+                    f = open_files[seg_file] = open(seg_file, "rb")
+                f.seek(offset)
+                data = _decompress(codec, f.read(length))
+                for line in data.splitlines():
+                    yield cafe_id, json.loads(line)
+        finally:
+            for f in open_files.values():
+                f.close()
+
+    def close(self):
+        with self._lock:
+            if self._shard is not None:
+                self._shard.close()
+                self._shard = None
+
+
+class _SegmentShard:
+    def __init__(self, base_path):
+        directory = os.path.dirname(base_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.name = os.path.basename(base_path)
+        self._seg = open(base_path + ".seg", "ab")
+        self._keys = open(base_path + ".keys", "ab")
+        self._idx = open(base_path + ".idx", "ab")
+        self.size = self._seg.tell()
+        self.keys_size = self._keys.tell()
+
+    # keys: records의 중복 제거 키 (8바이트 bytes 목록)
+    def append_frame(self, cafe_id, records, cursor, cursor_field="last_cursor", keys=()):
+        codec, frame = _compress("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8"))
+        offset = self.size
+        self._seg.write(frame)
+        self._seg.flush()
+        os.fsync(self._seg.fileno())
+        self.size += len(frame)
+        keys_offset = self.keys_size
+        key_data = b"".join(keys)
+        if key_data:
+            self._keys.write(key_data)
+            self._keys.flush()
+            os.fsync(self._keys.fileno())
+            self.keys_size += len(key_data)
+        # 프레임과 키가 디스크에 내려간 뒤에 인덱스 기록 (인덱스가 곧 커밋)
+        self._append_index({
+            "cafe_id": cafe_id, "offset": offset, "length": len(frame),
+            "count": len(records), cursor_field: cursor, "max_visit_time": max_visit_time(records),
+            "codec": codec, "keys_offset": keys_offset, "keys_length": len(key_data), "at": time.time(),
+        })
+
+    def _append_index(self, entry):
+        self._idx.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._idx.flush()
+        os.fsync(self._idx.fileno())
+
+    def mark_completed(self, cafe_id):
+        self._append_index({"cafe_id": cafe_id, "completed": True, "at": time.time()})
+
+    def mark_refreshed(self, cafe_id):
+        self._append_index({"cafe_id": cafe_id, "refreshed": True, "at": time.time()})
+
+    def close(self):
+        self._seg.close()
+        self._keys.close()
+        self._idx.close()
+
+
+class SegmentReviewWriter:
+    def __init__(self, store, cafe_id, checkpoint, dedupe):
+        self.store = store
+        self.cafe_id = cafe_id
+        self.checkpoint = checkpoint
+        self.dedupe = dedupe
+        self.count = 0
+        self.duplicates = 0
+
+    @property
+    def last_cursor(self):
+        return self.checkpoint.get("last_cursor")
+
+    @property
+    def is_completed(self):
+        return self.checkpoint.get("status") == "completed"
+
+    def write_page(self, records, cursor_field="last_cursor"):
+        if not records:
+            return
+        new_records, new_keys = self.dedupe.filter_new(records)
+        self.duplicates += len(records) - len(new_records)
+        # 전부 중복이어도 커서 전진을 남기기 위해 빈 프레임 기록
+        with self.store._lock:
+            self.store._current_shard().append_frame(self.cafe_id, new_records, records[-1].get("cursor"), cursor_field, new_keys)
+        self.dedupe.append(new_keys)
+        self.count += len(new_records)
+        checkpoint = dict(
+            self.checkpoint,
+            review_count=self.checkpoint["review_count"] + len(new_records),
+            max_visit_time=max_visit_time(new_records, self.checkpoint.get("max_visit_time")),
+        )
+        checkpoint[cursor_field] = records[-1].get("cursor")
+        self.checkpoint = checkpoint
+
+    def mark_completed(self):
+        with self.store._lock:
+            self.store._current_shard().mark_completed(self.cafe_id)
+        self.checkpoint = dict(self.checkpoint, status="completed", high_water=self.checkpoint.get("max_visit_time"))
+
+    def mark_refreshed(self):
+        with self.store._lock:
+            self.store._current_shard().mark_refreshed(self.cafe_id)
+        self.checkpoint = dict(
+            self.checkpoint, high_water=self.checkpoint.get("max_visit_time"), refresh_cursor=None, refreshed_at=time.time(),
+        )
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def open_review_store(kind, review_dir, marker_dir, segment_dir):
+    if kind == "jsonl":
+        return JsonlReviewStore(review_dir, marker_dir)
+    if kind == "segment":
+        return SegmentReviewStore(segment_dir)
+    raise ValueError(f"알 수 없는 리뷰 저장소 종류: {kind}")
@@ -0,0 +1,118 @@
+import fcntl
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+# 수집 실행(run) 전체의 진행 상태. 모든 워커가 EFS의 JSON 파일 하나를 파일 락(lockf, EFS/NFS에서도 동작) 아래에서 갱신
+#   expected: 프로듀서가 큐에 넣은 카페 수, done: 완료한 카페 수
+#   workers: 워커별 상태 (busy: 카페 처리 중, standby: 큐가 비어 이어하기 메시지를 기다리는 중), until이 지나면 죽은 워커로 보고 무시
+#   completed_at: 종료 신호. 설정되면 큐가 빈 워커는 바로 종료
+# 큐가 비었을 때 (decide_idle)
+#   - 종료 신호가 있으면 종료
+#   - 다른 워커가 처리 중이면: 대기 워커가 RUN_STANDBY_WORKERS개 미만일 때만 남아서 이어하기 메시지를 가져가고, 나머지는 바로 종료
+#     (이어하기 메시지는 처리 중인 워커가 직접 다시 받을 수 있으므로 모두 남아 있을 필요가 없음)
+#   - 아무도 처리 중이 아니면: 큐의 남은 메시지(재시도 대기 포함)를 확인해서 없으면 종료 신호를 남기고 종료
+RUN_STANDBY_WORKERS = int(os.environ.get("CAFE_RUN_STANDBY_WORKERS", "1"))
+STANDBY_POLL_SECONDS = 10
+BUSY_TTL_SECONDS = 1800 # 처리 중 표시 유효 시간 (한 번에 처리하는 분량(CHUNK_MAX_SECONDS)보다 충분히 길게)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+def _new_state():
+    return {"run_id": uuid.uuid4().hex, "started_at": time.time(), "expected": 0, "done": 0, "workers": {}, "completed_at": None}
+
+
+class RunState:
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return _new_state()
+
+    # 락을 잡고 상태를 읽어 update(state)로 고친 뒤 임시 파일에 쓰고 rename
+    def _update(self, update):
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.lockf(lock_file, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                result = update(state)
+                tmp_path = f"{self.path}.tmp.{os.getpid()}.{threading.get_ident()}"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+                return state if result is None else result
+            finally:
+                fcntl.lockf(lock_file, fcntl.LOCK_UN)
+
+    def snapshot(self):
+        return self._read()
+
+    # 프로듀서: 끝난 실행이면 새 실행을 시작하고, 진행 중이면 기대 개수에 더함
+    def add_expected(self, count):
+        def update(state):
+            if state["completed_at"] is not None:
+                state.clear()
+                state.update(_new_state())
+            state["expected"] += count
+        return self._update(update)
+
+    def begin(self, worker_id, cafe_id):
+        def update(state):
+            state["workers"][worker_id] = {"status": "busy", "cafe_id": cafe_id, "until": time.time() + BUSY_TTL_SECONDS}
+        return self._update(update)
+
+    def finish(self, worker_id, completed):
+        def update(state):
+            state["workers"].pop(worker_id, None)
+            if completed:
+                state["done"] += 1
+        return self._update(update)
+
+    def leave(self, worker_id):
+        def update(state):
+            state["workers"].pop(worker_id, None)
+        return self._update(update)
+
+    def mark_completed(self):
+        def update(state):
+            state["completed_at"] = state["completed_at"] or time.time()
+        return self._update(update)
+
+    # 큐에서 받은 게 없을 때 할 일: "exit", "standby"(잠시 뒤 다시 받기), "check_queue"(아무도 처리 중이 아님, 큐의 남은 메시지 확인)
+    def decide_idle(self, worker_id):
+        def update(state):
+            now = time.time()
+            workers = state["workers"]
+            for other_id in [other_id for other_id, worker in workers.items() if worker["until"] <= now]:
+                del workers[other_id]
+            workers.pop(worker_id, None)
+            if state["completed_at"] is not None:
+                return "exit"
+            busy = sum(1 for worker in workers.values() if worker["status"] == "busy")
+            if busy == 0:
+                return "check_queue"
+            standby = sum(1 for worker in workers.values() if worker["status"] == "standby")
+            if standby >= RUN_STANDBY_WORKERS:
+                return "exit"
+            workers[worker_id] = {"status": "standby", "until": now + STANDBY_POLL_SECONDS * 3}
+            return "standby"
+        return self._update(update)
+
+
+def format_progress(state):
+    busy = sum(1 for worker in state["workers"].values() if worker["status"] == "busy")
+    return f"실행 진행: 완료 {state['done']}/{state['expected']}개, 처리 중 워커 {busy}개"
@@ -0,0 +1,97 @@
+import glob
+import json
+import math
+import os
+import socket
+import statistics
+import threading
+import time
+
+# 프로듀서가 카페를 큐에 넣는 순서/우선순위를 정하는 스케줄러
+# 워커는 작업이 끝날 때마다 카페별 수집 통계(API가 알려준 전체 리뷰 수, 저장된 리뷰 수, 완료 여부, 시각)를 남기고
+# 프로듀서는 이 통계로 카페마다 점수를 매겨 큰 작업부터(ljf) 또는 오래된 것 가중(stale)으로 정렬
+PAGE_SIZE = 50
+DEFAULT_POLICY = os.environ.get("CAFE_SCHEDULE_POLICY", "ljf") # ljf, stale, file(기존 파일 순서)
+STALENESS_DAYS = 7.0 # stale 정책에서 마지막 수집 후 이만큼 지나면 점수 2배
+NEVER_CRAWLED_STALENESS_DAYS = 30.0 # 한 번도 수집하지 않은 카페의 경과 일수로 간주
+TIER_SCORE_THRESHOLDS = (20, 4) # 점수가 이 이상이면 high, normal, 나머지 low (점수 단위는 예상 페이지 수)
+TIER_NAMES = ("high", "normal", "low")
+
+
+# 워커 프로세스마다 자기 파일에만 추가 기록 (EFS에서 여러 프로세스가 한 파일에 append 하지 않도록)
+class CrawlStatsLog:
+    def __init__(self, stats_dir):
+        self.stats_dir = stats_dir
+        self.path = f"{stats_dir}/stats-{socket.gethostname()}-{os.getpid()}.jsonl"
+        self._lock = threading.Lock()
+
+    def record(self, cafe_id, completed, total=None, review_count=None):
+        entry = {"cafe_id": cafe_id, "completed": completed, "total": total, "review_count": review_count, "at": time.time()}
+        with self._lock:
+            if not os.path.exists(self.stats_dir):
+                os.makedirs(self.stats_dir, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+# 카페별로 시각 순으로 합친 최신 통계 (값이 없는 항목은 이전 값 유지)
+def load_crawl_stats(stats_dir):
+    entries = []
+    for path in glob.glob(f"{stats_dir}/stats-*.jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    stats = {}
+    for entry in sorted(entries, key=lambda e: e["at"]):
+        stats.setdefault(entry["cafe_id"], {}).update({key: value for key, value in entry.items() if value is not None})
+    return stats
+
+
+def _tier(score):
+    for tier, threshold in enumerate(TIER_SCORE_THRESHOLDS):
+        if score >= threshold:
+            return tier
+    return len(TIER_SCORE_THRESHOLDS)
+
+# 카페별 예상 페이지 수와 점수를 계산해 점수 내림차순으로 반환 (같은 점수는 입력 순서 유지)
+#   전체 수집: 남은 리뷰(전체 - 저장된 수) 페이지, 전체 수를 모르면 알려진 카페들의 중앙값으로 추정
+#   갱신 수집(refresh): 완료된 카페는 마지막 수집 이후 쌓인 만큼만 (전체 리뷰가 대략 1년치라고 가정)
+def plan_schedule(cafe_ids, stats, completed_ids, policy=DEFAULT_POLICY, refresh=False, now=None):
+    now = now or time.time()
+    known_totals = [stat["total"] for stat in stats.values() if stat.get("total") is not None]
+    default_total = statistics.median(known_totals) if known_totals else PAGE_SIZE * 4
+
+    schedule = []
+    for cafe_id in cafe_ids:
+        completed = cafe_id in completed_ids
+        if completed and not refresh:
+            continue
+        stat = stats.get(cafe_id, {})
+        total = stat.get("total", default_total)
+        staleness_days = (now - stat["at"]) / 86400 if "at" in stat else NEVER_CRAWLED_STALENESS_DAYS
+
+        if completed:
+            pages = 1 + total * min(staleness_days / 365, 1) / PAGE_SIZE
+        else:
+            pages = max(1, math.ceil(max(total - stat.get("review_count", 0), 0) / PAGE_SIZE))
+
+        if policy == "stale":
+            score = pages * (1 + staleness_days / STALENESS_DAYS)
+        elif policy == "file":
+            score = 0
+        else:
+            score = pages
+        schedule.append({"cafe_id": cafe_id, "pages": pages, "score": score, "tier": _tier(score) if policy != "file" else 0})
+
+    schedule.sort(key=lambda job: job["score"], reverse=True)
+    return schedule
+
+def print_schedule_summary(schedule, policy):
+    print(f"스케줄 ({policy}): 카페 {len(schedule)}개, 예상 {sum(job['pages'] for job in schedule):,.0f}페이지")
+    for tier, name in enumerate(TIER_NAMES):
+        jobs = [job for job in schedule if job["tier"] == tier]
+        if jobs:
+            print(f"  [{name}] {len(jobs)}개, 예상 {sum(job['pages'] for job in jobs):,.0f}페이지 (최대 {jobs[0]['pages']:,.0f}페이지: {jobs[0]['cafe_id']})")
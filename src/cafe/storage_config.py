@@ -0,0 +1,13 @@
+import os
+from review_store import open_review_store
+
+# 수집 결과 저장 위치와 리뷰 저장소 종류 (크롤러와 내보내기처럼 저장소만 읽는 스크립트가 같이 사용)
+EFS_BASE_PATH = "/mnt/efs_data" # EFS 마운트 경로
+REVIEW_DIR = f"{EFS_BASE_PATH}/data/cafe_reviews"
+MARKER_DIR = f"{EFS_BASE_PATH}/data/cafe_reviews_completed" # 마커 파일 저장 위치
+SEGMENT_DIR = f"{EFS_BASE_PATH}/data/cafe_review_segments" # 세그먼트 저장소 샤드 위치
+REVIEW_STORE_KIND = os.environ.get("CAFE_REVIEW_STORE", "jsonl") # jsonl(카페별 파일) 또는 segment(압축 샤드)
+
+
+def open_configured_review_store():
+    return open_review_store(REVIEW_STORE_KIND, REVIEW_DIR, MARKER_DIR, SEGMENT_DIR)
@@ -0,0 +1,424 @@
+import collections
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+# 워커가 쓰는 작업 큐. 백엔드는 SQS(여러 머신) 또는 SQLite(한 머신에서 전체 수집/오프라인 벤치마크)
+#   공통: receive() -> Task 또는 None, ack(task), ack_now(task), nack(task, delay), extend(), send(queue_url, body, dedup_id), backlog(), stats(), close()
+#   가지고 있는 메시지는 하트비트 스레드가 가시성 제한 시간을 계속 연장 (긴 카페가 다른 워커에게 다시 보이지 않도록)
+# SQS
+#   - receive_message 한 번에 최대 prefetch개(1~10)를 받아 로컬 버퍼에 두고 하나씩 꺼내 씀
+#     버퍼에 둔 메시지도 연장 대상이라 다른 워커가 가져가지 못함 -> 처리 시간이 긴 워커(crawl.py)는 prefetch=1
+#   - 완료한 메시지는 모아서 delete_message_batch (10개가 모이거나, 하트비트 주기마다, 새로 받기 전에)
+#   - 삭제가 끝날 때까지는 하트비트가 계속 연장 (삭제 대기 중에 가시성이 끝나 다른 워커가 다시 받지 않도록)
+SQS_BATCH_SIZE = 10 # SQS 배치 API 최대 개수
+VISIBILITY_TIMEOUT_SECONDS = 300 # 하트비트가 연장할 때마다 다시 설정하는 가시성 제한 시간
+VISIBILITY_HEARTBEAT_SECONDS = 60
+NACK_DELAY_SECONDS = 60 # 실패한 작업이 큐에 다시 보이기까지의 시간
+LOCAL_POLL_SECONDS = 0.2 # SQLite 큐가 비었을 때 다시 확인하는 간격
+
+
+class Task:
+    def __init__(self, queue_url, message):
+        self.queue_url = queue_url
+        self.body = message['Body']
+        self.message_id = message['MessageId']
+        self.receipt_handle = message['ReceiptHandle']
+
+    def __repr__(self):
+        return f"Task({self.body!r})"
+
+
+def _chunks(items, size=SQS_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# 백엔드 공통 부분 (가지고 있는 메시지 목록, 하트비트, 호출 수 집계)
+class WorkQueue:
+    def _init_common(self, queue_urls, visibility_timeout, heartbeat_seconds):
+        self.queue_urls = list(queue_urls)
+        self.visibility_timeout = visibility_timeout
+        self.heartbeat_seconds = heartbeat_seconds
+        self.api_calls = collections.Counter() # 백엔드 호출 수 (메시지당 비용 확인용)
+        self._held = {} # message_id -> Task (받아 둔 것 + 처리 중, 하트비트 대상)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._run_heartbeat, daemon=True)
+        self._heartbeat.start()
+
+    def _run_heartbeat(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                self.extend()
+            except Exception as e:
+                print(f"가시성 연장 중 오류 (다음 주기에 재시도): {e}")
+
+    def _stop_heartbeat(self):
+        self._stop.set()
+        self._heartbeat.join()
+
+    def receive(self):
+        raise NotImplementedError
+
+    def ack(self, task):
+        raise NotImplementedError
+
+    # 모아서 지우지 않고 바로 삭제 (돌아왔을 때 메시지가 이미 지워져 있어야 하는 경우)
+    def ack_now(self, task):
+        self.ack(task)
+
+    def nack(self, task, delay=NACK_DELAY_SECONDS):
+        raise NotImplementedError
+
+    def extend(self):
+        raise NotImplementedError
+
+    def send(self, queue_url, body, dedup_id=None):
+        raise NotImplementedError
+
+    def backlog(self):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return dict(self.api_calls)
+
+
+class SqsWorkQueue(WorkQueue):
+    def __init__(self, sqs, queue_urls, prefetch=SQS_BATCH_SIZE, wait_seconds=20,
+                 visibility_timeout=VISIBILITY_TIMEOUT_SECONDS, heartbeat_seconds=VISIBILITY_HEARTBEAT_SECONDS):
+        self.sqs = sqs
+        self.prefetch = prefetch
+        self.wait_seconds = wait_seconds
+        self._buffer = collections.deque()
+        self._pending_deletes = []
+        self._fill_lock = threading.Lock() # 여러 스레드(비동기 슬롯)가 동시에 받아서 메시지를 쌓아두지 않도록
+        self._init_common(queue_urls, visibility_timeout, heartbeat_seconds)
+
+    def _call(self, name, **kwargs):
+        self.api_calls[name] += 1
+        return getattr(self.sqs, name)(**kwargs)
+
+    # 우선순위가 높은 큐부터 확인, 마지막 큐에서만 롱폴링 (큐가 하나면 기존과 동일)
+    def _fill(self):
+        for index, queue_url in enumerate(self.queue_urls):
+            response = self._call(
+                "receive_message",
+                QueueUrl=queue_url,
+                MaxNumberOfMessages=self.prefetch,
+                WaitTimeSeconds=self.wait_seconds if index == len(self.queue_urls) - 1 else 0,
+            )
+            messages = response.get('Messages', [])
+            if messages:
+                with self._lock:
+                    for message in messages:
+                        task = Task(queue_url, message)
+                        self._buffer.append(task)
+                        self._held[task.message_id] = task
+                return
+
+    # 버퍼에서 하나 꺼냄. 비었으면 모아둔 삭제를 먼저 보내고 큐에서 새로 받음. 큐가 비었으면 None
+    def receive(self):
+        with self._lock:
+            if self._buffer:
+                return self._buffer.popleft()
+        with self._fill_lock:
+            with self._lock:
+                if self._buffer:
+                    return self._buffer.popleft()
+            self.flush()
+            self._fill()
+            with self._lock:
+                return self._buffer.popleft() if self._buffer else None
+
+    # 완료: 삭제 대기열에 추가 (10개가 모이면 바로 전송). 삭제될 때까지 하트비트 대상에는 남겨 둠
+    def ack(self, task):
+        with self._lock:
+            self._pending_deletes.append(task)
+            should_flush = len(self._pending_deletes) >= SQS_BATCH_SIZE
+        if should_flush:
+            self.flush()
+
+    # 바로 삭제, 삭제가 끝난 뒤에 하트비트 대상에서 뺌
+    def ack_now(self, task):
+        response = self._call(
+            "delete_message_batch",
+            QueueUrl=task.queue_url,
+            Entries=[{'Id': '0', 'ReceiptHandle': task.receipt_handle}],
+        )
+        with self._lock:
+            self._held.pop(task.message_id, None)
+        if response.get('Failed'):
+            print(f"[경고] 메시지 삭제 실패 (다시 보이면 완료 표시로 스킵됨): {response['Failed']}")
+
+    # 실패: 연장을 멈추고 delay초 뒤에 다시 보이도록 (다른 워커가 재시도)
+    def nack(self, task, delay=NACK_DELAY_SECONDS):
+        with self._lock:
+            self._held.pop(task.message_id, None)
+        self._call("change_message_visibility", QueueUrl=task.queue_url, ReceiptHandle=task.receipt_handle, VisibilityTimeout=delay)
+
+    # FIFO 큐는 그룹 ID와 중복 제거 ID가 필수 (프로듀서와 같이 카페마다 그룹, 중복 제거 ID가 없으면 매번 새로 만듦)
+    def send(self, queue_url, body, dedup_id=None):
+        if queue_url.endswith(".fifo"):
+            self._call("send_message", QueueUrl=queue_url, MessageBody=body,
+                       MessageGroupId=body, MessageDeduplicationId=dedup_id or uuid.uuid4().hex)
+        else:
+            self._call("send_message", QueueUrl=queue_url, MessageBody=body)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending_deletes = self._pending_deletes, []
+        by_queue = collections.defaultdict(list)
+        for task in pending:
+            by_queue[task.queue_url].append(task)
+        for queue_url, tasks in by_queue.items():
+            for chunk in _chunks(tasks):
+                try:
+                    response = self._call(
+                        "delete_message_batch",
+                        QueueUrl=queue_url,
+                        Entries=[{'Id': str(i), 'ReceiptHandle': task.receipt_handle} for i, task in enumerate(chunk)],
+                    )
+                except Exception:
+                    # 아직 지우지 못한 것은 대기열로 되돌림 (계속 연장되다가 다음 전송에서 다시 시도)
+                    with self._lock:
+                        self._pending_deletes.extend(task for task in pending if task.message_id in self._held)
+                    raise
+                if response.get('Failed'):
+                    print(f"[경고] 메시지 {len(response['Failed'])}개 삭제 실패 (다시 보이면 완료 표시로 스킵됨): {response['Failed']}")
+                # 삭제를 보낸 뒤에야 하트비트 대상에서 뺌 (실패한 것도 더 연장하지 않음)
+                with self._lock:
+                    for task in chunk:
+                        self._held.pop(task.message_id, None)
+
+    # 삭제 대기 중인 메시지를 먼저 지우고, 남은(처리 중인) 메시지의 가시성 제한 시간을 연장
+    def extend(self):
+        self.flush()
+        with self._lock:
+            held = list(self._held.values())
+        by_queue = collections.defaultdict(list)
+        for task in held:
+            by_queue[task.queue_url].append(task)
+        for queue_url, tasks in by_queue.items():
+            for chunk in _chunks(tasks):
+                response = self._call(
+                    "change_message_visibility_batch",
+                    QueueUrl=queue_url,
+                    Entries=[
+                        {'Id': str(i), 'ReceiptHandle': task.receipt_handle, 'VisibilityTimeout': self.visibility_timeout}
+                        for i, task in enumerate(chunk)
+                    ],
+                )
+                if response.get('Failed'):
+                    print(f"[경고] 메시지 {len(response['Failed'])}개 가시성 연장 실패: {response['Failed']}")
+
+    # 모든 큐의 (대기 메시지 수, 처리 중 메시지 수) 합
+    def backlog(self):
+        visible_count = 0
+        inflight_count = 0
+        for queue_url in self.queue_urls:
+            attrs = self._call(
+                "get_queue_attributes",
+                QueueUrl=queue_url,
+                AttributeNames=[
+                    'ApproximateNumberOfMessages',          # 큐에 보이는 메시지 수
+                    'ApproximateNumberOfMessagesNotVisible' # '처리 중'(투명)인 메시지 수
+                ]
+            )
+            visible_count += int(attrs['Attributes']['ApproximateNumberOfMessages'])
+            inflight_count += int(attrs['Attributes']['ApproximateNumberOfMessagesNotVisible'])
+        return visible_count, inflight_count
+
+    # 종료: 모아둔 삭제 전송, 손대지 않은 버퍼 메시지는 바로 다시 보이게 돌려줌
+    def close(self):
+        self._stop_heartbeat()
+        self.flush()
+        with self._lock:
+            unprocessed = list(self._buffer)
+            self._buffer.clear()
+            self._held.clear()
+        for task in unprocessed:
+            self.nack(task, delay=0)
+
+
+# 한 머신용 로컬 큐. 여러 워커 프로세스가 같은 DB 파일을 공유 (락 SQLite 백엔드와 같은 방식: 기본 저널 + BEGIN IMMEDIATE)
+#   queue_urls는 큐 이름으로 사용 (SQS URL을 그대로 넘겨도 마지막 경로(큐 이름)만 사용)
+#   ReceiptHandle은 받을 때마다 새로 만들어서, 가시성이 끝나 다른 워커가 다시 받은 메시지를 예전 워커가 지우지 못하게 함
+#   같은 중복 제거 ID의 메시지가 아직 큐에 있으면 보내도 무시 (프로듀서 재실행이 중복을 만들지 않도록)
+class SqliteWorkQueue(WorkQueue):
+    def __init__(self, path, queue_urls, wait_seconds=20,
+                 visibility_timeout=VISIBILITY_TIMEOUT_SECONDS, heartbeat_seconds=VISIBILITY_HEARTBEAT_SECONDS):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.wait_seconds = wait_seconds
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, queue TEXT NOT NULL, body TEXT NOT NULL,"
+            " dedup_id TEXT, visible_at REAL NOT NULL, receipt TEXT, receive_count INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_visible ON messages (queue, visible_at)")
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS messages_dedup ON messages (queue, dedup_id) WHERE dedup_id IS NOT NULL")
+        self._init_common([queue_name(url) for url in queue_urls], visibility_timeout, heartbeat_seconds)
+
+    def _execute(self, name, sql, params=()):
+        self.api_calls[name] += 1
+        return self._conn.execute(sql, params)
+
+    def _receive_once(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for queue in self.queue_urls:
+                    row = self._execute(
+                        "receive", "SELECT id, body FROM messages WHERE queue = ? AND visible_at <= ? ORDER BY visible_at, id LIMIT 1", (queue, now),
+                    ).fetchone()
+                    if row:
+                        receipt = f"{row[0]}:{uuid.uuid4().hex}"
+                        self._conn.execute(
+                            "UPDATE messages SET visible_at = ?, receipt = ?, receive_count = receive_count + 1 WHERE id = ?",
+                            (now + self.visibility_timeout, receipt, row[0]),
+                        )
+                        self._conn.execute("COMMIT")
+                        task = Task(queue, {'Body': row[1], 'MessageId': str(row[0]), 'ReceiptHandle': receipt})
+                        self._held[task.message_id] = task
+                        return task
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return None
+
+    # 우선순위 순서로 보이는 메시지 하나. 없으면 wait_seconds 동안 다시 확인 (SQS 롱폴링 대신)
+    def receive(self):
+        deadline = time.time() + self.wait_seconds
+        while True:
+            task = self._receive_once()
+            if task is not None or time.time() >= deadline or self._stop.is_set():
+                return task
+            time.sleep(min(LOCAL_POLL_SECONDS, max(deadline - time.time(), 0)))
+
+    def ack(self, task):
+        with self._lock:
+            self._held.pop(task.message_id, None)
+            deleted = self._execute("ack", "DELETE FROM messages WHERE id = ? AND receipt = ?", (int(task.message_id), task.receipt_handle)).rowcount
+        if not deleted:
+            print(f"[경고] 메시지 삭제 실패 (다른 워커가 다시 받음, 다시 보이면 완료 표시로 스킵됨): {task}")
+
+    def nack(self, task, delay=NACK_DELAY_SECONDS):
+        with self._lock:
+            self._held.pop(task.message_id, None)
+            self._execute(
+                "nack", "UPDATE messages SET visible_at = ? WHERE id = ? AND receipt = ?", (time.time() + delay, int(task.message_id), task.receipt_handle),
+            )
+
+    def send(self, queue_url, body, dedup_id=None):
+        self.send_many(queue_url, [body], [dedup_id])
+
+    # 한 트랜잭션으로 여러 개 추가, 실제로 추가된 개수 반환 (프로듀서용)
+    def send_many(self, queue_url, bodies, dedup_ids=None):
+        now = time.time()
+        queue = queue_name(queue_url)
+        dedup_ids = dedup_ids or [None] * len(bodies)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self.api_calls["send"] += 1
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO messages (queue, body, dedup_id, visible_at) VALUES (?, ?, ?, ?)",
+                    [(queue, body, dedup_id, now) for body, dedup_id in zip(bodies, dedup_ids)],
+                )
+                added = self._conn.total_changes - before
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def extend(self):
+        with self._lock:
+            held = list(self._held.values())
+            if not held:
+                return
+            self.api_calls["extend"] += 1
+            self._conn.executemany(
+                "UPDATE messages SET visible_at = ? WHERE id = ? AND receipt = ?",
+                [(time.time() + self.visibility_timeout, int(task.message_id), task.receipt_handle) for task in held],
+            )
+
+    def backlog(self):
+        now = time.time()
+        with self._lock:
+            visible_count, inflight_count = self._execute(
+                "backlog",
+                "SELECT COALESCE(SUM(visible_at <= ?), 0), COALESCE(SUM(visible_at > ?), 0) FROM messages WHERE queue IN (%s)" % ",".join("?" * len(self.queue_urls)),
+                (now, now, *self.queue_urls),
+            ).fetchone()
+        return visible_count, inflight_count
+
+    # 처리하지 않은 채 가지고 있던 메시지는 바로 다시 보이게 돌려줌
+    def close(self):
+        self._stop_heartbeat()
+        with self._lock:
+            unprocessed = list(self._held.values())
+        for task in unprocessed:
+            self.nack(task, delay=0)
+        with self._lock:
+            self._conn.close()
+
+
+def queue_name(queue_url):
+    return queue_url.rstrip("/").rsplit("/", 1)[-1]
+
+# kind: sqs(sqs 클라이언트 필요) 또는 sqlite(db_path 필요)
+def open_work_queue(kind, queue_urls, sqs=None, db_path=None, prefetch=SQS_BATCH_SIZE, wait_seconds=20):
+    if kind == "sqlite":
+        return SqliteWorkQueue(db_path, queue_urls, wait_seconds=wait_seconds)
+    if kind == "sqs":
+        return SqsWorkQueue(sqs, queue_urls, prefetch=prefetch, wait_seconds=wait_seconds)
+    raise ValueError(f"알 수 없는 작업 큐 백엔드: {kind}")
+
+
+# 로컬 큐 처리량 확인: python work_queue.py [메시지 수] [스레드 수] [DB 경로]
+if __name__ == "__main__":
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    thread_count = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    db_path = sys.argv[3] if len(sys.argv) > 3 else f"/tmp/cafe_queue_bench_{os.getpid()}.sqlite3"
+
+    producer_queue = SqliteWorkQueue(db_path, ["bench"])
+    started_at = time.time()
+    producer_queue.send_many("bench", [str(i) for i in range(message_count)], [str(i) for i in range(message_count)])
+    print(f"전송: {message_count}개 {time.time() - started_at:.2f}초")
+
+    processed = collections.Counter()
+    def consume(worker_id):
+        # 워커 프로세스마다 연결 하나인 상황을 흉내내서 스레드마다 따로 염
+        work_queue = SqliteWorkQueue(db_path, ["bench"], wait_seconds=0)
+        while True:
+            task = work_queue.receive()
+            if task is None:
+                break
+            work_queue.ack(task)
+            processed[worker_id] += 1
+        work_queue.close()
+
+    started_at = time.time()
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started_at
+    print(f"수신+삭제: {sum(processed.values())}개 {elapsed:.2f}초 ({sum(processed.values()) / elapsed:,.0f}개/초, 스레드 {thread_count}개)")
+    print(f"남은 메시지 (대기, 처리 중): {producer_queue.backlog()}")
+    producer_queue.close()
+    os.remove(db_path)
@@ -0,0 +1,48 @@
+import time
+import pytest
+import crawl
+from mock_server import start_mock_server
+from rate_limit import HostRateLimiter
+from review_api import ReviewSession
+
+# 테스트 공용: 목 서버, 브라우저 없이 쓰는 리뷰 세션, 임시 디렉토리를 쓰는 crawl 설정
+
+
+@pytest.fixture
+def mock_server():
+    server = start_mock_server(asset_delay=0)
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def rate_limiter(tmp_path):
+    return HostRateLimiter(rate=1000, burst=100, state_dir=str(tmp_path / "rate_limit"))
+
+# 쿠키 부트스트랩은 이미 끝난 것으로 둠 (부트스트랩 자체는 test_review_api.py에서 확인)
+@pytest.fixture
+def review_session(mock_server, rate_limiter):
+    session = ReviewSession(api_url=mock_server.base_url + "/graphql", base_url=mock_server.base_url, rate_limiter=rate_limiter)
+    session.bootstrapped_at = time.time()
+    yield session
+    session.close()
+
+# crawl의 EFS 경로를 임시 디렉토리로 바꾸고 지연 생성되는 전역 객체를 비움
+@pytest.fixture
+def crawl_env(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    monkeypatch.setattr(crawl, "REVIEW_DIR", str(data_dir / "reviews"))
+    monkeypatch.setattr(crawl, "MARKER_DIR", str(data_dir / "markers"))
+    monkeypatch.setattr(crawl, "LOCK_DIR", str(data_dir / "locks"))
+    monkeypatch.setattr(crawl, "SEGMENT_DIR", str(data_dir / "segments"))
+    monkeypatch.setattr(crawl, "CRAWL_STATS_DIR", str(data_dir / "stats"))
+    monkeypatch.setattr(crawl, "RUN_STATE_PATH", str(data_dir / "run_state.json"))
+    monkeypatch.setattr(crawl, "COMPLETION_INDEX_PATH", str(data_dir / "completion.sqlite3"))
+    monkeypatch.setattr(crawl, "LEASE_BACKEND", "file")
+    monkeypatch.setattr(crawl, "next_page_delay", lambda: 0)
+    for name in ("_review_store", "_crawl_stats", "_lease_manager", "_run_state", "_completion_index", "_completed_reviews"):
+        monkeypatch.setattr(crawl, name, None)
+    yield crawl
+    if crawl._completion_index is not None:
+        crawl._completion_index.close()
@@ -0,0 +1,149 @@
+import itertools
+import threading
+import time
+import uuid
+
+# 로컬 실행/확인용 메모리 SQS (boto3 SQS 클라이언트에서 워커가 쓰는 메서드만)
+# 가시성 제한 시간, 수신할 때마다 바뀌는 ReceiptHandle, 배치 API의 Successful/Failed 응답을 흉내냄
+#   sqs = FakeSqsClient(); sqs.create_queue(QueueName="cafe_queue")["QueueUrl"]
+
+
+class FakeSqsClient:
+    def __init__(self, default_visibility_timeout=30, max_wait_seconds=None):
+        self.default_visibility_timeout = default_visibility_timeout
+        self.max_wait_seconds = max_wait_seconds # 롱폴링 대기 상한 (확인을 빨리 끝내고 싶을 때)
+        self.calls = []
+        self._queues = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def create_queue(self, QueueName, Attributes=None):
+        queue_url = f"https://fake-sqs.local/000000000000/{QueueName}"
+        with self._condition:
+            self._queues.setdefault(queue_url, {"messages": {}, "dedup": {}, "fifo": QueueName.endswith(".fifo")})
+        return {"QueueUrl": queue_url}
+
+    def _queue(self, queue_url):
+        if queue_url not in self._queues:
+            raise KeyError(f"존재하지 않는 큐: {queue_url}")
+        return self._queues[queue_url]
+
+    def _put(self, queue_url, body, dedup_id=None, group_id=None):
+        queue = self._queue(queue_url)
+        if queue["fifo"] and (group_id is None or dedup_id is None):
+            # 실제 SQS는 FIFO 큐에 그룹 ID가 없거나 (콘텐츠 기반 중복 제거를 켜지 않은 큐에) 중복 제거 ID가 없는 메시지를 거부
+            raise ValueError(f"FIFO 큐에는 MessageGroupId와 MessageDeduplicationId가 필요합니다: {queue_url}")
+        now = time.time()
+        # FIFO 큐는 5분 안에 같은 중복 제거 ID로 보낸 메시지를 무시
+        if dedup_id is not None and queue["fifo"]:
+            previous = queue["dedup"].get(dedup_id)
+            if previous and now - previous[1] < 300:
+                return previous[0]
+        message_id = str(uuid.uuid4())
+        queue["messages"][message_id] = {"body": body, "visible_at": now, "receipt": None, "seq": next(self._sequence)}
+        if dedup_id is not None and queue["fifo"]:
+            queue["dedup"][dedup_id] = (message_id, now)
+        self._condition.notify_all()
+        return message_id
+
+    def send_message(self, QueueUrl, MessageBody, MessageGroupId=None, MessageDeduplicationId=None):
+        self.calls.append("send_message")
+        with self._condition:
+            return {"MessageId": self._put(QueueUrl, MessageBody, MessageDeduplicationId, MessageGroupId)}
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls.append("send_message_batch")
+        with self._condition:
+            successful = [
+                {"Id": entry["Id"], "MessageId": self._put(QueueUrl, entry["MessageBody"], entry.get("MessageDeduplicationId"), entry.get("MessageGroupId"))}
+                for entry in Entries
+            ]
+        return {"Successful": successful, "Failed": []}
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages=1, WaitTimeSeconds=0, VisibilityTimeout=None):
+        self.calls.append("receive_message")
+        wait_seconds = WaitTimeSeconds if self.max_wait_seconds is None else min(WaitTimeSeconds, self.max_wait_seconds)
+        deadline = time.time() + wait_seconds
+        with self._condition:
+            while True:
+                queue = self._queue(QueueUrl)
+                now = time.time()
+                visible = sorted(
+                    (item for item in queue["messages"].items() if item[1]["visible_at"] <= now),
+                    key=lambda item: item[1]["seq"],
+                )[:MaxNumberOfMessages]
+                if visible or now >= deadline:
+                    break
+                self._condition.wait(min(deadline - now, 0.1))
+
+            messages = []
+            for message_id, message in visible:
+                message["receipt"] = f"{message_id}:{uuid.uuid4()}"
+                message["visible_at"] = now + (VisibilityTimeout if VisibilityTimeout is not None else self.default_visibility_timeout)
+                messages.append({"MessageId": message_id, "ReceiptHandle": message["receipt"], "Body": message["body"]})
+        return {"Messages": messages} if messages else {}
+
+    def _find(self, queue_url, receipt_handle):
+        message_id = receipt_handle.split(":", 1)[0]
+        message = self._queue(queue_url)["messages"].get(message_id)
+        # 다시 수신된 메시지의 예전 ReceiptHandle은 무효
+        if message is None or message["receipt"] != receipt_handle:
+            return None, None
+        return message_id, message
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        self.calls.append("delete_message")
+        with self._condition:
+            message_id, message = self._find(QueueUrl, ReceiptHandle)
+            if message_id:
+                del self._queue(QueueUrl)["messages"][message_id]
+        return {}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        self.calls.append("delete_message_batch")
+        successful, failed = [], []
+        with self._condition:
+            for entry in Entries:
+                message_id, message = self._find(QueueUrl, entry["ReceiptHandle"])
+                if message_id:
+                    del self._queue(QueueUrl)["messages"][message_id]
+                    successful.append({"Id": entry["Id"]})
+                else:
+                    failed.append({"Id": entry["Id"], "Code": "ReceiptHandleIsInvalid", "SenderFault": True})
+        return {"Successful": successful, "Failed": failed}
+
+    def _change_visibility(self, queue_url, receipt_handle, timeout):
+        message_id, message = self._find(queue_url, receipt_handle)
+        if message_id is None:
+            return False
+        message["visible_at"] = time.time() + timeout
+        self._condition.notify_all()
+        return True
+
+    def change_message_visibility(self, QueueUrl, ReceiptHandle, VisibilityTimeout):
+        self.calls.append("change_message_visibility")
+        with self._condition:
+            self._change_visibility(QueueUrl, ReceiptHandle, VisibilityTimeout)
+        return {}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        self.calls.append("change_message_visibility_batch")
+        successful, failed = [], []
+        with self._condition:
+            for entry in Entries:
+                if self._change_visibility(QueueUrl, entry["ReceiptHandle"], entry["VisibilityTimeout"]):
+                    successful.append({"Id": entry["Id"]})
+                else:
+                    failed.append({"Id": entry["Id"], "Code": "ReceiptHandleIsInvalid", "SenderFault": True})
+        return {"Successful": successful, "Failed": failed}
+
+    def get_queue_attributes(self, QueueUrl, AttributeNames=None):
+        self.calls.append("get_queue_attributes")
+        with self._condition:
+            now = time.time()
+            messages = self._queue(QueueUrl)["messages"].values()
+            visible = sum(1 for message in messages if message["visible_at"] <= now)
+            return {"Attributes": {
+                "ApproximateNumberOfMessages": str(visible),
+                "ApproximateNumberOfMessagesNotVisible": str(len(messages) - visible),
+            }}
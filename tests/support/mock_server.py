@@ -0,0 +1,324 @@
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# 로컬 실행/부하 측정용 가짜 pcmap 서버
+# ReviewSession(api_url=..., base_url=...)을 여기로 향하게 하면 네트워크 없이 전체 흐름 재현 가능
+#   GET  /restaurant/{id}/home, /restaurant/{id}/review/visitor, /restaurant/list -> 인라인 APOLLO_STATE + 이미지/폰트/영상/분석 스크립트가 붙은 HTML, 쿠키 발급
+#     (challenge_rate 비율로 APOLLO_STATE 없는 보안 확인 페이지)
+#   GET  /static/...                      -> 크기가 정해진 가짜 리소스 (asset_delay만큼 늦게 응답, 리소스 차단 효과 측정용)
+#   POST /graphql (getVisitorReviews)     -> 커서 기반 페이징 응답
+#   POST /graphql (getRestaurants)        -> start/display 기반 카페 목록 (검색어/타일이 겹치면 같은 카페가 나옴)
+
+PAGE_SIZE_DEFAULT = 50
+VISIT_TIME_BASE = datetime(2024, 1, 1, 12)
+
+
+def review_total_for(business_id):
+    # 같은 ID면 항상 같은 리뷰 수 (0 ~ 500)
+    return zlib.crc32(str(business_id).encode()) % 501
+
+def visit_hours_of(index, visit_jitter_hours=0):
+    if not visit_jitter_hours:
+        return index
+    return index - zlib.crc32(str(index).encode()) % (visit_jitter_hours + 1)
+
+def make_review_item(business_id, index, visit_jitter_hours=0):
+    # 실제 응답처럼 full 프로필이 요청하는 필드를 모두 채운 아이템 (요청된 필드만 골라서 응답)
+    author_index = index % 97
+    return {
+        "id": f"{business_id}-{index}",
+        "reviewId": f"{business_id}-{index}",
+        "cursor": str(index + 1),
+        "rating": None,
+        "author": {
+            "id": f"author{author_index}", "nickname": f"user{author_index}", "from": "",
+            "imageUrl": f"https://example.invalid/profile/{author_index}.jpg",
+            "borderImageUrl": None, "objectId": f"obj{author_index}",
+            "url": f"https://example.invalid/my/{author_index}",
+            "review": {"totalCount": author_index * 3, "imageCount": author_index, "avgRating": 4.5, "__typename": "AuthorReviewStat"},
+            "theme": {"totalCount": 0, "__typename": "AuthorThemeStat"},
+            "isFollowing": False, "followerCount": author_index, "followRequested": False,
+            "__typename": "VisitorReviewAuthor",
+        },
+        "body": f"리뷰 본문 {index} " * 5,
+        "thumbnail": f"https://example.invalid/thumb/{index}.jpg",
+        "media": [
+            {"type": "image", "thumbnail": f"https://example.invalid/media/{index}-{m}.jpg", "thumbnailRatio": 1.33,
+             "class": "", "videoId": None, "videoUrl": None, "trailerUrl": None, "__typename": "VisitorReviewMedia"}
+            for m in range(index % 4)
+        ],
+        "tags": ["분위기", "디저트"],
+        "status": "ACTIVE",
+        "visitCount": index % 5 + 1,
+        "viewCount": index * 7,
+        "visited": "1.1.토",
+        "created": "1.2.일",
+        "reply": None,
+        "originType": "",
+        "item": None,
+        "language": "ko",
+        "highlightRanges": [],
+        "apolloCacheId": f"VisitorReview:{business_id}-{index}",
+        "translatedText": None,
+        "businessName": "목 카페",
+        "showBookingItemName": False,
+        "bookingItemName": None,
+        "votedKeywords": [
+            {"code": f"k{k}", "iconUrl": f"https://example.invalid/icon/{k}.png", "iconCode": f"i{k}", "name": f"키워드{k}", "__typename": "VotedKeyword"}
+            for k in range(3)
+        ],
+        "userIdno": None,
+        "loginIdno": None,
+        "receiptInfoUrl": None,
+        "reactionStat": {"id": f"r{index}", "typeCount": [{"name": "fun", "count": 1, "__typename": "TypeCount"}], "totalCount": 1, "__typename": "ReactionStat"},
+        "hasViewerReacted": {"id": f"r{index}", "reacted": False, "__typename": "HasViewerReacted"},
+        "nickname": f"user{author_index}",
+        "showPaymentInfo": False,
+        "visitCategories": [
+            {"code": "c1", "name": "방문 목적", "keywords": [{"code": "kw1", "name": "데이트", "__typename": "Keyword"}], "__typename": "VisitCategory"}
+        ],
+        # 인덱스가 클수록 최근 방문 (최신순 정렬 확인용), visit_jitter_hours를 주면 방문 시각이 작성 순서와 어긋남 (오래전 방문을 늦게 올린 리뷰)
+        "representativeVisitDateTime": (VISIT_TIME_BASE + timedelta(hours=visit_hours_of(index, visit_jitter_hours))).strftime("%Y-%m-%dT%H:%M:%S.000+09:00"),
+        "showRepresentativeVisitDateTime": True,
+        "__typename": "VisitorReview",
+    }
+
+# GraphQL 쿼리의 선택 필드를 {필드: 하위 선택 또는 None} 형태로 변환 (인자 괄호는 무시)
+def parse_selection(query):
+    query = re.sub(r"\([^)]*\)", "", query)
+    tokens = re.findall(r"[A-Za-z_][A-Za-z0-9_]*|[{}]", query)
+    root = {}
+    stack = [root]
+    last_field = None
+    for token in tokens[tokens.index("{") + 1:]:
+        if token == "{":
+            child = {}
+            stack[-1][last_field] = child
+            stack.append(child)
+        elif token == "}":
+            stack.pop()
+            if not stack:
+                break
+        else:
+            stack[-1][token] = None
+            last_field = token
+    return root
+
+def prune(value, selection):
+    if selection is None:
+        return value
+    if isinstance(value, list):
+        return [prune(v, selection) for v in value]
+    if isinstance(value, dict):
+        return {k: prune(value.get(k), sub) for k, sub in selection.items()}
+    return value
+
+# sort="recent"면 최근에 작성된 리뷰(큰 인덱스)부터, 커서는 리뷰 인덱스라 앞에 새 리뷰가 생겨도 이어받기 가능
+def make_review_page(business_id, after, size, query=None, sort=None, extra_reviews=0, visit_jitter_hours=0):
+    total = review_total_for(business_id) + extra_reviews
+    if sort == "recent":
+        start = int(after) - 1 if after else total
+        indexes = range(start - 1, max(start - 1 - size, -1), -1)
+    else:
+        start = int(after) if after else 0
+        indexes = range(start, min(start + size, total))
+    items = [make_review_item(business_id, i, visit_jitter_hours) for i in indexes]
+    result = {
+        "items": items, "total": total,
+        "starDistribution": [{"score": s, "count": total // 5, "__typename": "StarDistribution"} for s in range(1, 6)],
+        "hideProductSelectBox": True, "showRecommendationSort": True,
+        "itemReviewStats": [], "__typename": "VisitorReviewsResult",
+    }
+    if query:
+        result = prune(result, parse_selection(query).get("visitorReviews"))
+    return [{"data": {"visitorReviews": result}}]
+
+
+# 페이지 HTML이 불러오는 리소스: 경로 -> (Content-Type, 바이트 수)
+PAGE_IMAGE_COUNT = 12
+STATIC_ASSETS = {
+    "/static/app.css": ("text/css", 8 * 1024),
+    "/static/app.js": ("application/javascript", 40 * 1024),
+    "/static/wcslog.js": ("application/javascript", 20 * 1024),
+    "/static/nanum.woff2": ("font/woff2", 60 * 1024),
+    "/static/clip.mp4": ("video/mp4", 512 * 1024),
+    **{f"/static/img/{i}.jpg": ("image/jpeg", 80 * 1024) for i in range(PAGE_IMAGE_COUNT)},
+}
+
+CHALLENGE_PAGE = '<html><body><div id="captcha">비정상적인 접근이 감지되었습니다.</div></body></html>'
+
+def make_static_asset(path):
+    content_type, size = STATIC_ASSETS[path]
+    if path.endswith(".css"):
+        head = "@font-face{font-family:mock;src:url(/static/nanum.woff2)}body{font-family:mock}/*"
+        return content_type, (head + "x" * (size - len(head) - 2) + "*/").encode()
+    if path.endswith(".js"):
+        head = "/*"
+        return content_type, (head + "x" * (size - 4) + "*/").encode()
+    return content_type, bytes(size)
+
+def make_detail_apollo_state(business_id):
+    state = {
+        f"PlaceDetailBase:{business_id}": {"__typename": "PlaceDetailBase", "id": business_id, "name": f"목 카페 {business_id}", "category": "카페"},
+        "ROOT_QUERY": {"__typename": "Query", f'placeDetail({{"input":{{"id":"{business_id}"}}}})': {"__typename": "PlaceDetail", "description": "목 설명"}},
+    }
+    for i in range(5):
+        state[f"Menu:{business_id}_{i}"] = {"__typename": "Menu", "name": f"메뉴 {i}", "price": str(4000 + i * 500)}
+    return state
+
+def make_list_apollo_state(list_input):
+    result = make_restaurant_list_page({**list_input, "start": 1, "display": PAGE_SIZE_DEFAULT})[0]["data"]["restaurants"]
+    state = {"ROOT_QUERY": {"__typename": "Query", f'restaurantList({json.dumps({"input": list_input}, ensure_ascii=False)})': {
+        "__typename": "RestaurantListResult", "total": result["total"], "items": [{"__ref": f"RestaurantListSummary:{item['id']}"} for item in result["items"]],
+    }}}
+    for item in result["items"]:
+        state[f"RestaurantListSummary:{item['id']}"] = item
+    return state
+
+def make_place_page(path, params):
+    match = re.match(r"/restaurant/(\d+)/", path)
+    if match:
+        state = make_detail_apollo_state(match.group(1))
+    else:
+        state = make_list_apollo_state({key: values[0] for key, values in params.items()})
+    images = "".join(f'<img src="/static/img/{i}.jpg">' for i in range(PAGE_IMAGE_COUNT))
+    return (
+        '<html><head><link rel="stylesheet" href="/static/app.css">'
+        '<script src="/static/app.js"></script><script src="/static/wcslog.js"></script></head><body>'
+        "<script>var naver=typeof naver!=='undefined'?naver:{};window.__APOLLO_STATE__ = "
+        + json.dumps(state, ensure_ascii=False) + ";</script>"
+        + images + '<video src="/static/clip.mp4" autoplay muted></video></body></html>'
+    )
+
+
+def list_total_for(list_input):
+    key = f"{list_input.get('query')}|{list_input.get('bounds')}"
+    return 20 + zlib.crc32(key.encode()) % 281
+
+# 카페 id는 1000개 풀에서 뽑아서 서로 다른 검색 결과 사이에 중복이 생기게 함
+def make_restaurant_list_page(list_input):
+    total = list_total_for(list_input)
+    offset = zlib.crc32(str(list_input.get("bounds")).encode()) % 1000
+    start = int(list_input.get("start", 1)) - 1
+    indexes = range(start, min(start + int(list_input.get("display", PAGE_SIZE_DEFAULT)), total))
+    items = [
+        {"id": str(1000000 + (offset + i) % 1000), "name": f"목 카페 {(offset + i) % 1000}", "category": "카페", "__typename": "RestaurantListSummary"}
+        for i in indexes
+    ]
+    return [{"data": {"restaurants": {"items": items, "total": total, "__typename": "RestaurantListResult"}}}]
+
+
+class MockPlaceHandler(BaseHTTPRequestHandler):
+    server_version = "MockPlace/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, content_type, data, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server.stats_lock:
+            self.server.bytes_served += len(data)
+            self.server.requests_served += 1
+
+    def _send_json(self, status, body, headers=None):
+        self._send(status, "application/json", json.dumps(body, ensure_ascii=False).encode("utf-8"), headers)
+
+    # throttle_next가 남아 있으면 하나 줄이고 True (정해진 횟수만큼 429를 돌려줄 때)
+    def _take_throttle(self):
+        with self.server.stats_lock:
+            if self.server.throttle_next > 0:
+                self.server.throttle_next -= 1
+                return True
+            return False
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path in STATIC_ASSETS:
+            time.sleep(self.server.asset_delay)
+            content_type, data = make_static_asset(path)
+            self._send(200, content_type, data, {"Cache-Control": "no-store"})
+            return
+        if self._take_throttle():
+            self._send(429, "text/html; charset=utf-8", b"too many requests", {"Retry-After": "1"})
+            return
+        if random.random() < self.server.challenge_rate:
+            self._send(200, "text/html; charset=utf-8", CHALLENGE_PAGE.encode("utf-8"))
+            return
+        page = make_place_page(path, parse_qs(query))
+        self._send(200, "text/html; charset=utf-8", page.encode("utf-8"), {"Set-Cookie": "NNB=mock; Path=/"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+
+        with self.server.stats_lock:
+            self.server.post_cookies.append(self.headers.get("Cookie"))
+        if random.random() < self.server.error_rate_429 or self._take_throttle():
+            self._send_json(429, {"error": "too many requests"}, {"Retry-After": "1"})
+            return
+
+        responses = []
+        for operation in payload:
+            if operation.get("operationName") == "getRestaurants":
+                responses.extend(make_restaurant_list_page(operation["variables"]["restaurantListInput"]))
+                continue
+            if operation.get("operationName") != "getVisitorReviews":
+                self._send_json(400, {"error": f"unknown operation {operation.get('operationName')}"})
+                return
+            review_input = operation["variables"]["input"]
+            responses.extend(make_review_page(
+                review_input["businessId"], review_input.get("after"),
+                review_input.get("size", PAGE_SIZE_DEFAULT), operation.get("query"),
+                review_input.get("sort"), self.server.extra_reviews, self.server.visit_jitter_hours,
+            ))
+        self._send_json(200, responses)
+
+
+# extra_reviews: 카페마다 리뷰가 그만큼 새로 달린 상황 (갱신 모드 확인용, 실행 중 바꿔도 됨)
+# visit_jitter_hours: 리뷰마다 방문 시각을 최대 그만큼 앞당김 (작성 순서와 방문 순서가 다른 상황)
+# asset_delay: /static 리소스 응답 지연 (이미지/영상 다운로드 시간 흉내), challenge_rate: 페이지 요청 중 보안 확인 페이지 비율
+# throttle_next: 다음 요청 그만큼(페이지/GraphQL)은 429 (Retry-After 1초)
+# bytes_served/requests_served: 지금까지 보낸 응답 바이트/개수 (측정 구간 전후 차이로 사용)
+# post_cookies: POST 요청마다 받은 Cookie 헤더 (쿠키 부트스트랩 확인용)
+def start_mock_server(host="127.0.0.1", port=0, error_rate_429=0.0, extra_reviews=0, asset_delay=0.05, challenge_rate=0.0, visit_jitter_hours=0):
+    server = ThreadingHTTPServer((host, port), MockPlaceHandler)
+    server.error_rate_429 = error_rate_429
+    server.extra_reviews = extra_reviews
+    server.visit_jitter_hours = visit_jitter_hours
+    server.asset_delay = asset_delay
+    server.challenge_rate = challenge_rate
+    server.stats_lock = threading.Lock()
+    server.throttle_next = 0
+    server.post_cookies = []
+    server.bytes_served = 0
+    server.requests_served = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = start_mock_server(port=port)
+    print(f"목 서버 시작: http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
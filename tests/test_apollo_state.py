@@ -0,0 +1,42 @@
+import json
+import mock_server as mock
+from apollo_state import LIST_ENTRY_PREFIXES, LIST_ROOT_FIELDS, decode_full_apollo_state, extract_apollo_entries
+
+# APOLLO_STATE에서 고른 항목만 디코딩한 결과가 전체 디코딩의 해당 부분과 같고, 고를 항목이 없으면 전체 디코딩으로 넘어감
+BUSINESS_ID = "1199055314"
+
+
+def inline_script(state):
+    return "var naver=typeof naver!=='undefined'?naver:{};window.__APOLLO_STATE__ = " + json.dumps(state, ensure_ascii=False) + ";"
+
+def detail_state():
+    state = mock.make_detail_apollo_state(BUSINESS_ID)
+    # 고르지 않는 항목, 문자열 안의 "};"와 키처럼 보이는 텍스트
+    state["Review:1"] = {"__typename": "Review", "body": 'window 끝 }; "Menu:x": 1'}
+    state["ROOT_QUERY"]["visitorReviews"] = {"__typename": "VisitorReviewsResult", "total": 3}
+    return state
+
+def test_selective_decode_matches_full_decode():
+    state = detail_state()
+    script = inline_script(state)
+    entries = extract_apollo_entries(script)
+    assert decode_full_apollo_state(script) == state
+    assert set(entries) == {key for key in state if key.startswith(("PlaceDetailBase:", "Menu:"))} | {"ROOT_QUERY"}
+    assert all(entries[key] == state[key] for key in entries if key != "ROOT_QUERY")
+    assert entries["ROOT_QUERY"] == {key: value for key, value in state["ROOT_QUERY"].items() if key != "visitorReviews"}
+
+def test_list_entries():
+    state = mock.make_list_apollo_state({"query": "카페"})
+    entries = extract_apollo_entries(inline_script(state), LIST_ENTRY_PREFIXES, LIST_ROOT_FIELDS)
+    assert entries == state
+
+# 키 형식이 달라 고른 항목이 하나도 없으면 전체 상태를 돌려줌
+def test_falls_back_to_full_decode():
+    state = detail_state()
+    assert extract_apollo_entries(inline_script(state), ("PlaceDetail:",), ("place(",)) == state
+
+# 상태가 없거나 고른 항목이 중간에 잘림
+def test_missing_or_broken_state():
+    assert extract_apollo_entries("var naver={};") is None
+    script = inline_script(detail_state())
+    assert extract_apollo_entries(script[:script.find('"Menu:') + 20]) is None
@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+import pytest
+import crawl_cafe_basic_info
+from basic_info_api import BasicInfoSession
+
+# 기본 정보 HTTP 수집: 429는 호스트 제한 아래에서 다시 요청하고, 브라우저로는 차단/파싱 실패만 넘김
+BUSINESS_ID = "1001"
+
+
+@pytest.fixture
+def http_session(mock_server, rate_limiter):
+    session = BasicInfoSession(pool_maxsize=1, base_url=mock_server.base_url, rate_limiter=rate_limiter)
+    yield session
+    session.close()
+
+@pytest.fixture
+def browser_calls(monkeypatch):
+    calls = []
+
+    def read_with_browser(business_id, browser_pool=None, challenge=False):
+        calls.append((business_id, challenge))
+        return None
+    monkeypatch.setattr(crawl_cafe_basic_info, "read_apollo_state_with_browser", read_with_browser)
+    return calls
+
+def test_http_success(http_session, browser_calls):
+    cafe_info = crawl_cafe_basic_info.crawl_cafe_basic_info(BUSINESS_ID, None, http_session)
+    assert cafe_info["id"] == BUSINESS_ID and cafe_info["name"]
+    assert http_session.stats["http"] == 1
+    assert browser_calls == []
+
+def test_429_is_retried_under_rate_limiter(mock_server, http_session, rate_limiter, browser_calls):
+    mock_server.throttle_next = 1
+    cafe_info = crawl_cafe_basic_info.crawl_cafe_basic_info(BUSINESS_ID, None, http_session)
+    assert cafe_info["id"] == BUSINESS_ID
+    assert http_session.stats["throttled"] == 1
+    assert rate_limiter.snapshot(http_session.host)["rate"] < rate_limiter.rate # 제한에 알림
+    assert browser_calls == []
+
+def test_persistent_429_does_not_fall_back_to_browser(mock_server, http_session, browser_calls):
+    mock_server.throttle_next = 100
+    assert crawl_cafe_basic_info.crawl_cafe_basic_info(BUSINESS_ID, None, http_session) is None
+    assert http_session.stats["throttled"] == 3
+    assert browser_calls == []
+
+def test_challenge_page_falls_back_to_browser(mock_server, http_session, browser_calls):
+    mock_server.challenge_rate = 1.0
+    assert crawl_cafe_basic_info.crawl_cafe_basic_info(BUSINESS_ID, None, http_session) is None
+    assert http_session.stats["challenge"] == 1
+    assert browser_calls == [(BUSINESS_ID, True)]
+
+
+class FakePage:
+    def __init__(self):
+        self.handler = None
+        self.goto_calls = []
+
+    def route(self, pattern, handler):
+        self.handler = handler
+
+    def goto(self, url, wait_until=None, timeout=None):
+        self.goto_calls.append((url, wait_until))
+
+    def evaluate(self, js_code):
+        return None
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = type("Request", (), {"resource_type": resource_type, "url": url})()
+        self.result = None
+
+    def abort(self):
+        self.result = "abort"
+
+    def continue_(self):
+        self.result = "continue"
+
+
+# 보안 확인 페이지로 넘어온 경우: 스크립트를 허용하고 networkidle까지 기다림 (APOLLO_STATE를 기다리지 않음)
+@pytest.mark.parametrize("challenge, script_result, wait_until", [(True, "continue", "networkidle"), (False, "abort", "commit")])
+def test_browser_fallback_lets_challenge_scripts_run(monkeypatch, challenge, script_result, wait_until):
+    page = FakePage()
+
+    class FakeBrowserPool:
+        @contextmanager
+        def new_page(self):
+            yield page
+    monkeypatch.setattr("page_load.BLOCK_RESOURCES", True)
+    monkeypatch.setattr(crawl_cafe_basic_info.random, "uniform", lambda low, high: 0)
+    if not challenge:
+        page.wait_for_function = lambda js, timeout=None: None
+    assert crawl_cafe_basic_info.read_apollo_state_with_browser(BUSINESS_ID, FakeBrowserPool(), challenge) is None
+    assert page.goto_calls[0][1] == wait_until
+    route = FakeRoute("script", "https://ssl.pstatic.net/app.js")
+    page.handler(route)
+    assert route.result == script_result
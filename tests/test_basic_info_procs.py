@@ -0,0 +1,42 @@
+import json
+import os
+import crawl_basic_info_procs
+from completion_index import COMPLETED, CompletionIndex
+from crawl_cafe_basic_info import open_basic_info_index
+
+# 기본 정보 멀티 프로세스 수집 (http 방식, 목 서버): 워커 2개가 가져오고 부모 혼자 파일과 완료 색인을 씀
+CAFE_IDS = [str(1001 + i) for i in range(7)]
+DONE_ID = CAFE_IDS[0]
+
+
+def test_two_processes_write_through_parent(mock_server, tmp_path, monkeypatch):
+    # spawn 된 워커는 모듈을 새로 불러오므로 호스트 한도는 환경 변수로
+    monkeypatch.setenv("CAFE_RATE_PER_HOST", "1000")
+    monkeypatch.setenv("CAFE_RATE_LIMIT_DIR", str(tmp_path / "rate_limit"))
+    monkeypatch.setattr(crawl_basic_info_procs, "INDEX_FLUSH_EVERY", 2)
+    output_dir = str(tmp_path / "cafe_info")
+    index_path = str(tmp_path / "index.sqlite3")
+    # 이미 수집한 카페는 색인에서 걸러짐
+    os.makedirs(output_dir)
+    with open(os.path.join(output_dir, f"{DONE_ID}_info.json"), "w", encoding="utf-8") as f:
+        json.dump({"id": DONE_ID, "name": "이전 실행", "description": "x" * 200}, f) # 100바이트 이하는 미완료로 봄
+    open_basic_info_index(index_path, output_dir).close()
+
+    result = crawl_basic_info_procs.run_basic_info_processes(
+        CAFE_IDS, processes=2, fetch_mode="http", output_dir=output_dir, report_seconds=3600,
+        base_url=mock_server.base_url, index_path=index_path,
+    )
+    assert result == {"saved": len(CAFE_IDS) - 1, "failed": 0}
+
+    assert sorted(os.listdir(output_dir)) == sorted(f"{cafe_id}_info.json" for cafe_id in CAFE_IDS)
+    index = CompletionIndex(index_path)
+    try:
+        assert index.completed_ids("basic_info") == set(CAFE_IDS)
+        for cafe_id in CAFE_IDS[1:]:
+            path = os.path.join(output_dir, f"{cafe_id}_info.json")
+            with open(path, "r", encoding="utf-8") as f:
+                assert json.load(f)["id"] == cafe_id
+            row = index.get("basic_info", cafe_id)
+            assert row["status"] == COMPLETED and row["size"] == os.path.getsize(path)
+    finally:
+        index.close()
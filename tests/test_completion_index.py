@@ -0,0 +1,76 @@
+import os
+import pytest
+import completion_index
+from completion_index import CompletionIndex, basic_info_index_rows, bump_generation, check_local_disk
+
+CAFE_ID = "1199055314"
+
+
+def write_info(output_dir, cafe_id):
+    with open(os.path.join(output_dir, f"{cafe_id}_info.json"), "w", encoding="utf-8") as f:
+        f.write('{"name": "' + "x" * 200 + '"}')
+
+# 출력 파일이 늘어도 다시 훑지 않고, 지운 뒤 세대를 올리면 다음에 열 때 색인에서도 빠짐
+def test_basic_info_index_follows_generation(tmp_path):
+    output_dir = tmp_path / "basic_info"
+    output_dir.mkdir()
+    for cafe_id in ("1", "2", "3"):
+        write_info(output_dir, cafe_id)
+    path = str(tmp_path / "index.sqlite3")
+    load_rows = lambda: basic_info_index_rows(str(output_dir))
+    index = CompletionIndex(path)
+    assert index.ensure_built("basic_info", load_rows, str(output_dir))
+    write_info(output_dir, "4")
+    assert index.ensure_built("basic_info", lambda: pytest.fail("세대가 같으면 다시 훑지 않음"), str(output_dir)) is False
+    assert index.completed_ids("basic_info") == {"1", "2", "3"}
+    index.close()
+
+    os.remove(output_dir / "2_info.json")
+    assert bump_generation(str(output_dir)) == 1
+    index = CompletionIndex(path)
+    assert index.ensure_built("basic_info", load_rows, str(output_dir))
+    assert index.completed_ids("basic_info") == {"1", "3", "4"}
+    assert index.ensure_built("basic_info", lambda: pytest.fail("맞춘 뒤에는 다시 훑지 않음"), str(output_dir)) is False
+    index.close()
+
+def test_rebuild_records_generation(tmp_path):
+    output_dir = tmp_path / "basic_info"
+    output_dir.mkdir()
+    write_info(output_dir, "1")
+    bump_generation(str(output_dir))
+    index = CompletionIndex(str(tmp_path / "index.sqlite3"))
+    assert index.rebuild("basic_info", basic_info_index_rows(str(output_dir)), 1) == 1
+    assert index.ensure_built("basic_info", lambda: pytest.fail("재생성한 세대와 같으면 다시 훑지 않음"), str(output_dir)) is False
+    index.close()
+
+# 완료 마커를 지운 카페는 체크포인트가 완료여도 다시 수집
+def test_deleted_marker_forces_recrawl(crawl_env, mock_server, review_session):
+    crawl = crawl_env
+    assert crawl.process_and_save_reviews(CAFE_ID, 10000, review_session).startswith("SUCCESS_COMPLETED")
+    assert crawl.process_and_save_reviews(CAFE_ID, 10000, review_session) == "SKIPPED_COMPLETED"
+
+    os.remove(crawl.get_review_store().marker_file(CAFE_ID))
+    bump_generation(crawl.review_source_dir())
+    crawl._completion_index.close()
+    for name in ("_review_store", "_completion_index", "_completed_reviews"):
+        setattr(crawl, name, None)
+    assert CAFE_ID not in crawl.get_completed_reviews()
+    assert crawl.process_and_save_reviews(CAFE_ID, 10000, review_session).startswith("SUCCESS_COMPLETED")
+    assert crawl.get_review_store().is_completed(CAFE_ID)
+    assert CAFE_ID in crawl.get_completion_index().completed_ids("reviews")
+
+# 프로듀서는 세대와 상관없이 마커 전체와 맞춤 (다른 머신이 완료한 카페)
+def test_reconcile_picks_up_other_hosts(crawl_env):
+    crawl = crawl_env
+    assert crawl.get_completion_index().completed_ids("reviews") == set()
+    os.makedirs(crawl.MARKER_DIR, exist_ok=True)
+    open(crawl.get_review_store().marker_file(CAFE_ID), "w").close()
+    assert crawl.get_completion_index().completed_ids("reviews") == set()
+    assert crawl.get_completion_index(reconcile=True).completed_ids("reviews") == {CAFE_ID}
+
+def test_rejects_index_on_nfs(tmp_path, monkeypatch):
+    monkeypatch.setattr(completion_index, "_filesystem_of", lambda path: "nfs4")
+    with pytest.raises(RuntimeError):
+        check_local_disk(str(tmp_path / "index.sqlite3"))
+    monkeypatch.setattr(completion_index, "_filesystem_of", lambda path: "ext4")
+    check_local_disk(str(tmp_path / "index.sqlite3"))
@@ -0,0 +1,47 @@
+import asyncio
+import time
+import pytest
+import mock_server as mock
+
+crawl_async = pytest.importorskip("crawl_async")
+from work_queue import open_work_queue
+
+# async 워커: 슬롯 여러 개가 목 서버에서 카페를 끝까지 수집하고 큐가 비면 실행 종료를 기록하고 끝남
+# 쿠키 부트스트랩만 브라우저 없이 (Playwright의 HTTP 컨텍스트는 그대로 사용)
+CAFE_IDS = ["1199055314", "1234567890"]
+QUEUE_URLS = ["https://fake-sqs.local/000000000000/cafe_queue"]
+
+
+class NoBrowserReviewSession(crawl_async.AsyncReviewSession):
+    async def bootstrap(self, business_id, force=False):
+        async with self._lock:
+            if self._request is None:
+                self._playwright = await crawl_async.async_playwright().start()
+                self._request = await self._playwright.request.new_context(extra_http_headers={"User-Agent": self.user_agent})
+            self.bootstrapped_at = time.time()
+
+
+def test_async_worker_drains_queue(crawl_env, mock_server, rate_limiter, tmp_path, monkeypatch):
+    crawl = crawl_env
+    db_path = str(tmp_path / "queue.sqlite3")
+    producer_queue = open_work_queue("sqlite", QUEUE_URLS, db_path=db_path)
+    producer_queue.send_many(QUEUE_URLS[0], CAFE_IDS)
+    producer_queue.close()
+    crawl.get_run_state().add_expected(len(CAFE_IDS))
+
+    monkeypatch.setattr(crawl_async, "open_crawl_work_queue", lambda: open_work_queue("sqlite", QUEUE_URLS, db_path=db_path, wait_seconds=0))
+    monkeypatch.setattr(crawl_async, "AsyncReviewSession", lambda: NoBrowserReviewSession(
+        api_url=mock_server.base_url + "/graphql", base_url=mock_server.base_url, rate_limiter=rate_limiter,
+    ))
+    monkeypatch.setattr(crawl_async.random, "uniform", lambda low, high: 0)
+    monkeypatch.setattr(crawl_async, "STANDBY_POLL_SECONDS", 0.1)
+
+    asyncio.run(asyncio.wait_for(crawl_async.main_async(concurrency=2), 60))
+
+    store = crawl.get_review_store()
+    for cafe_id in CAFE_IDS:
+        assert store.is_completed(cafe_id)
+        cursors = [review["cursor"] for review in store.iter_cafe_reviews(cafe_id)]
+        assert len(cursors) == len(set(cursors)) == mock.review_total_for(cafe_id)
+    state = crawl.get_run_state().snapshot()
+    assert state["done"] == len(CAFE_IDS) and state["completed_at"] is not None
@@ -0,0 +1,37 @@
+import glob
+import pytest
+import mock_server as mock
+
+pq = pytest.importorskip("pyarrow.parquet")
+from export import run_export
+
+# 증분 내보내기: 새로 완료된 카페와 갱신으로 늘어난 리뷰만 새 part 파일로
+CAFE_ID = "1199055314"
+
+
+def exported_review_rows(export_dir):
+    return [row for path in sorted(glob.glob(f"{export_dir}/reviews/*.parquet")) for row in pq.read_table(path).to_pylist()]
+
+@pytest.mark.parametrize("store_kind", ["jsonl", "segment"])
+def test_export_includes_refreshed_reviews(crawl_env, mock_server, review_session, tmp_path, monkeypatch, store_kind):
+    crawl = crawl_env
+    monkeypatch.setattr(crawl, "REVIEW_STORE_KIND", store_kind)
+    export_dir = str(tmp_path / "export")
+    info_dir = str(tmp_path / "cafe_info")
+    total = mock.review_total_for(CAFE_ID)
+
+    crawl.process_and_save_reviews(CAFE_ID, 10000, review_session)
+    assert run_export("parquet", export_dir, crawl.get_review_store(), info_dir)[0] == total
+
+    # 변화 없으면 아무것도 내보내지 않음
+    crawl._review_store = None
+    assert run_export("parquet", export_dir, crawl.get_review_store(), info_dir)[0] == 0
+
+    mock_server.extra_reviews = 30
+    crawl._review_store = None
+    crawl.process_and_save_reviews(CAFE_ID, 10000, review_session, refresh=True)
+    crawl._review_store = None
+    assert run_export("parquet", export_dir, crawl.get_review_store(), info_dir)[0] == 30
+
+    cursors = [row["cursor"] for row in exported_review_rows(export_dir)]
+    assert len(cursors) == len(set(cursors)) == total + 30
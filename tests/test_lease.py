@@ -0,0 +1,55 @@
+import threading
+import time
+import pytest
+from lease import FileLeaseManager, LeaseHeartbeat, LeaseLostError, SqliteLeaseManager
+
+
+def test_file_lease_is_exclusive(tmp_path):
+    manager = FileLeaseManager(str(tmp_path), ttl=60)
+    lease = manager.acquire("cafe1")
+    assert lease is not None
+    assert manager.acquire("cafe1") is None
+    assert manager.held_keys() == {"cafe1"}
+    manager.release(lease)
+    again = manager.acquire("cafe1")
+    assert again.token == lease.token + 1
+    with pytest.raises(LeaseLostError):
+        manager.validate(lease)
+
+# 만료 직전에 갱신하는 워커와 만료를 보고 가져가려는 워커: 갱신의 확인-쓰기 사이에 끼어들 수 없음
+def test_file_renew_is_atomic_with_acquire(tmp_path, monkeypatch):
+    manager = FileLeaseManager(str(tmp_path), ttl=0.2)
+    other = FileLeaseManager(str(tmp_path), ttl=0.2)
+    lease = manager.acquire("cafe1")
+    time.sleep(0.3)
+    manager.ttl = 60 # 갱신은 길게
+    results = []
+    check = FileLeaseManager._check
+
+    def slow_check(self, checked_lease, now):
+        # 확인 자체는 만료 전 시각으로 통과시키고, 쓰기 전에 다른 워커가 가져가려고 시도
+        check(self, checked_lease, checked_lease.expires_at - 0.01)
+        thread = threading.Thread(target=lambda: results.append(other.acquire("cafe1")))
+        thread.start()
+        thread.join(0.2)
+        results.append("checked")
+    monkeypatch.setattr(FileLeaseManager, "_check", slow_check)
+    manager.renew(lease)
+    monkeypatch.setattr(FileLeaseManager, "_check", check)
+    deadline = time.time() + 5
+    while len(results) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    # 다른 워커는 갱신이 끝난 뒤에야 확인하므로 갱신된 임대를 보고 물러남
+    assert results == ["checked", None]
+    manager.validate(lease)
+
+def test_heartbeat_marks_lease_lost_on_sqlite_error(tmp_path):
+    manager = SqliteLeaseManager(str(tmp_path / "leases.sqlite3"), ttl=60)
+    lease = manager.acquire("cafe1")
+    manager.close() # 이후 renew는 sqlite3.ProgrammingError
+    heartbeat = LeaseHeartbeat(manager, lease, interval=0.05).start()
+    deadline = time.time() + 5
+    while not lease.lost and time.time() < deadline:
+        time.sleep(0.01)
+    heartbeat.stop()
+    assert lease.lost
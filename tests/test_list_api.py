@@ -0,0 +1,22 @@
+import mock_server as mock
+from list_api import CafeListSession, LIST_PAGE_SIZE, fetch_cafe_list_graphql
+
+# 목록 GraphQL 페이징: 2페이지부터의 위치는 요청에 보내는 display 기준 (첫 페이지 개수와 상관없이)
+TARGET = {"query": "카페"}
+
+
+def test_page_offsets_follow_display_not_first_page(mock_server, rate_limiter, monkeypatch):
+    session = CafeListSession(api_url=mock_server.base_url + "/graphql", base_url=mock_server.base_url, rate_limiter=rate_limiter)
+    list_input = {"query": TARGET["query"], "start": 1, "display": 1000}
+    total = mock.list_total_for(dict(list_input, bounds=None))
+    all_ids = [item["id"] for item in mock.make_restaurant_list_page(list_input)[0]["data"]["restaurants"]["items"]]
+    # 첫 페이지(브라우저)가 display보다 적게 옴
+    monkeypatch.setattr(session, "open_list", lambda url: ([{"id": cafe_id} for cafe_id in all_ids[:LIST_PAGE_SIZE - 3]], total))
+    pages = []
+    try:
+        assert fetch_cafe_list_graphql("list-url", TARGET, session, lambda page_num, cafes: pages.append((page_num, cafes)), parallel=2)
+    finally:
+        session.close()
+    assert [page_num for page_num, _ in pages] == list(range(1, -(-total // LIST_PAGE_SIZE) + 1))
+    later_ids = [cafe["id"] for _, cafes in pages[1:] for cafe in cafes]
+    assert later_ids == all_ids[LIST_PAGE_SIZE:]
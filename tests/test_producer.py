@@ -0,0 +1,56 @@
+import time
+from fake_sqs import FakeSqsClient
+from producer import filter_pending_ids, send_ids_to_sqs
+from work_queue import SqsWorkQueue
+
+# 프로듀서 재실행: 표준 큐는 중복 제거가 없으므로 큐에 넣은 기록으로 거름
+
+
+def test_queued_ids_are_not_sent_again(crawl_env):
+    crawl = crawl_env
+    sqs = FakeSqsClient()
+    queue_url = sqs.create_queue(QueueName="cafe_queue")["QueueUrl"]
+    queued_at = time.time()
+    result = send_ids_to_sqs(queue_url, ["1", "2", "3"], sqs, threads=2)
+    crawl.record_queued_reviews(result["sent_ids"], at=queued_at)
+
+    pending, counts = filter_pending_ids(["1", "2", "3", "4"], set(), set(), queued_ids=crawl.queued_review_ids())
+    assert pending == ["4"]
+    assert counts["queued"] == 3
+
+    # 워커가 처리한 카페(완료/부분 기록)는 큐에서 빠진 것으로 봄
+    crawl.get_completion_index().record("reviews", "2", crawl.PARTIAL, 10)
+    assert crawl.queued_review_ids() == {"1", "3"}
+    # 이어하기로 다시 넣으면 다시 큐에 있는 것으로 봄
+    crawl.record_queued_reviews(["2"])
+    assert crawl.queued_review_ids() == {"1", "2", "3"}
+    # 갱신 모드 기록은 따로
+    assert crawl.queued_review_ids(refresh=True) == set()
+
+def test_queued_record_expires(crawl_env, monkeypatch):
+    crawl = crawl_env
+    crawl.record_queued_reviews(["1"], at=time.time() - 10)
+    monkeypatch.setattr(crawl, "QUEUED_TTL_SECONDS", 5)
+    assert crawl.queued_review_ids() == set()
+
+def test_fifo_sends_carry_group_and_dedup_ids(crawl_env):
+    crawl = crawl_env
+    sqs = FakeSqsClient(max_wait_seconds=0)
+    queue_url = sqs.create_queue(QueueName="cafe_queue.fifo")["QueueUrl"]
+    assert send_ids_to_sqs(queue_url, ["1", "2"], sqs, threads=1)["sent"] == 2
+    assert send_ids_to_sqs(queue_url, ["1", "2"], sqs, threads=1)["sent"] == 2 # 같은 중복 제거 ID라 큐에는 그대로 2개
+
+    work_queue = SqsWorkQueue(sqs, [queue_url], wait_seconds=0)
+    try:
+        task = work_queue.receive()
+        crawl.settle_review_task(work_queue, task, "CONTINUE") # 이어하기 전송이 거부되지 않아야 함
+        bodies = []
+        while True:
+            again = work_queue.receive()
+            if again is None:
+                break
+            bodies.append(again.body)
+            work_queue.ack_now(again)
+        assert sorted(bodies) == sorted(["1", "2"])
+    finally:
+        work_queue.close()
@@ -0,0 +1,63 @@
+import multiprocessing
+import time
+from rate_limit import HostRateLimiter, MAX_THROTTLE_WAIT_SECONDS, THROTTLE_WAIT_SECONDS
+from review_api import parse_retry_after
+
+# 머신 공유 토큰 버킷: 프로세스끼리 속도를 나눠 쓰고, 429에 속도를 절반으로 줄였다가 성공하면 다시 올림
+HOST = "api.example.com"
+
+
+def acquire_many(state_dir, count, results):
+    limiter = HostRateLimiter(rate=20, burst=1, state_dir=state_dir)
+    for _ in range(count):
+        limiter.acquire(HOST)
+    results.put(time.time())
+
+def test_processes_share_one_rate(tmp_path):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    started_at = time.time()
+    processes = [context.Process(target=acquire_many, args=(str(tmp_path), 10, results)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    finished_at = max(results.get(timeout=5) for _ in processes)
+    # 합계 20개 = 버스트 1개 + 초당 20개로 19개 -> 프로세스마다 따로 세면 0.45초 정도
+    assert finished_at - started_at >= 19 / 20 * 0.9
+
+def test_throttle_halves_rate_and_blocks(tmp_path):
+    limiter = HostRateLimiter(rate=4, burst=1, state_dir=str(tmp_path))
+    limiter.on_throttle(HOST, 2)
+    state = limiter.snapshot(HOST)
+    assert state["rate"] == 2
+    assert 1.5 < limiter.try_acquire(HOST) <= 2
+    limiter.on_throttle(HOST, 2)
+    assert limiter.snapshot(HOST)["rate"] == 1
+    limiter.on_throttle(HOST, 2)
+    limiter.on_throttle(HOST, 2)
+    assert limiter.snapshot(HOST)["rate"] == limiter.min_rate == 0.4 # 0.5 -> 0.25가 아니라 하한
+
+# Retry-After가 없으면 짧게 시작해서 연속 429마다 두 배, 성공하면 처음으로
+def test_throttle_without_retry_after_grows_exponentially(tmp_path):
+    limiter = HostRateLimiter(rate=4, state_dir=str(tmp_path))
+    assert parse_retry_after(None) is None and parse_retry_after("soon") is None
+    assert parse_retry_after("5") == 5 and parse_retry_after("3600") == 540
+    waits = []
+    for _ in range(7):
+        limiter.on_throttle(HOST, parse_retry_after(None))
+        waits.append(round(limiter.snapshot(HOST)["blocked_until"] - time.time()))
+    assert waits[:3] == [THROTTLE_WAIT_SECONDS, THROTTLE_WAIT_SECONDS * 2, THROTTLE_WAIT_SECONDS * 4]
+    assert waits[-1] == MAX_THROTTLE_WAIT_SECONDS
+    limiter.on_success(HOST)
+    assert limiter.snapshot(HOST)["throttle_wait"] == THROTTLE_WAIT_SECONDS
+
+def test_success_recovers_rate_up_to_max(tmp_path):
+    limiter = HostRateLimiter(rate=4, recover_factor=1.5, state_dir=str(tmp_path))
+    limiter.on_throttle(HOST, 0)
+    assert limiter.snapshot(HOST)["rate"] == 2
+    limiter.on_success(HOST)
+    assert limiter.snapshot(HOST)["rate"] == 3
+    for _ in range(10):
+        limiter.on_success(HOST)
+    assert limiter.snapshot(HOST)["rate"] == limiter.max_rate == 8
@@ -0,0 +1,33 @@
+import mock_server as mock
+
+# 갱신 모드: 최신순(작성 순서)으로 새 리뷰만 받다가 이미 저장한 리뷰에 닿으면 멈춤
+CAFE_ID = "1199055314"
+
+
+def stored_cursors(crawl):
+    crawl._review_store = None
+    return [review["cursor"] for review in crawl.get_review_store().iter_cafe_reviews(CAFE_ID)]
+
+def test_refresh_collects_new_reviews(crawl_env, mock_server, review_session):
+    crawl = crawl_env
+    assert crawl.process_and_save_reviews(CAFE_ID, 10000, review_session).startswith("SUCCESS_COMPLETED")
+    mock_server.extra_reviews = 120
+    crawl._review_store = None
+    assert crawl.process_and_save_reviews(CAFE_ID, 10000, review_session, refresh=True).startswith("SUCCESS_COMPLETED")
+    cursors = stored_cursors(crawl)
+    assert len(cursors) == len(set(cursors)) == mock.review_total_for(CAFE_ID) + 120
+
+# 방문 시각이 작성 순서와 다르면 새 리뷰 페이지에도 기준선보다 오래된 방문이 섞여 있음 (그래도 끝까지 받아야 함)
+def test_refresh_with_out_of_order_visit_times(crawl_env, mock_server, review_session):
+    crawl = crawl_env
+    mock_server.visit_jitter_hours = 400
+    total = mock.review_total_for(CAFE_ID)
+    assert crawl.process_and_save_reviews(CAFE_ID, 10000, review_session).startswith("SUCCESS_COMPLETED")
+
+    mock_server.extra_reviews = 120
+    newest_visit = max(mock.visit_hours_of(i, 400) for i in range(total))
+    assert any(mock.visit_hours_of(i, 400) < newest_visit for i in range(total, total + 50)) # 첫 페이지부터 섞여 있음
+    crawl._review_store = None
+    assert crawl.process_and_save_reviews(CAFE_ID, 10000, review_session, refresh=True).startswith("SUCCESS_COMPLETED")
+    cursors = stored_cursors(crawl)
+    assert len(cursors) == len(set(cursors)) == total + 120
@@ -0,0 +1,108 @@
+import time
+from contextlib import contextmanager
+import requests
+import mock_server as mock
+from crawl import stream_reviews_by_api
+from review_api import ReviewSession
+
+# 리뷰 API 경로: 커서 페이징, 429 재시도, 쿠키 부트스트랩 (브라우저 대신 페이지를 HTTP로 받아 쿠키를 넘기는 가짜 풀)
+CAFE_ID = "1199055314"
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+
+    def route(self, pattern, handler):
+        pass
+
+    def goto(self, url, wait_until=None, timeout=None):
+        response = requests.get(url, timeout=timeout / 1000 if timeout else 10)
+        self.context.visited.append(url)
+        for cookie in response.cookies:
+            self.context.jar.append({"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path})
+
+
+class FakeContext:
+    def __init__(self):
+        self.visited = []
+        self.jar = []
+
+    def new_page(self):
+        return FakePage(self)
+
+    def cookies(self):
+        return list(self.jar)
+
+
+class FakeBrowserPool:
+    def __init__(self):
+        self.contexts = []
+
+    @contextmanager
+    def new_context(self, **context_options):
+        context = FakeContext()
+        self.contexts.append(context)
+        yield context
+
+
+def collect(business_id, review_session, **kwargs):
+    pages = []
+    collected, is_completed = stream_reviews_by_api(business_id, pages.append, 10000, review_session=review_session, **kwargs)
+    return pages, collected, is_completed
+
+def test_pages_through_all_reviews(mock_server, review_session, monkeypatch):
+    monkeypatch.setattr("crawl.next_page_delay", lambda: 0)
+    pages, collected, is_completed = collect(CAFE_ID, review_session)
+    total = mock.review_total_for(CAFE_ID)
+    cursors = [record["cursor"] for page in pages for record in page]
+    assert is_completed
+    assert collected == total == len(set(cursors))
+    assert len(pages) == -(-total // 50)
+    assert all(len(page) == 50 for page in pages[:-1])
+
+def test_resumes_from_cursor(mock_server, review_session, monkeypatch):
+    monkeypatch.setattr("crawl.next_page_delay", lambda: 0)
+    pages, _, _ = collect(CAFE_ID, review_session)
+    cursor = pages[0][-1]["cursor"]
+    resumed, collected, is_completed = collect(CAFE_ID, review_session, cursor=cursor)
+    assert is_completed
+    assert resumed[0][0]["cursor"] == pages[1][0]["cursor"]
+    assert collected == sum(len(page) for page in pages[1:])
+
+# 429를 받으면 리미터가 Retry-After 동안 막았다가 같은 페이지를 다시 요청
+def test_retries_after_429(mock_server, review_session, monkeypatch):
+    monkeypatch.setattr("crawl.next_page_delay", lambda: 0)
+    mock_server.throttle_next = 1
+    started = time.time()
+    pages, collected, is_completed = collect(CAFE_ID, review_session)
+    assert is_completed
+    assert collected == mock.review_total_for(CAFE_ID)
+    assert time.time() - started >= 0.9 # Retry-After: 1
+    assert len(mock_server.post_cookies) == len(pages) + 2 # 429 한 번 + 페이지마다 한 번 + 빈 마지막 페이지
+
+def test_stops_after_second_429(mock_server, review_session, monkeypatch):
+    monkeypatch.setattr("crawl.next_page_delay", lambda: 0)
+    mock_server.throttle_next = 2
+    pages, collected, is_completed = collect(CAFE_ID, review_session)
+    assert (pages, collected, is_completed) == ([], 0, False)
+
+# 리뷰 페이지에서 받은 쿠키를 이후 GraphQL 요청에 실어 보내고, 쿠키 수명 안에서는 다시 받지 않음
+def test_bootstraps_cookies_from_review_page(mock_server, rate_limiter, monkeypatch):
+    monkeypatch.setattr("crawl.next_page_delay", lambda: 0)
+    browser_pool = FakeBrowserPool()
+    session = ReviewSession(browser_pool=browser_pool, api_url=mock_server.base_url + "/graphql", base_url=mock_server.base_url, rate_limiter=rate_limiter)
+    try:
+        _, collected, is_completed = collect(CAFE_ID, session)
+        assert is_completed and collected == mock.review_total_for(CAFE_ID)
+        assert len(browser_pool.contexts) == 1
+        assert browser_pool.contexts[0].visited == [f"{mock_server.base_url}/restaurant/{CAFE_ID}/review/visitor"]
+        assert set(mock_server.post_cookies) == {"NNB=mock"}
+
+        collect(CAFE_ID, session)
+        assert len(browser_pool.contexts) == 1
+        session.bootstrapped_at = time.time() - session.cookie_ttl - 1
+        collect(CAFE_ID, session)
+        assert len(browser_pool.contexts) == 2
+    finally:
+        session.close()
@@ -0,0 +1,100 @@
+import os
+import json
+import review_store
+from dedupe import review_keys
+from review_store import SegmentReviewStore
+
+# 세그먼트 저장소: 작성기를 다시 열 때 키 파일로 중복 제거 집합을 만들고 프레임은 풀지 않음
+
+
+def make_records(start, count):
+    return [{"review_id": f"r{i}", "author_id": f"a{i}", "body": f"본문 {i}", "visit_time": f"2024-01-01T{i % 24:02d}:00:00", "cursor": str(i + 1)}
+            for i in range(start, start + count)]
+
+def test_segment_reopen_dedupes_without_decompressing(tmp_path, monkeypatch):
+    store = SegmentReviewStore(str(tmp_path))
+    with store.open_writer("cafe1") as writer:
+        writer.write_page(make_records(0, 50))
+        writer.write_page(make_records(50, 50))
+    with store.open_writer("cafe2") as writer:
+        writer.write_page(make_records(0, 10))
+
+    def fail_decompress(codec, data):
+        raise AssertionError("작성기를 열 때 프레임을 풀면 안 됨")
+    monkeypatch.setattr(review_store, "_decompress", fail_decompress)
+    reopened = SegmentReviewStore(str(tmp_path))
+    with reopened.open_writer("cafe1") as writer:
+        assert writer.checkpoint["review_count"] == 100
+        assert len(writer.dedupe.keys) == 200 # 리뷰마다 내용 키 + ID 키
+        writer.write_page(make_records(90, 20))
+        assert writer.count == 10 and writer.duplicates == 10
+
+def test_segment_reopen_reads_frames_without_keys(tmp_path):
+    # 키 파일이 없던 샤드: 인덱스에 keys_offset이 없으면 프레임을 풀어서 키를 만듦
+    store = SegmentReviewStore(str(tmp_path))
+    with store.open_writer("cafe1") as writer:
+        writer.write_page(make_records(0, 30))
+    store.close()
+    for idx_file in tmp_path.glob("*.idx"):
+        entries = [json.loads(line) for line in idx_file.read_text().splitlines()]
+        for entry in entries:
+            entry.pop("keys_offset", None)
+            entry.pop("keys_length", None)
+        idx_file.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    for keys_file in tmp_path.glob("*.keys"):
+        keys_file.unlink()
+
+    reopened = SegmentReviewStore(str(tmp_path))
+    with reopened.open_writer("cafe1") as writer:
+        assert writer.dedupe.keys == {key for record in make_records(0, 30) for key in review_keys(record)}
+        writer.write_page(make_records(0, 30))
+        assert writer.count == 0
+
+def test_segment_state_is_updated_incrementally(tmp_path):
+    store = SegmentReviewStore(str(tmp_path))
+    other = SegmentReviewStore(str(tmp_path)) # 다른 워커 프로세스
+    with store.open_writer("cafe1") as writer:
+        writer.write_page(make_records(0, 20))
+    assert other.review_count("cafe1") == 20
+    assert not other.is_completed("cafe1")
+
+    with store.open_writer("cafe1") as writer:
+        writer.write_page(make_records(20, 5))
+        writer.mark_completed()
+    with store.open_writer("cafe2") as writer:
+        writer.write_page(make_records(0, 3))
+    # 읽은 위치 이후의 새 항목만 반영
+    assert other.review_count("cafe1") == 25
+    assert other.is_completed("cafe1")
+    assert other.completed_cafe_ids() == {"cafe1"}
+    assert [record["cursor"] for record in other.iter_cafe_reviews("cafe1")] == [str(i + 1) for i in range(25)]
+    assert list(other.iter_cafe_reviews("missing")) == []
+
+def test_segment_state_merges_out_of_order_entries(tmp_path):
+    # 다른 머신의 시계가 늦어서 나중에 읽은 항목의 기록 시각이 더 이른 경우: 그 카페만 다시 합침
+    store = SegmentReviewStore(str(tmp_path))
+    with store.open_writer("cafe1") as writer:
+        writer.write_page(make_records(0, 10))
+    assert store.review_count("cafe1") == 10
+    late = tmp_path / "shard-late.idx"
+    late.write_text(json.dumps({"cafe_id": "cafe1", "completed": True, "at": 0}) + "\n")
+    assert store.is_completed("cafe1")
+    assert store.review_count("cafe1") == 10
+    assert store.open_writer("cafe1").checkpoint["high_water"] is None # 시각 순으로는 완료가 먼저
+
+# 체크포인트는 있는데 JSONL이 없는 경우: 남은 키 파일을 버리고 다시 수집한 리뷰를 중복으로 버리지 않음
+def test_jsonl_regenerated_checkpoint_discards_stale_keys(tmp_path):
+    store = review_store.JsonlReviewStore(str(tmp_path / "reviews"), str(tmp_path / "markers"))
+    with store.open_writer("cafe1") as writer:
+        writer.write_page(make_records(100, 50))
+    os.remove(tmp_path / "reviews" / "cafe1_reviews.jsonl")
+
+    with store.open_writer("cafe1") as writer:
+        assert writer.checkpoint["byte_offset"] == 0
+        writer.write_page(make_records(0, 30))
+        assert writer.count == 30 and writer.duplicates == 0
+    with store.open_writer("cafe1") as writer:
+        assert len(writer.dedupe.keys) == 60
+        writer.write_page(make_records(0, 50))
+        assert writer.count == 20 and writer.duplicates == 30
+    assert store.review_count("cafe1") == 50
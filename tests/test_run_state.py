@@ -0,0 +1,43 @@
+import run_state
+from run_state import RunState
+
+# 큐가 빈 워커의 다음 행동: 아무도 처리 중이 아니면 큐 확인, 처리 중인 워커가 있으면 대기 워커 하나만 남고 나머지 종료
+# 종료 신호가 있으면 모두 종료
+
+
+def test_idle_without_busy_workers_checks_queue(tmp_path):
+    state = RunState(str(tmp_path / "run_state.json"))
+    assert state.decide_idle("w1") == "check_queue"
+    state.begin("w1", "cafe")
+    state.finish("w1", True)
+    assert state.decide_idle("w2") == "check_queue"
+    assert state.snapshot()["done"] == 1
+
+def test_only_one_standby_worker_while_busy(tmp_path):
+    state = RunState(str(tmp_path / "run_state.json"))
+    state.begin("w1", "cafe")
+    assert state.decide_idle("w2") == "standby"
+    assert state.decide_idle("w3") == "exit"
+    assert state.decide_idle("w2") == "standby" # 자기 자신의 대기 표시는 세지 않음
+    state.finish("w1", True)
+    assert state.decide_idle("w2") == "check_queue"
+
+def test_completed_run_exits_and_next_run_starts_fresh(tmp_path):
+    state = RunState(str(tmp_path / "run_state.json"))
+    state.add_expected(3)
+    state.begin("w1", "cafe")
+    state.mark_completed()
+    assert state.decide_idle("w2") == "exit"
+    run_id = state.snapshot()["run_id"]
+    state.add_expected(2)
+    snapshot = state.snapshot()
+    assert snapshot["run_id"] != run_id and snapshot["expected"] == 2 and snapshot["completed_at"] is None
+    assert state.decide_idle("w2") == "check_queue"
+
+# 처리 중 표시가 만료된 워커(죽은 워커)는 무시
+def test_expired_busy_worker_is_ignored(tmp_path, monkeypatch):
+    state = RunState(str(tmp_path / "run_state.json"))
+    monkeypatch.setattr(run_state, "BUSY_TTL_SECONDS", -1)
+    state.begin("w1", "cafe")
+    assert state.decide_idle("w2") == "check_queue"
+    assert "w1" not in state.snapshot()["workers"]
@@ -0,0 +1,52 @@
+import pytest
+from scheduler import CrawlStatsLog, load_crawl_stats, plan_schedule
+
+# 프로듀서 스케줄: 남은 페이지 수(ljf), 오래된 정도 가중(stale), 파일 순서(file)와 점수 구간(tier)
+NOW = 1_700_000_000.0
+DAY = 86400
+CAFE_IDS = ["a", "b", "c", "d", "e"]
+# d는 통계 없음 (알려진 전체 수의 중앙값 400으로 추정), e는 완료
+STATS = {
+    "a": {"total": 1000, "review_count": 0, "at": NOW},
+    "b": {"total": 300, "review_count": 100, "at": NOW},
+    "c": {"total": 100, "at": NOW - 70 * DAY},
+    "e": {"total": 500, "review_count": 500, "at": NOW - 73 * DAY},
+}
+COMPLETED = {"e"}
+
+
+# ({cafe_id: 작업}, 순서)
+def plan(policy, refresh=False):
+    schedule = plan_schedule(CAFE_IDS, STATS, COMPLETED, policy, refresh, NOW)
+    return {job["cafe_id"]: job for job in schedule}, [job["cafe_id"] for job in schedule]
+
+def test_ljf_orders_by_remaining_pages():
+    jobs, order = plan("ljf")
+    assert order == ["a", "d", "b", "c"] # 완료된 e는 빠짐
+    assert [jobs[cafe_id]["pages"] for cafe_id in order] == [20, 8, 4, 2]
+    assert [jobs[cafe_id]["tier"] for cafe_id in order] == [0, 1, 1, 2]
+
+def test_stale_weights_old_and_never_crawled():
+    jobs, order = plan("stale")
+    assert order == ["d", "c", "a", "b"]
+    assert jobs["d"]["score"] == pytest.approx(8 * (1 + 30 / 7))
+    assert jobs["c"]["score"] == pytest.approx(2 * (1 + 70 / 7))
+    assert jobs["a"]["score"] == 20
+
+def test_file_keeps_input_order():
+    jobs, order = plan("file")
+    assert order == ["a", "b", "c", "d"]
+    assert {job["tier"] for job in jobs.values()} == {0}
+
+# 갱신 수집은 완료된 카페도 마지막 수집 이후 쌓였을 만큼 넣음
+def test_refresh_includes_completed_cafes():
+    jobs, order = plan("ljf", refresh=True)
+    assert "e" in order
+    assert jobs["e"]["pages"] == pytest.approx(1 + 500 * 73 / 365 / 50)
+
+def test_stats_log_merges_latest_values(tmp_path):
+    log = CrawlStatsLog(str(tmp_path))
+    log.record("a", False, total=1000, review_count=100)
+    log.record("a", True, review_count=1000)
+    stats = load_crawl_stats(str(tmp_path))
+    assert stats["a"]["total"] == 1000 and stats["a"]["review_count"] == 1000 and stats["a"]["completed"] is True
@@ -0,0 +1,116 @@
+import time
+import pytest
+from fake_sqs import FakeSqsClient
+from work_queue import SqsWorkQueue
+
+# SQS 작업 큐: 완료(ack)한 메시지가 삭제되기 전에 가시성이 끝나 다른 워커에게 다시 보이지 않는지
+
+
+@pytest.fixture
+def sqs():
+    client = FakeSqsClient(default_visibility_timeout=1, max_wait_seconds=0)
+    client.queue_url = client.create_queue(QueueName="cafe_queue")["QueueUrl"]
+    return client
+
+def open_queue(sqs, heartbeat_seconds=0.3):
+    return SqsWorkQueue(sqs, [sqs.queue_url], wait_seconds=0, visibility_timeout=1, heartbeat_seconds=heartbeat_seconds)
+
+def send_cafes(sqs, count):
+    for i in range(count):
+        sqs.send_message(QueueUrl=sqs.queue_url, MessageBody=f"cafe{i}")
+
+
+def test_acked_message_is_not_redelivered_before_batch_fills(sqs):
+    send_cafes(sqs, 3)
+    work_queue = open_queue(sqs)
+    other = open_queue(sqs)
+    try:
+        task = work_queue.receive()
+        assert task.body == "cafe0"
+        work_queue.ack(task) # 10개가 모이지 않아 바로 삭제되지는 않음
+        time.sleep(2) # 가시성 제한 시간(1초)보다 길게
+        received = []
+        while True:
+            other_task = other.receive()
+            if other_task is None:
+                break
+            received.append(other_task.body)
+            other.nack(other_task, delay=60)
+        assert "cafe0" not in received
+    finally:
+        work_queue.close()
+        other.close()
+
+def test_heartbeat_deletes_pending_acks(sqs):
+    send_cafes(sqs, 2)
+    work_queue = open_queue(sqs)
+    try:
+        task = work_queue.receive()
+        work_queue.ack(task)
+        time.sleep(1)
+        visible, inflight = work_queue.backlog()
+        # 삭제된 cafe0은 없고, 버퍼에 받아 둔 cafe1만 처리 중
+        assert (visible, inflight) == (0, 1)
+        assert work_queue.api_calls["delete_message_batch"] >= 1
+    finally:
+        work_queue.close()
+
+def test_held_message_stays_invisible_while_processing(sqs):
+    send_cafes(sqs, 1)
+    work_queue = open_queue(sqs)
+    other = open_queue(sqs)
+    try:
+        task = work_queue.receive()
+        time.sleep(2) # 긴 카페 처리 중
+        assert other.receive() is None
+        work_queue.ack(task)
+    finally:
+        work_queue.close()
+        other.close()
+    assert sqs.get_queue_attributes(QueueUrl=sqs.queue_url)["Attributes"]["ApproximateNumberOfMessagesNotVisible"] == "0"
+
+def test_nack_makes_message_visible_again(sqs):
+    send_cafes(sqs, 1)
+    work_queue = open_queue(sqs)
+    try:
+        task = work_queue.receive()
+        work_queue.nack(task, delay=0)
+        again = work_queue.receive()
+        assert again.body == "cafe0"
+        assert again.receipt_handle != task.receipt_handle
+        work_queue.ack(again)
+    finally:
+        work_queue.close()
+
+def test_continue_deletes_original_before_returning(sqs):
+    from crawl import settle_review_task
+    send_cafes(sqs, 1)
+    work_queue = open_queue(sqs, heartbeat_seconds=60)
+    try:
+        task = work_queue.receive()
+        settle_review_task(work_queue, task, "CONTINUE")
+        time.sleep(1.5) # 하트비트 없이 원본의 가시성이 끝나도
+        bodies = []
+        while True:
+            again = work_queue.receive()
+            if again is None:
+                break
+            bodies.append(again.body)
+            work_queue.ack_now(again)
+        assert bodies == ["cafe0"] # 이어하기 메시지 하나만
+    finally:
+        work_queue.close()
+
+# 워커는 기본으로 하나씩 받으므로 처리 중인 워커가 남은 메시지를 붙잡지 않음 (노는 워커가 바로 가져감)
+def test_crawl_worker_does_not_hold_unstarted_messages(sqs, crawl_env, monkeypatch):
+    crawl = crawl_env
+    monkeypatch.setattr(crawl, "SQS_QUEUE_URLS", [sqs.queue_url])
+    send_cafes(sqs, 3)
+    work_queue = crawl.open_crawl_work_queue(sqs)
+    other = open_queue(sqs)
+    try:
+        assert work_queue.receive().body == "cafe0"
+        assert [other.receive().body, other.receive().body] == ["cafe1", "cafe2"]
+    finally:
+        work_queue.close()
+        other.close()